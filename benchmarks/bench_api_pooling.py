@@ -0,0 +1,98 @@
+"""Латентность логина с общей сессией aiohttp и без нее.
+
+Поднимает локальный stub-сервер ``POST /api/v1/accounts/login`` и сравнивает
+p50/p99 для старого подхода (новая ClientSession на каждый запрос) и
+пулированного ``APIClient``.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import aiohttp
+from aiohttp import web
+
+from benchmarks.common import setup_env, summarize
+
+setup_env()
+
+from config import settings
+from src.services.api_client import APIClient
+
+LOGIN_ENDPOINT = "api/v1/accounts/login"
+PAYLOAD = {
+    "telegram_username": "bench",
+    "telegram_user_id": "1",
+    "phone": "+79001234567",
+}
+
+
+async def _login_handler(_: web.Request) -> web.Response:
+    return web.json_response(
+        {"authorization_link": "https://example.com/auth?token=x", "expires_at": 0}
+    )
+
+
+async def _start_stub_server() -> web.AppRunner:
+    app = web.Application()
+    app.router.add_post(f"/{LOGIN_ENDPOINT}", _login_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+
+async def _unpooled_login(base_url: str, auth: aiohttp.BasicAuth) -> None:
+    async with aiohttp.ClientSession(auth=auth) as session:
+        async with session.post(f"{base_url}/{LOGIN_ENDPOINT}", json=PAYLOAD) as r:
+            await r.json()
+
+
+async def _measure(call, requests: int, concurrency: int) -> list:
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await call()
+            samples.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return samples
+
+
+async def main(requests: int, concurrency: int) -> None:
+    runner = await _start_stub_server()
+    port = runner.addresses[0][1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    auth = aiohttp.BasicAuth(settings.API_LOGIN, settings.API_PASSWORD)
+    unpooled = await _measure(
+        lambda: _unpooled_login(base_url, auth), requests, concurrency
+    )
+
+    client = APIClient(base_url)
+    await client.start()
+    try:
+        pooled = await _measure(
+            lambda: client.post_data(LOGIN_ENDPOINT, PAYLOAD), requests, concurrency
+        )
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+    print(
+        json.dumps(
+            {"unpooled": summarize(unpooled), "pooled": summarize(pooled)}, indent=2
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
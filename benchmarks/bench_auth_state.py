@@ -0,0 +1,65 @@
+"""Латентность чтения состояния авторизации на одно нажатие «Авторизоваться».
+
+Сравнивает два последовательных GET (``get_auth_link`` + ``get_phone``) с
+одним MGET (``get_auth_state``) на локальном Redis. Пользователи засеваются
+только номером телефона — это худший случай для старого пути.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import redis.asyncio as redis
+
+from benchmarks.common import setup_env, summarize
+
+setup_env()
+
+from src.services.cache import CacheService
+
+USER_ID_OFFSET = 900_000_000
+
+
+async def _legacy_lookup(cache: CacheService, user_id: int) -> None:
+    auth_data = await cache.get_auth_link(user_id)
+    if not auth_data:
+        await cache.get_phone(user_id)
+
+
+async def _measure(call, users: int) -> list:
+    samples = []
+    for i in range(users):
+        started = time.perf_counter()
+        await call(USER_ID_OFFSET + i)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def main(redis_url: str, users: int) -> None:
+    cache = CacheService()
+    cache.local_cache = None
+    cache.use_redis(redis.from_url(redis_url, decode_responses=True))
+
+    for i in range(users):
+        await cache.set_phone(USER_ID_OFFSET + i, "+79001234567")
+
+    try:
+        legacy = await _measure(lambda uid: _legacy_lookup(cache, uid), users)
+        pipelined = await _measure(cache.get_auth_state, users)
+    finally:
+        for i in range(users):
+            await cache.delete_phone(USER_ID_OFFSET + i)
+        await cache.close()
+
+    result = {"get_then_get": summarize(legacy), "mget": summarize(pipelined)}
+    result["saved_p50_ms"] = result["get_then_get"]["p50_ms"] - result["mget"]["p50_ms"]
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--users", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.redis_url, args.users))
@@ -0,0 +1,126 @@
+"""Память Redis на пользователя: отдельные ключи против хешей-корзин.
+
+Для каждой раскладки (``CACHE_KEY_LAYOUT``) очищает базу, записывает
+``--users`` пользователей — телефон и ссылку авторизации с их TTL — через
+бэкенд кеша пачками по ``--batch`` и печатает прирост used_memory на
+пользователя, число ключей, время загрузки и латентность MGET
+телефона и ссылки.
+
+Нужен Redis 7.4+ (HEXPIRE), база из ``--redis-url`` очищается (FLUSHDB).
+С ``--redis-url fake`` память не измеряется: fakeredis не поддерживает INFO.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from benchmarks.common import make_redis, setup_env, summarize
+
+setup_env()
+
+from config import settings
+from src.constants import CACHE_AUTH_LINK_PREFIX, CACHE_PHONE_PREFIX
+from src.services.cache import CacheService
+from src.services.cache_serializer import CompactAuthLinkSerializer
+
+USER_ID_OFFSET = 5_000_000_000
+
+
+async def _used_memory(client: Any) -> int | None:
+    try:
+        return (await client.info("memory"))["used_memory"]
+    except (RedisError, KeyError):
+        return None
+
+
+async def _run(client: Any, layout: str, args: argparse.Namespace) -> dict[str, Any]:
+    settings.CACHE_KEY_LAYOUT = layout
+    settings.CACHE_BUCKET_COUNT = args.bucket_count
+    backend = CacheService._make_redis_backend(client)
+    serializer = CompactAuthLinkSerializer()
+    expires_at = int(time.time()) + settings.AUTH_LINK_CACHE_TTL
+
+    await client.flushdb()
+    before = await _used_memory(client)
+    started = time.perf_counter()
+    for start in range(0, args.users, args.batch):
+        writes = []
+        for user_id in range(
+            USER_ID_OFFSET + start, USER_ID_OFFSET + min(start + args.batch, args.users)
+        ):
+            link = f"https://auth.example.com/login?token={user_id:032x}"
+            writes.append(
+                (
+                    f"{CACHE_PHONE_PREFIX}{user_id}",
+                    (settings.PHONE_CACHE_TTL, f"+7900{user_id % 10_000_000:07d}"),
+                )
+            )
+            writes.append(
+                (
+                    f"{CACHE_AUTH_LINK_PREFIX}{user_id}",
+                    (
+                        settings.AUTH_LINK_CACHE_TTL,
+                        serializer.dumps({"link": link, "expires_at": expires_at}),
+                    ),
+                )
+            )
+        await backend.write(writes)
+    load_s = time.perf_counter() - started
+    after = await _used_memory(client)
+
+    rng = random.Random(args.seed)
+    latencies = []
+    for _ in range(args.lookups):
+        user_id = USER_ID_OFFSET + rng.randrange(args.users)
+        started = time.perf_counter()
+        await backend.mget(
+            [f"{CACHE_AUTH_LINK_PREFIX}{user_id}", f"{CACHE_PHONE_PREFIX}{user_id}"]
+        )
+        latencies.append(time.perf_counter() - started)
+
+    return {
+        "keys": await client.dbsize(),
+        "bytes_per_user": (
+            round((after - before) / args.users, 1)
+            if before is not None and after is not None
+            else None
+        ),
+        "load_s": round(load_s, 2),
+        "users_per_s": round(args.users / load_s),
+        "mget": {key: round(value, 3) for key, value in summarize(latencies).items()},
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    client = make_redis(args.redis_url)
+    try:
+        results = {
+            "users": args.users,
+            "bucket_count": args.bucket_count,
+            "layouts": {
+                layout: await _run(client, layout, args)
+                for layout in ("keys", "buckets")
+            },
+        }
+        await client.flushdb()
+    finally:
+        await client.aclose()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--bucket-count", type=int, default=settings.CACHE_BUCKET_COUNT)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,149 @@
+"""Форматы записи ссылки авторизации в кеше: JSON против компактного.
+
+Для ``--users`` синтетических пользователей кодирует и декодирует записи
+``{"link": ..., "expires_at": ...}`` каждым форматом, включая перевод в байты
+UTF-8 и обратно (его делает клиент Redis с decode_responses=True). Печатает
+пропускную способность и средний размер значения. Формат ``struct`` —
+справочный: заголовок фиксированной длины и байты ссылки; он требует клиента
+без decode_responses и в боте не используется.
+
+С ``--redis-url`` (настоящий Redis) записывает ключи каждого формата и
+печатает прирост used_memory на ключ.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import struct
+import time
+from typing import Any, Callable
+
+from benchmarks.common import make_redis, setup_env
+
+setup_env()
+
+from src.constants import CACHE_AUTH_LINK_PREFIX
+from src.services.cache_serializer import (
+    AuthLinkSerializer,
+    CompactAuthLinkSerializer,
+    JsonAuthLinkSerializer,
+)
+
+USER_ID_OFFSET = 800_000_000
+REDIS_BATCH = 10_000
+
+STRUCT_HEADER = struct.Struct("!BI")
+
+
+def _struct_dumps(auth_data: dict) -> bytes:
+    return STRUCT_HEADER.pack(3, auth_data["expires_at"]) + auth_data["link"].encode()
+
+
+def _struct_loads(raw: bytes) -> dict:
+    _, expires_at = STRUCT_HEADER.unpack_from(raw)
+    return {"link": raw[STRUCT_HEADER.size :].decode(), "expires_at": expires_at}
+
+
+def _text_codec(
+    serializer: AuthLinkSerializer,
+) -> tuple[Callable[[dict], bytes], Callable[[bytes], dict]]:
+    dumps, loads = serializer.dumps, serializer.loads
+    return (
+        lambda auth_data: dumps(auth_data).encode(),
+        lambda raw: loads(raw.decode()),
+    )
+
+
+CODECS = {
+    "json": _text_codec(JsonAuthLinkSerializer()),
+    "compact": _text_codec(CompactAuthLinkSerializer()),
+    "struct": (_struct_dumps, _struct_loads),
+}
+
+
+def _records(count: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    now = int(time.time())
+    return [
+        {
+            "link": f"https://auth.example.com/login?token={rng.getrandbits(128):032x}",
+            "expires_at": now + rng.randrange(60, 600),
+        }
+        for _ in range(count)
+    ]
+
+
+def _measure(records: list[dict], dumps: Callable, loads: Callable) -> dict[str, Any]:
+    started = time.perf_counter()
+    encoded = [dumps(auth_data) for auth_data in records]
+    encode_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    decoded = [loads(raw) for raw in encoded]
+    decode_s = time.perf_counter() - started
+
+    assert decoded[-1] == records[-1]
+    return {
+        "encode_ns": round(encode_s / len(records) * 1e9),
+        "decode_ns": round(decode_s / len(records) * 1e9),
+        "encode_per_s": round(len(records) / encode_s),
+        "decode_per_s": round(len(records) / decode_s),
+        "value_bytes": round(sum(map(len, encoded)) / len(records), 1),
+    }
+
+
+async def _redis_memory(url: str, records: list[dict]) -> dict[str, float]:
+    """Прирост used_memory на ключ для каждого текстового формата"""
+    client = make_redis(url)
+    result = {}
+    try:
+        for name in ("json", "compact"):
+            dumps = CODECS[name][0]
+            await client.flushdb()
+            before = (await client.info("memory"))["used_memory"]
+            for start in range(0, len(records), REDIS_BATCH):
+                async with client.pipeline(transaction=False) as pipe:
+                    for i, auth_data in enumerate(
+                        records[start : start + REDIS_BATCH], start
+                    ):
+                        pipe.setex(
+                            f"{CACHE_AUTH_LINK_PREFIX}{USER_ID_OFFSET + i}",
+                            600,
+                            dumps(auth_data).decode(),
+                        )
+                    await pipe.execute()
+            after = (await client.info("memory"))["used_memory"]
+            result[name] = round((after - before) / len(records), 1)
+        await client.flushdb()
+    finally:
+        await client.aclose()
+    return result
+
+
+def main(args: argparse.Namespace) -> None:
+    records = _records(args.users, args.seed)
+    results: dict[str, Any] = {
+        "users": args.users,
+        "formats": {
+            name: _measure(records, dumps, loads)
+            for name, (dumps, loads) in CODECS.items()
+        },
+    }
+    if args.redis_url:
+        results["redis_bytes_per_key"] = asyncio.run(
+            _redis_memory(args.redis_url, records)
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--redis-url",
+        default=None,
+        help="настоящий Redis для замера памяти; база очищается (FLUSHDB)",
+    )
+    main(parser.parse_args())
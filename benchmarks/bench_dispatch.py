@@ -0,0 +1,126 @@
+"""Сколько фильтров проверяет aiogram на одно обновление.
+
+Сравнивает прежнюю раскладку (два роутера с дублирующимися обработчиками и
+цепочкой ``F.data == ...``/``F.data.startswith(...)``) с текущей, где
+callback_query маршрутизируется по префиксу через словарь.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from collections import Counter
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from aiogram import Dispatcher, F, Router
+from aiogram.dispatcher.event.handler import FilterObject
+from aiogram.filters import Command
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from benchmarks.fake_telegram import (
+    FakeSession,
+    callback_update,
+    fake_bot,
+    message_update,
+)
+from src.constants import (
+    CALLBACK_AUTH,
+    CALLBACK_FAQ,
+    CALLBACK_FAQ_BACK,
+    CALLBACK_FAQ_HOME,
+    CALLBACK_FAQ_QUESTION,
+    CALLBACK_FAQ_THEME,
+)
+from src.handlers import register_handlers
+from src.services.faq_service import FAQService
+
+
+class LegacyAuthState(StatesGroup):
+    waiting_for_phone = State()
+
+
+async def _noop(*_, **__) -> None:
+    return None
+
+
+def _legacy_router(with_faq: bool) -> Router:
+    """Роутер с тем же набором фильтров, что был в start.py/faq.py"""
+    router = Router()
+    router.message(Command("start"))(_noop)
+    router.callback_query(F.data == CALLBACK_AUTH)(_noop)
+    if with_faq:
+        router.callback_query(F.data == CALLBACK_FAQ)(_noop)
+        router.callback_query(F.data.startswith(CALLBACK_FAQ_THEME))(_noop)
+        router.callback_query(F.data.startswith(CALLBACK_FAQ_QUESTION))(_noop)
+        router.callback_query(F.data == CALLBACK_FAQ_BACK)(_noop)
+        router.callback_query(F.data == CALLBACK_FAQ_HOME)(_noop)
+    router.message(LegacyAuthState.waiting_for_phone, F.contact)(_noop)
+    return router
+
+
+def _updates(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    versions = FAQService.get_versions()
+    callbacks = [CALLBACK_FAQ, CALLBACK_FAQ_BACK, CALLBACK_FAQ_HOME]
+    callbacks += [f"{CALLBACK_FAQ_THEME}:{v}" for v in versions]
+    callbacks += [f"{CALLBACK_FAQ_QUESTION}:{v}:0" for v in versions]
+    updates = []
+    for _ in range(count):
+        user_id = 10_000 + rng.randrange(100)
+        if rng.random() < 0.2:
+            updates.append(message_update(user_id, "/start"))
+        else:
+            updates.append(callback_update(user_id, rng.choice(callbacks)))
+    return updates
+
+
+async def _count_filters(dp: Dispatcher, updates: list) -> float:
+    bot = fake_bot(FakeSession())
+    counter: Counter = Counter()
+    original_call = FilterObject.call
+
+    async def counting_call(self, *args, **kwargs):
+        counter["filters"] += 1
+        return await original_call(self, *args, **kwargs)
+
+    FilterObject.call = counting_call
+    try:
+        for update in updates:
+            await dp.feed_raw_update(bot, update)
+    finally:
+        FilterObject.call = original_call
+    return counter["filters"] / len(updates)
+
+
+async def main(count: int, seed: int) -> None:
+    updates = _updates(count, seed)
+
+    legacy = Dispatcher(storage=MemoryStorage())
+    legacy.include_router(_legacy_router(with_faq=False))
+    legacy.include_router(_legacy_router(with_faq=True))
+
+    current = Dispatcher(storage=MemoryStorage())
+    register_handlers(current)
+
+    print(
+        json.dumps(
+            {
+                "updates": count,
+                "legacy_filters_per_update": await _count_filters(legacy, updates),
+                "current_filters_per_update": await _count_filters(current, updates),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(main(args.updates, args.seed))
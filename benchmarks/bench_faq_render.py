@@ -0,0 +1,92 @@
+"""CPU на один FAQ-колбэк: рендеринг на лету против заранее построенного индекса.
+
+Имитирует поток колбэков (список тем, тема, вопрос) по случайным индексам и
+сравнивает процессорное время на колбэк.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from src.services.faq_index import (
+    build_navigation_keyboard,
+    build_questions_keyboard,
+    build_themes_keyboard,
+    format_question_answer,
+    format_theme_title,
+)
+from src.services.faq_service import FAQService
+from src.types import FAQ_DATA
+
+VERSIONS = list(FAQService.get_versions())
+
+
+def _render_on_the_fly(kind: str, theme_index: int, question_index: int) -> None:
+    version = VERSIONS[theme_index]
+    if kind == "themes":
+        build_themes_keyboard(FAQ_DATA, VERSIONS)
+    elif kind == "theme":
+        theme = FAQ_DATA[theme_index]
+        format_theme_title(theme)
+        build_questions_keyboard(theme, version)
+    else:
+        question = FAQ_DATA[theme_index]["questions"][question_index]
+        format_question_answer(question)
+        build_navigation_keyboard(version)
+
+
+def _render_from_index(kind: str, theme_index: int, question_index: int) -> None:
+    if kind == "themes":
+        FAQService.get_themes_markup()
+    elif kind == "theme":
+        FAQService.get_theme_view(theme_index)
+    else:
+        FAQService.get_question_view(theme_index, question_index)
+
+
+def _callbacks(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        theme_index = rng.randrange(len(FAQ_DATA))
+        question_index = rng.randrange(len(FAQ_DATA[theme_index]["questions"]))
+        kind = rng.choice(("themes", "theme", "question"))
+        result.append((kind, theme_index, question_index))
+    return result
+
+
+def _cpu_per_callback_us(render, callbacks: list) -> float:
+    started = time.process_time()
+    for callback in callbacks:
+        render(*callback)
+    return (time.process_time() - started) / len(callbacks) * 1_000_000
+
+
+def main(count: int, seed: int) -> None:
+    callbacks = _callbacks(count, seed)
+    on_the_fly = _cpu_per_callback_us(_render_on_the_fly, callbacks)
+    indexed = _cpu_per_callback_us(_render_from_index, callbacks)
+    print(
+        json.dumps(
+            {
+                "callbacks": count,
+                "on_the_fly_us": on_the_fly,
+                "indexed_us": indexed,
+                "speedup": on_the_fly / indexed if indexed else None,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--callbacks", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.callbacks, args.seed)
@@ -0,0 +1,95 @@
+"""Поиск по FAQ на синтетическом корпусе.
+
+Генерирует ``--questions`` вопросов из словаря реального FAQ с частотами слов
+по закону Ципфа, строит инвертированный индекс и измеряет латентность запросов.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from benchmarks.common import setup_env, summarize
+
+setup_env()
+
+from src.services.faq_search import TOKEN_RE, FAQSearchIndex
+from src.types import FAQ_DATA
+
+QUESTIONS_PER_THEME = 50
+
+
+def _vocabulary() -> list:
+    words = set()
+    for theme in FAQ_DATA:
+        for question in theme["questions"]:
+            text = f"{question['question']} {question['answer']}".lower()
+            words.update(TOKEN_RE.findall(text))
+    return sorted(words)
+
+
+def _corpus(questions: int, rng: random.Random) -> list:
+    words = _vocabulary()
+    rng.shuffle(words)
+    zipf = [1 / rank for rank in range(1, len(words) + 1)]
+
+    def text(k: int) -> str:
+        return " ".join(rng.choices(words, weights=zipf, k=k))
+
+    themes = []
+    for start in range(0, questions, QUESTIONS_PER_THEME):
+        count = min(QUESTIONS_PER_THEME, questions - start)
+        themes.append(
+            {
+                "theme": f"Тема {start // QUESTIONS_PER_THEME}",
+                "questions": [
+                    {
+                        "question": text(6) + "?",
+                        "answer": text(40),
+                    }
+                    for _ in range(count)
+                ],
+            }
+        )
+    return themes
+
+
+def main(questions: int, queries: int, seed: int) -> None:
+    rng = random.Random(seed)
+    themes = _corpus(questions, rng)
+    words = _vocabulary()
+
+    started = time.perf_counter()
+    index = FAQSearchIndex(themes)
+    build_seconds = time.perf_counter() - started
+
+    query_texts = [
+        " ".join(rng.choices(words, k=rng.randint(1, 4))) for _ in range(queries)
+    ]
+    samples = {"full": [], "prefix": []}
+    for text in query_texts:
+        for mode, prefix in (("full", False), ("prefix", True)):
+            started = time.perf_counter()
+            index.search(text, limit=3, prefix=prefix)
+            samples[mode].append(time.perf_counter() - started)
+
+    print(
+        json.dumps(
+            {
+                "questions": len(index),
+                "build_ms": build_seconds * 1000,
+                "query": summarize(samples["full"]),
+                "inline_prefix_query": summarize(samples["prefix"]),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.questions, args.queries, args.seed)
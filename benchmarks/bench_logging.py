@@ -0,0 +1,187 @@
+"""Подвисания event loop из-за логирования при всплеске обновлений.
+
+Прогоняет через диспетчер всплеск обновлений (по умолчанию 5000: /start,
+авторизация с отправкой телефона, FAQ, поиск) дважды — со старой настройкой
+``logging.basicConfig`` и с очередью и фоновым потоком из
+``configure_logging``. Логи пишутся в «медленный» поток, который имитирует
+блокирующий stdout (pipe в docker или journald под нагрузкой).
+
+Пока идет всплеск, отдельная задача спит по 1 мс и замеряет, насколько
+позже она просыпается; суммарное и максимальное опоздание — время, на
+которое был занят event loop. Отдельно считается время, проведенное в
+обработчиках логов в потоке event loop.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import final
+
+from benchmarks.common import make_redis, percentile, setup_env
+
+setup_env()
+
+from aiogram import Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from benchmarks.fake_telegram import FakeSession, fake_bot
+from benchmarks.workload import start_stub_api, user_sessions
+from src.handlers import register_handlers
+from src.middlewares import register_middlewares
+from src.services.api_client import api_client
+from src.services.cache import cache_service
+from src.utils.logger import TEXT_FORMAT, configure_logging, stop_logging
+
+MONITOR_INTERVAL = 0.001
+USER_ID_OFFSET = 700_000_000
+WARMUP_UPDATES = 500
+
+
+class SlowStream:
+    """Поток, каждая запись в который блокирует вызывающий поток"""
+
+    def __init__(self, write_latency: float):
+        self.write_latency = write_latency
+        self.writes = 0
+
+    def write(self, data: str) -> int:
+        self.writes += 1
+        time.sleep(self.write_latency)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+@final
+class LoopLoggingTimer:
+    """Суммирует время вызовов обработчиков логов из потока event loop"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._thread = threading.get_ident()
+        self._original = logging.Logger.callHandlers
+
+    def __enter__(self) -> "LoopLoggingTimer":
+        timer, original = self, self._original
+
+        def call_handlers(logger: logging.Logger, record: logging.LogRecord) -> None:
+            if threading.get_ident() != timer._thread:
+                return original(logger, record)
+            started = time.perf_counter()
+            try:
+                return original(logger, record)
+            finally:
+                timer.seconds += time.perf_counter() - started
+
+        logging.Logger.callHandlers = call_handlers
+        return self
+
+    def __exit__(self, *exc) -> None:
+        logging.Logger.callHandlers = self._original
+
+
+async def _monitor_loop(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(MONITOR_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - started - MONITOR_INTERVAL))
+
+
+async def _burst(dp: Dispatcher, sessions: list[list], concurrency: int) -> dict:
+    bot = fake_bot(FakeSession())
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_session(session: list) -> None:
+        async with semaphore:
+            for update in session:
+                await dp.feed_raw_update(bot, update)
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_monitor_loop(lags, stop))
+    started = time.perf_counter()
+    with LoopLoggingTimer() as timer:
+        await asyncio.gather(*(run_session(session) for session in sessions))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "logging_on_loop_ms": round(timer.seconds * 1000, 1),
+        "loop_stall_total_ms": round(sum(lags) * 1000, 1),
+        "loop_lag_p99_ms": round(percentile(lags, 99) * 1000, 3),
+        "loop_lag_max_ms": round(max(lags, default=0.0) * 1000, 3),
+    }
+
+
+def _basic_config(stream: SlowStream) -> None:
+    """Прежняя настройка из bot.py: синхронная запись из event loop"""
+    stop_logging()
+    logging.basicConfig(
+        level=logging.INFO, format=TEXT_FORMAT, stream=stream, force=True
+    )
+
+
+async def _run(
+    dp: Dispatcher,
+    mode: str,
+    user_offset: int,
+    args: argparse.Namespace,
+    warmup: bool = False,
+) -> dict:
+    stream = SlowStream(args.write_latency_us / 1_000_000)
+    if mode == "basic_config":
+        _basic_config(stream)
+    else:
+        configure_logging(stream=stream, log_format=args.log_format)
+
+    cache_service.use_redis(make_redis(args.redis_url))
+    count = min(args.updates, WARMUP_UPDATES) if warmup else args.updates
+    sessions = user_sessions(count, args.seed, user_offset)
+    try:
+        result = await _burst(dp, sessions, args.concurrency)
+    finally:
+        await cache_service.redis_client.aclose()
+        # Дописываем очередь, чтобы ее хвост не попал в следующий прогон
+        stop_logging()
+    result["records_written"] = stream.writes
+    return result
+
+
+async def main(args: argparse.Namespace) -> None:
+    runner = await start_stub_api()
+    api_client.base_url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+    await api_client.start()
+    # Роутеры подключаются к диспетчеру только один раз, поэтому диспетчер
+    # общий, а прогоны расходятся по разным пользователям
+    dp = Dispatcher(storage=MemoryStorage())
+    register_handlers(dp)
+    register_middlewares(dp)
+    results = {"updates": args.updates}
+    try:
+        # Прогрев: первые вызовы импортируют методы aiogram и строят модели
+        logging.disable(logging.CRITICAL)
+        await _run(dp, "basic_config", USER_ID_OFFSET, args, warmup=True)
+        logging.disable(logging.NOTSET)
+        for run, mode in enumerate(("basic_config", "queue"), start=1):
+            user_offset = USER_ID_OFFSET + run * args.updates
+            results[mode] = await _run(dp, mode, user_offset, args)
+    finally:
+        await api_client.close()
+        await runner.cleanup()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--write-latency-us", type=float, default=50.0)
+    parser.add_argument("--log-format", choices=("text", "json"), default="json")
+    parser.add_argument("--redis-url", default="fake")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,341 @@
+"""Нагрузочный бенчмарк всего конвейера обновлений.
+
+Синтетические обновления (/start, нажатия «авторизации», отправка
+контакта, навигация по FAQ и поиск) проходят через настоящий
+``Dispatcher`` с ``register_handlers`` и ``register_middlewares``.
+Telegram подменен поддельной сессией, Redis — fakeredis (или локальным
+redis-server через ``--redis-url``), API логина — stub-сервером.
+
+Прогоны:
+
+- нагрузочный — сессии пользователей параллельно (``--concurrency``):
+  пропускная способность, латентность обновлений и обработчиков
+  (p50/p95/p99), команды и обращения к Redis, запросы к Telegram и сборки
+  мусора на обновление;
+- аллокаций — те же сценарии последовательно под ``tracemalloc``: пик
+  выделенной памяти на обновление и память, оставшаяся после прогона.
+
+Результат — JSON с коммитом и параметрами запуска (``--output`` пишет его в
+файл); ``--baseline`` сравнивает с сохраненным результатом другого коммита.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Awaitable
+from typing import Any, Callable
+
+from benchmarks.common import make_redis, setup_env, summarize
+
+setup_env()
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.types import TelegramObject
+
+from benchmarks.fake_telegram import FakeSession, fake_bot
+from benchmarks.workload import start_stub_api, user_sessions
+from src.handlers import register_handlers
+from src.middlewares import register_middlewares
+from src.middlewares.metrics import get_handler_name
+from src.services.api_client import api_client
+from src.services.cache import cache_service
+from src.services.task_manager import task_manager
+
+USER_ID_OFFSET = 900_000_000
+WARMUP_UPDATES = 500
+
+# Метрики, которые сравниваются с --baseline: чем меньше, тем лучше,
+# кроме пропускной способности
+COMPARED = {
+    ("load", "throughput_ups"): True,
+    ("load", "update_latency", "p50_ms"): False,
+    ("load", "update_latency", "p95_ms"): False,
+    ("load", "update_latency", "p99_ms"): False,
+    ("load", "redis_commands_per_update"): False,
+    ("load", "redis_round_trips_per_update"): False,
+    ("load", "telegram_calls_per_update"): False,
+    ("allocations", "peak_kib_per_update"): False,
+    ("allocations", "retained_bytes_per_update"): False,
+}
+
+
+class RedisOpCounter:
+    """Считает команды и обращения к Redis, в том числе через pipeline"""
+
+    def __init__(self, client: Any):
+        self.commands = 0
+        self.round_trips = 0
+        execute_command = client.execute_command
+        pipeline = client.pipeline
+
+        async def counting_execute_command(*args: Any, **options: Any) -> Any:
+            self.commands += 1
+            self.round_trips += 1
+            return await execute_command(*args, **options)
+
+        def counting_pipeline(*args: Any, **kwargs: Any) -> Any:
+            pipe = pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            async def counting_execute(*exec_args: Any, **exec_kwargs: Any) -> Any:
+                self.commands += len(pipe.command_stack)
+                self.round_trips += 1
+                return await execute(*exec_args, **exec_kwargs)
+
+            pipe.execute = counting_execute
+            return pipe
+
+        client.execute_command = counting_execute_command
+        client.pipeline = counting_pipeline
+
+    def reset(self) -> None:
+        self.commands = self.round_trips = 0
+
+
+class HandlerTimer(BaseMiddleware):
+    """Собирает время каждого обработчика по имени"""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.samples[get_handler_name(event, data)].append(
+                time.perf_counter() - started
+            )
+
+
+def _git_revision() -> str | None:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{revision}-dirty" if dirty else revision
+
+
+def _update_type(update: dict[str, Any]) -> str:
+    if "callback_query" in update:
+        return "callback_query"
+    if "contact" in update["message"]:
+        return "contact"
+    return "command" if update["message"].get("text", "").startswith("/") else "text"
+
+
+def _round(summary: dict[str, float]) -> dict[str, float]:
+    return {key: round(value, 3) for key, value in summary.items()}
+
+
+async def _load_pass(
+    dp: Dispatcher,
+    timer: HandlerTimer,
+    redis_ops: RedisOpCounter,
+    sessions: list[list],
+    concurrency: int,
+) -> dict[str, Any]:
+    session = FakeSession()
+    bot = fake_bot(session)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: dict[str, list[float]] = defaultdict(list)
+
+    async def run_session(updates: list) -> None:
+        async with semaphore:
+            for update in updates:
+                started = time.perf_counter()
+                await dp.feed_raw_update(bot, update)
+                latencies[_update_type(update)].append(time.perf_counter() - started)
+
+    count = sum(len(updates) for updates in sessions)
+    timer.samples.clear()
+    redis_ops.reset()
+    gc_before = gc.get_stats()[0]["collections"]
+    started = time.perf_counter()
+    await asyncio.gather(*(run_session(updates) for updates in sessions))
+    elapsed = time.perf_counter() - started
+    gc_collections = gc.get_stats()[0]["collections"] - gc_before
+    # Фоновые удаления тоже идут в Telegram: дожидаемся их вне замера времени
+    await task_manager.drain()
+
+    all_latencies = [sample for samples in latencies.values() for sample in samples]
+    return {
+        "updates": count,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_ups": round(count / elapsed, 1),
+        "update_latency": _round(summarize(all_latencies)),
+        "update_latency_by_type": {
+            name: _round(summarize(samples))
+            for name, samples in sorted(latencies.items())
+        },
+        "handler_latency": {
+            name: _round(summarize(samples))
+            for name, samples in sorted(timer.samples.items())
+        },
+        "redis_commands_per_update": round(redis_ops.commands / count, 3),
+        "redis_round_trips_per_update": round(redis_ops.round_trips / count, 3),
+        "telegram_calls_per_update": round(sum(session.calls.values()) / count, 3),
+        "gc_gen0_collections_per_1k_updates": round(gc_collections * 1000 / count, 2),
+    }
+
+
+async def _allocation_pass(dp: Dispatcher, sessions: list[list]) -> dict[str, Any]:
+    bot = fake_bot(FakeSession())
+    updates = [update for updates in sessions for update in updates]
+    peaks: list[float] = []
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        for update in updates:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await dp.feed_raw_update(bot, update)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        await task_manager.drain()
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "updates": len(updates),
+        "peak_kib_per_update": round(sum(peaks) / len(peaks) / 1024, 2),
+        "peak_kib_max": round(max(peaks) / 1024, 2),
+        "retained_bytes_per_update": round((retained - baseline) / len(updates), 1),
+    }
+
+
+def _lookup(result: dict[str, Any], path: tuple) -> float | None:
+    for key in path:
+        if not isinstance(result, dict) or key not in result:
+            return None
+        result = result[key]
+    return result
+
+
+def _compare(current: dict[str, Any], baseline: dict[str, Any]) -> dict[str, Any]:
+    """Изменение метрик относительно baseline в процентах (+ — лучше)"""
+    changes = {}
+    for path, higher_is_better in COMPARED.items():
+        new, old = _lookup(current, path), _lookup(baseline, path)
+        if not new or not old:
+            continue
+        change = (new - old) / old * 100
+        changes[".".join(path)] = {
+            "baseline": old,
+            "current": new,
+            "improvement_pct": round(change if higher_is_better else -change, 1),
+        }
+    return {"revision": baseline.get("meta", {}).get("revision"), "metrics": changes}
+
+
+def _make_storage(kind: str, client: Any) -> BaseStorage:
+    if kind == "redis":
+        # Как в bot.py: состояния FSM лежат в том же Redis, что и кеш
+        return RedisStorage(redis=client)
+    return MemoryStorage()
+
+
+async def main(args: argparse.Namespace) -> dict[str, Any]:
+    runner = await start_stub_api()
+    api_client.base_url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+    await api_client.start()
+    client = make_redis(args.redis_url)
+    redis_ops = RedisOpCounter(client)
+    cache_service.use_redis(client)
+
+    # Роутеры подключаются к диспетчеру только один раз, поэтому диспетчер
+    # общий, а прогоны расходятся по разным пользователям
+    dp = Dispatcher(storage=_make_storage(args.fsm_storage, client))
+    register_handlers(dp)
+    register_middlewares(dp)
+    timer = HandlerTimer()
+    dp.message.middleware(timer)
+    dp.callback_query.middleware(timer)
+
+    def sessions(count: int, run: int) -> list[list]:
+        offset = USER_ID_OFFSET + run * max(args.updates, WARMUP_UPDATES)
+        return user_sessions(count, args.seed, offset, faq_navigation=True)
+
+    result: dict[str, Any] = {
+        "meta": {
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        }
+    }
+    try:
+        # Прогрев: первые вызовы импортируют методы aiogram и строят модели
+        await _load_pass(
+            dp, timer, redis_ops, sessions(WARMUP_UPDATES, 0), args.concurrency
+        )
+        result["load"] = await _load_pass(
+            dp, timer, redis_ops, sessions(args.updates, 1), args.concurrency
+        )
+        if args.allocation_updates:
+            result["allocations"] = await _allocation_pass(
+                dp, sessions(args.allocation_updates, 2)
+            )
+    finally:
+        await api_client.close()
+        await runner.cleanup()
+        await client.aclose()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument(
+        "--allocation-updates",
+        type=int,
+        default=1000,
+        help="обновлений в прогоне под tracemalloc; 0 — пропустить",
+    )
+    parser.add_argument("--fsm-storage", choices=("redis", "memory"), default="redis")
+    parser.add_argument("--redis-url", default="fake")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="записать JSON в файл")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args()
+
+    result = asyncio.run(main(args))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            result["compare"] = _compare(result, json.load(f))
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
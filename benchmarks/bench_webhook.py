@@ -0,0 +1,138 @@
+"""Нагрузочный тест режима webhook.
+
+Поднимает локальный ``WebhookServer`` с настоящими обработчиками и поддельной
+сессией Bot API, проигрывает записанные обновления (JSON Lines) или
+синтетическую смесь и считает обновления в секунду и задержку ответа сервера.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import aiohttp
+
+from benchmarks.common import make_redis, setup_env, summarize
+
+setup_env()
+
+from aiogram import Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiohttp import web
+
+from benchmarks.fake_telegram import (
+    FakeSession,
+    callback_update,
+    fake_bot,
+    message_update,
+)
+from config import settings
+from src.constants import CALLBACK_FAQ, CALLBACK_FAQ_QUESTION, CALLBACK_FAQ_THEME
+from src.handlers import register_handlers
+from src.services.cache import cache_service
+from src.services.faq_service import FAQService
+from src.webhook import SECRET_HEADER, WebhookServer
+
+
+def synthetic_updates(count: int, users: int, seed: int) -> list:
+    """Смесь /start, навигации по FAQ и поисковых запросов"""
+    rng = random.Random(seed)
+    versions = FAQService.get_versions()
+    updates = []
+    for _ in range(count):
+        user_id = 10_000 + rng.randrange(users)
+        theme = rng.randrange(len(versions))
+        kind = rng.choice(("start", "faq", "theme", "question", "search"))
+        if kind == "start":
+            updates.append(message_update(user_id, "/start"))
+        elif kind == "faq":
+            updates.append(callback_update(user_id, CALLBACK_FAQ))
+        elif kind == "theme":
+            data = f"{CALLBACK_FAQ_THEME}:{versions[theme]}"
+            updates.append(callback_update(user_id, data))
+        elif kind == "question":
+            data = f"{CALLBACK_FAQ_QUESTION}:{versions[theme]}:0"
+            updates.append(callback_update(user_id, data))
+        else:
+            updates.append(message_update(user_id, "как получить сертификат"))
+    return updates
+
+
+def load_updates(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.WEBHOOK_SECRET = "bench-secret"
+    settings.WEBHOOK_MAX_CONCURRENCY = args.handler_concurrency
+    cache_service.use_redis(make_redis(args.redis_url))
+
+    updates = (
+        load_updates(args.updates)
+        if args.updates
+        else synthetic_updates(args.count, args.users, args.seed)
+    )
+
+    session = FakeSession(latency=args.telegram_latency)
+    bot = fake_bot(session)
+    dp = Dispatcher(storage=MemoryStorage())
+    register_handlers(dp)
+
+    server = WebhookServer(dp, bot)
+    runner = web.AppRunner(server.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{runner.addresses[0][1]}{settings.WEBHOOK_PATH}"
+
+    ack_latencies = []
+    errors = 0
+    queue = iter(updates)
+
+    async def client_worker(http: aiohttp.ClientSession) -> None:
+        nonlocal errors
+        for update in queue:
+            started = time.perf_counter()
+            async with http.post(
+                url, json=update, headers={SECRET_HEADER: settings.WEBHOOK_SECRET}
+            ) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            ack_latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    connector = aiohttp.TCPConnector(limit=args.connections)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        await asyncio.gather(*(client_worker(http) for _ in range(args.connections)))
+    await server.drain()
+    elapsed = time.perf_counter() - started
+
+    await runner.cleanup()
+    print(
+        json.dumps(
+            {
+                "updates": len(updates),
+                "errors": errors,
+                "updates_per_sec": len(updates) / elapsed,
+                "ack_latency": summarize(ack_latencies),
+                "telegram_calls": dict(session.calls),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", help="файл JSON Lines с записанными обновлениями")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--connections", type=int, default=40)
+    parser.add_argument("--handler-concurrency", type=int, default=100)
+    parser.add_argument("--telegram-latency", type=float, default=0.0)
+    parser.add_argument("--redis-url", default="fake")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+"""Общие утилиты для бенчмарков.
+
+Запуск из корня репозитория: ``python -m benchmarks.<имя_модуля>``.
+"""
+
+import asyncio
+import os
+import statistics
+from typing import Any
+
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+
+def setup_env() -> None:
+    """Задает значения по умолчанию для обязательных настроек бота"""
+    os.environ.setdefault("BOT_TOKEN", "123456:BENCHMARK")
+    os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+    os.environ.setdefault("API_BASE_URL", "http://127.0.0.1:8081")
+    os.environ.setdefault("API_LOGIN", "bench")
+    os.environ.setdefault("API_PASSWORD", "bench")
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Возвращает q-й перцентиль (0..100) выборки"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Сводка по латентностям в миллисекундах"""
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def make_redis(url: str):
+    """Асинхронный клиент Redis; url ``fake`` — fakeredis в памяти процесса"""
+    if url == "fake":
+        # fakeredis не входит в зависимости проекта, ставится отдельно
+        # с extra lua: без него не работают Lua-скрипты (EVAL)
+        from fakeredis.aioredis import FakeRedis
+
+        return FakeRedis(decode_responses=True)
+
+    import redis.asyncio as redis
+
+    return redis.from_url(url, decode_responses=True)
+
+
+class FlakyRedis:
+    """Подменяет команды клиента: при down=True каждая висит delay и падает.
+
+    По умолчанию падает TimeoutError, как при socket_timeout настоящего
+    клиента; error задает другое исключение.
+    """
+
+    def __init__(self, client: Any, delay: float = 0.0):
+        self.client = client
+        self.delay = delay
+        self.down = False
+        self.error: Exception = RedisTimeoutError("Timeout reading from socket")
+        execute_command = client.execute_command
+        pipeline = client.pipeline
+
+        async def flaky_execute_command(*args: Any, **options: Any) -> Any:
+            await self._maybe_fail()
+            return await execute_command(*args, **options)
+
+        def flaky_pipeline(*args: Any, **kwargs: Any) -> Any:
+            pipe = pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            async def flaky_execute(*exec_args: Any, **exec_kwargs: Any) -> Any:
+                await self._maybe_fail()
+                return await execute(*exec_args, **exec_kwargs)
+
+            pipe.execute = flaky_execute
+            return pipe
+
+        client.execute_command = flaky_execute_command
+        client.pipeline = flaky_pipeline
+
+    async def _maybe_fail(self) -> None:
+        if self.down:
+            await asyncio.sleep(self.delay)
+            raise self.error
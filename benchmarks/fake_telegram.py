@@ -0,0 +1,241 @@
+"""Поддельная сессия Bot API для бенчмарков: ничего не отправляет в сеть."""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import datetime
+import itertools
+import random
+import time
+from collections import Counter
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.methods import GetUpdates, TelegramMethod
+from aiogram.types import Chat, Message, Update, User
+
+from src.services.send_scheduler import CHAT_LIMITED_PREFIXES
+
+# Сколько обновлений отдает один getUpdates, как у настоящего Telegram
+GET_UPDATES_LIMIT = 100
+
+BOT_USER = User(id=1, is_bot=True, first_name="Bench", username="bench_bot")
+
+
+class FakeSession(BaseSession):
+    """Отвечает на методы Bot API правдоподобными объектами и считает вызовы.
+
+    На методы из failing сервер отвечает 400 Bad Request.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.failing: set[str] = set()
+        self._message_ids = itertools.count(1000)
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod, timeout: int | None = None
+    ) -> Any:
+        name = type(method).__name__
+        self.calls[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if name in self.failing:
+            raise TelegramBadRequest(method, f"{name} failed")
+
+        if name == "GetMe":
+            return BOT_USER
+        chat_id = getattr(method, "chat_id", None)
+        if name.startswith(("Send", "Edit")) and chat_id is not None:
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.datetime.now(),
+                chat=Chat(id=chat_id, type="private"),
+                text=getattr(method, "text", None),
+            ).as_(bot)
+        return True
+
+    async def close(self) -> None:
+        pass
+
+    async def stream_content(
+        self, url: str, headers: dict[str, Any] | None = None, **kwargs: Any
+    ) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+
+class GCRA:
+    """Лимит «rate в секунду, burst подряд» в виде теоретического времени прихода"""
+
+    # Запрос доходит до «сервера» позже, чем планировщик списал токен, и эта
+    # задержка плавает (переключения задач, сборка мусора): без допуска
+    # запрос на самой границе лимита иногда выглядел бы превышением
+    LOOSE_TOLERANCE = 1e-3
+
+    def __init__(self, rate: float, burst: int):
+        self.interval = 1 / rate
+        self.tolerance = (burst - 1) * self.interval
+        self.tat = 0.0
+
+    def allow(self, now: float) -> bool:
+        if now < self.tat - self.tolerance - self.LOOSE_TOLERANCE:
+            return False
+        self.tat = max(self.tat, now) + self.interval
+        return True
+
+
+class FloodLimitedSession(FakeSession):
+    """Поддельный Bot API с флуд-лимитами Telegram: общим и на чат.
+
+    Лимиты считаются независимо от реализации в боте; на превышение сервер
+    отвечает 429 RetryAfter. inject_retry_after — доля запросов, на которые
+    429 приходит без причины.
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        global_burst: int,
+        chat_rate: float,
+        chat_burst: int,
+        inject_retry_after: float = 0.0,
+        seed: int = 0,
+    ):
+        super().__init__()
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.inject_retry_after = inject_retry_after
+        self.global_limit = GCRA(global_rate, global_burst)
+        self.chat_limits: dict[int, GCRA] = {}
+        self.rejected: Counter = Counter()
+        self.rng = random.Random(seed)
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod, timeout: int | None = None
+    ) -> Any:
+        name = type(method).__name__
+        now = time.monotonic()
+        if self.rng.random() < self.inject_retry_after:
+            self.rejected["injected"] += 1
+            raise TelegramRetryAfter(method, "Flood control exceeded", 1)
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is not None and name.startswith(CHAT_LIMITED_PREFIXES):
+            limit = self.chat_limits.get(chat_id)
+            if limit is None:
+                limit = self.chat_limits[chat_id] = GCRA(
+                    self.chat_rate, self.chat_burst
+                )
+            if not limit.allow(now):
+                self.rejected["chat"] += 1
+                raise TelegramRetryAfter(method, "Flood control exceeded", 1)
+        if not self.global_limit.allow(now):
+            self.rejected["global"] += 1
+            raise TelegramRetryAfter(method, "Flood control exceeded", 1)
+        return await super().make_request(bot, method, timeout)
+
+
+class UpdateFeedSession(FakeSession):
+    """Отдает заранее подготовленные обновления пачками через getUpdates"""
+
+    def __init__(self, updates: list[dict[str, Any]]):
+        super().__init__()
+        self.updates = updates
+        self.update_ids = [update["update_id"] for update in updates]
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod, timeout: int | None = None
+    ) -> Any:
+        if not isinstance(method, GetUpdates):
+            return await super().make_request(bot, method, timeout)
+        # Как Telegram: offset подтверждает все обновления с меньшим id
+        position = bisect.bisect_left(self.update_ids, method.offset or 0)
+        batch = self.updates[position : position + GET_UPDATES_LIMIT]
+        if not batch:
+            await asyncio.sleep(0.01)
+        return [parse_update(update, bot) for update in batch]
+
+
+def fake_bot(session: FakeSession) -> Bot:
+    """Bot с поддельной сессией и токеном нужного формата"""
+    return Bot(token="123456:BENCHMARK", session=session)
+
+
+_update_ids = itertools.count(1)
+
+
+def _user(user_id: int) -> dict[str, Any]:
+    return {
+        "id": user_id,
+        "is_bot": False,
+        "first_name": "User",
+        "username": f"u{user_id}",
+    }
+
+
+def _chat(user_id: int) -> dict[str, Any]:
+    return {"id": user_id, "type": "private"}
+
+
+def message_update(user_id: int, text: str) -> dict[str, Any]:
+    """Обновление с текстовым сообщением (в т.ч. командой)"""
+    message: dict[str, Any] = {
+        "message_id": next(_update_ids),
+        "date": 0,
+        "chat": _chat(user_id),
+        "from": _user(user_id),
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [
+            {"type": "bot_command", "offset": 0, "length": len(text.split()[0])}
+        ]
+    return {"update_id": next(_update_ids), "message": message}
+
+
+def contact_update(user_id: int, phone: str) -> dict[str, Any]:
+    """Обновление с отправленным контактом"""
+    return {
+        "update_id": next(_update_ids),
+        "message": {
+            "message_id": next(_update_ids),
+            "date": 0,
+            "chat": _chat(user_id),
+            "from": _user(user_id),
+            "contact": {
+                "phone_number": phone,
+                "first_name": "User",
+                "user_id": user_id,
+            },
+        },
+    }
+
+
+def callback_update(user_id: int, data: str) -> dict[str, Any]:
+    """Обновление с нажатием inline-кнопки"""
+    return {
+        "update_id": next(_update_ids),
+        "callback_query": {
+            "id": str(next(_update_ids)),
+            "from": _user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": next(_update_ids),
+                "date": 0,
+                "chat": _chat(user_id),
+                "from": BOT_USER.model_dump(),
+                "text": "menu",
+            },
+        },
+    }
+
+
+def parse_update(data: dict[str, Any], bot: Bot) -> Update:
+    """Update, привязанный к боту, как его собирает aiogram"""
+    return Update.model_validate(data, context={"bot": bot})
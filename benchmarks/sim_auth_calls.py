@@ -0,0 +1,151 @@
+"""Число запросов к Telegram и время ответа на один сценарий авторизации.
+
+Для каждого режима индикатора загрузки (``AUTH_LOADING_MODE``) прогоняет
+через диспетчер три сценария: нажатие «авторизации» с номером в кеше,
+отправку контакта и отказ API. Поддельная сессия считает вызовы Bot API
+и отвечает с задержкой ``--telegram-latency-ms``, stub API — с задержкой
+``--api-latency-ms``; время сценария — время обработчика до ответа
+пользователю: перекрывается ли индикатор загрузки с запросом к API и не
+ждет ли ответ удалений. Вызовы считаются после фоновых удалений.
+
+Ожидаемое число вызовов проверяет tests/test_auth_calls.py.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any
+
+from aiohttp import web
+
+from benchmarks.common import make_redis, setup_env
+
+setup_env()
+
+from aiogram import Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from benchmarks.fake_telegram import (
+    FakeSession,
+    callback_update,
+    contact_update,
+    fake_bot,
+)
+from config import settings
+from src.constants import API_LOGIN_ENDPOINT, CALLBACK_AUTH
+from src.handlers import register_handlers
+from src.services.api_client import api_client
+from src.services.cache import cache_service
+from src.services.task_manager import task_manager
+
+USER_ID_OFFSET = 800_000_000
+
+
+class StubAPI:
+    """Логин отвечает ссылкой или 503 после задержки"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.fail = False
+
+    async def login(self, _: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            return web.Response(status=503)
+        return web.json_response(
+            {"authorization_link": "https://example.com/auth?token=x", "expires_at": 0}
+        )
+
+
+async def _start_stub_api(api: StubAPI) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_post(f"/{API_LOGIN_ENDPOINT}", api.login)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+
+async def _scenario(
+    dp: Dispatcher, session: FakeSession, update: dict[str, Any]
+) -> dict[str, Any]:
+    """Прогоняет одно обновление и возвращает вызовы Bot API и время"""
+    bot = fake_bot(session)
+    session.calls.clear()
+    started = time.perf_counter()
+    await dp.feed_raw_update(bot, update)
+    elapsed = time.perf_counter() - started
+    # Удаления служебных сообщений идут в фоне после ответа
+    await task_manager.drain()
+    return {"calls": dict(session.calls), "elapsed_ms": round(elapsed * 1000, 1)}
+
+
+async def _run_mode(
+    dp: Dispatcher, api: StubAPI, mode: str, user_offset: int, latency: float
+) -> dict[str, Any]:
+    settings.AUTH_LOADING_MODE = mode
+    session = FakeSession(latency=latency)
+    results = {}
+
+    user_id = user_offset + 1
+    await cache_service.set_phone(user_id, "+79000000001")
+    results["cached_phone"] = await _scenario(
+        dp, session, callback_update(user_id, CALLBACK_AUTH)
+    )
+
+    # Номер запрашивается нажатием «авторизации», вызовы считаются по контакту
+    user_id = user_offset + 2
+    await dp.feed_raw_update(fake_bot(session), callback_update(user_id, CALLBACK_AUTH))
+    await task_manager.drain()
+    results["shared_phone"] = await _scenario(
+        dp, session, contact_update(user_id, "+79000000002")
+    )
+
+    user_id = user_offset + 3
+    await cache_service.set_phone(user_id, "+79000000003")
+    api.fail = True
+    try:
+        results["api_error"] = await _scenario(
+            dp, session, callback_update(user_id, CALLBACK_AUTH)
+        )
+    finally:
+        api.fail = False
+    return results
+
+
+async def main(args: argparse.Namespace) -> None:
+    # Один запрос без повторов и размыкателя: считаем только вызовы Telegram
+    settings.API_RETRY_ATTEMPTS = 1
+    settings.API_BREAKER_ENABLED = False
+    api = StubAPI(args.api_latency_ms / 1000)
+    runner = await _start_stub_api(api)
+    api_client.base_url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+    await api_client.start()
+    cache_service.use_redis(make_redis(args.redis_url))
+
+    dp = Dispatcher(storage=MemoryStorage())
+    register_handlers(dp)
+    results: dict[str, Any] = {}
+    try:
+        for run, mode in enumerate(("sticker", "placeholder")):
+            results[mode] = await _run_mode(
+                dp,
+                api,
+                mode,
+                USER_ID_OFFSET + run * 10,
+                args.telegram_latency_ms / 1000,
+            )
+    finally:
+        await api_client.close()
+        await runner.cleanup()
+        await cache_service.redis_client.aclose()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--telegram-latency-ms", type=float, default=50.0)
+    parser.add_argument("--api-latency-ms", type=float, default=300.0)
+    parser.add_argument("--redis-url", default="fake")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,126 @@
+"""Переключение кеша в память при сбое Redis и возврат после восстановления.
+
+Пользователи непрерывно «нажимают авторизацию»: ``get_auth_state`` и
+сохранение ссылки через ``CacheService`` поверх fakeredis. Посреди прогона
+Redis «падает» на ``--outage`` секунд: каждая команда висит
+``--redis-timeout`` секунд и заканчивается TimeoutError, как при
+socket_timeout настоящего клиента. Прогон повторяется без переключения
+(``CACHE_FALLBACK_ENABLED=false``) для сравнения.
+
+Печатает латентность по фазам (до, во время и после сбоя), число операций,
+ждавших таймаута, и через сколько после восстановления кеш вернулся в Redis.
+Поведение переключения проверяет tests/test_cache_failover.py.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+from typing import Any
+
+from benchmarks.common import FlakyRedis, make_redis, setup_env, summarize
+
+setup_env()
+
+
+from config import settings
+from src.services.cache import cache_service
+
+USER_ID_OFFSET = 700_000_000
+
+
+async def _run(args: argparse.Namespace, fallback: bool) -> dict[str, Any]:
+    settings.CACHE_FALLBACK_ENABLED = fallback
+    client = make_redis(args.redis_url)
+    redis = FlakyRedis(client, args.redis_timeout)
+    cache_service.use_redis(client)
+    cache_service.memory_backend.clear()
+    for i in range(args.users):
+        await cache_service.set_phone(USER_ID_OFFSET + i, "+79001234567")
+    await cache_service.start()
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    phase = "before"
+    recovered_at: float | None = None
+    back_to_redis_s: float | None = None
+    stop = asyncio.Event()
+
+    async def tap_loop(worker: int) -> None:
+        nonlocal back_to_redis_s
+        user_id, taps = USER_ID_OFFSET + worker, 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            auth_data, _ = await cache_service.get_auth_state(user_id)
+            if auth_data is None and taps % 4 == 0:
+                await cache_service.set_auth_link(
+                    user_id, "https://example.com/auth", int(time.time()) + 600
+                )
+            finished = time.perf_counter()
+            latencies[phase].append(finished - started)
+            if (
+                fallback
+                and recovered_at is not None
+                and back_to_redis_s is None
+                and cache_service.backend is cache_service.redis_backend
+            ):
+                back_to_redis_s = finished - recovered_at
+            taps += 1
+            await asyncio.sleep(args.tap_interval)
+
+    workers = [asyncio.create_task(tap_loop(i)) for i in range(args.users)]
+    try:
+        await asyncio.sleep(args.before)
+        phase, redis.down = "outage", True
+        await asyncio.sleep(args.outage)
+        phase, redis.down = "after", False
+        recovered_at = time.perf_counter()
+        await asyncio.sleep(args.after)
+    finally:
+        stop.set()
+        await asyncio.gather(*workers)
+        await cache_service.close()
+        await client.aclose()
+
+    timed_out = sum(
+        1
+        for samples in latencies.values()
+        for sample in samples
+        if sample >= args.redis_timeout
+    )
+    return {
+        "latency": {
+            name: {key: round(value, 3) for key, value in summarize(samples).items()}
+            for name, samples in latencies.items()
+        },
+        "ops_waited_timeout": timed_out,
+        "back_to_redis_s": (
+            round(back_to_redis_s, 3) if back_to_redis_s is not None else None
+        ),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.CACHE_HEALTH_CHECK_INTERVAL = 0.2
+    settings.CACHE_RECONNECT_MIN_DELAY = 0.1
+    settings.CACHE_RECONNECT_MAX_DELAY = 0.5
+    settings.LOCAL_CACHE_ENABLED = False
+    results = {
+        "with_fallback": await _run(args, fallback=True),
+        "without_fallback": await _run(args, fallback=False),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--tap-interval", type=float, default=0.01)
+    parser.add_argument("--redis-timeout", type=float, default=0.5)
+    parser.add_argument("--before", type=float, default=1.0)
+    parser.add_argument("--outage", type=float, default=3.0)
+    parser.add_argument("--after", type=float, default=2.0)
+    parser.add_argument("--redis-url", default="fake")
+    asyncio.run(main(parser.parse_args()))
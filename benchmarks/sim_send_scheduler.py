@@ -0,0 +1,133 @@
+"""Симуляция всплеска исходящих запросов через планировщик отправки.
+
+Поддельный Telegram применяет флуд-лимиты (общий и на чат, алгоритм GCRA,
+независимый от реализации в боте) и отвечает 429 ``RetryAfter`` на
+превышение. Через ``SendScheduler`` прогоняется всплеск из 10 000 отправок
+по множеству чатов с разными приоритетами и печатается число 429, исходы и
+латентность по приоритетам. Для сравнения тот же всплеск отправляется без
+планировщика. Лимиты по умолчанию масштабированы вверх, чтобы симуляция шла
+секунды. Отсутствие 429 и доставку проверяет tests/test_send_scheduler.py.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Any
+
+from benchmarks.common import setup_env, summarize
+
+setup_env()
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+
+from benchmarks.fake_telegram import FloodLimitedSession, fake_bot
+from src.exceptions import SendDroppedError
+from src.services.send_scheduler import (
+    SendPriority,
+    SendScheduler,
+    send_priority,
+)
+
+
+def _workload(args: argparse.Namespace) -> list[tuple]:
+    """(задержка от начала, чат, приоритет) для каждой отправки"""
+    rng = random.Random(args.seed)
+    priorities = [SendPriority.HIGH, SendPriority.NORMAL, SendPriority.LOW]
+    weights = [0.2, 0.5, 0.3]
+    return [
+        (
+            rng.uniform(0, args.spike_seconds),
+            rng.randrange(args.chats) + 1,
+            rng.choices(priorities, weights)[0],
+        )
+        for _ in range(args.sends)
+    ]
+
+
+async def _send(bot: Bot, chat_id: int, priority: SendPriority) -> None:
+    with send_priority(priority):
+        if priority == SendPriority.LOW:
+            await bot.send_sticker(chat_id, "sticker")
+        else:
+            await bot.send_message(chat_id, "text")
+
+
+async def _run(args: argparse.Namespace, with_scheduler: bool) -> dict[str, Any]:
+    session = FloodLimitedSession(
+        args.global_rate,
+        args.global_burst,
+        args.chat_rate,
+        args.chat_burst,
+        args.inject_retry_after,
+        args.seed,
+    )
+    if with_scheduler:
+        session.middleware(
+            SendScheduler(
+                global_rate=args.global_rate,
+                global_burst=args.global_burst,
+                chat_rate=args.chat_rate,
+                chat_burst=args.chat_burst,
+                low_priority_max_queue=args.low_priority_max_queue,
+            )
+        )
+    bot = fake_bot(session)
+    outcomes: dict[str, Counter] = defaultdict(Counter)
+    latencies: dict[str, list[float]] = defaultdict(list)
+
+    async def one(delay: float, chat_id: int, priority: SendPriority) -> None:
+        await asyncio.sleep(delay)
+        label = priority.name.lower()
+        started = time.perf_counter()
+        try:
+            await _send(bot, chat_id, priority)
+        except SendDroppedError:
+            outcomes[label]["dropped"] += 1
+            return
+        except TelegramRetryAfter:
+            outcomes[label]["429"] += 1
+            return
+        outcomes[label]["delivered"] += 1
+        latencies[label].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(*send) for send in _workload(args)))
+    elapsed = time.perf_counter() - started
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "server_429": dict(session.rejected),
+        "outcomes": {label: dict(counter) for label, counter in outcomes.items()},
+        "latency": {label: summarize(samples) for label, samples in latencies.items()},
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    results = {
+        "without_scheduler": await _run(args, with_scheduler=False),
+        "with_scheduler": await _run(args, with_scheduler=True),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sends", type=int, default=10_000)
+    parser.add_argument("--chats", type=int, default=2_000)
+    parser.add_argument("--spike-seconds", type=float, default=2.0)
+    parser.add_argument("--global-rate", type=float, default=1000.0)
+    parser.add_argument("--global-burst", type=int, default=100)
+    parser.add_argument("--chat-rate", type=float, default=5.0)
+    parser.add_argument("--chat-burst", type=int, default=3)
+    parser.add_argument("--low-priority-max-queue", type=int, default=2000)
+    parser.add_argument(
+        "--inject-retry-after",
+        type=float,
+        default=0.0,
+        help="доля запросов, на которые сервер отвечает 429 без причины",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,163 @@
+"""Стресс-тест порядка обработки обновлений одного пользователя.
+
+Поддельный Telegram отдает через getUpdates ``--users`` x ``--per-user``
+обновлений, перемешанных между пользователями, но упорядоченных внутри
+каждого. Их получает настоящий ``PollingRunner`` с ограниченной очередью и
+обрабатывает диспетчер с ``OrderedEventIsolation``. Обработчик засыпает на
+случайное время до и после «ответа» и записывает, в каком порядке
+пользователь получил ответы и сколько его обновлений шло одновременно.
+
+Для сравнения тот же поток прогоняется без изоляции. Печатаются нарушения
+порядка, пропускная способность, число параллельных обработчиков и пик
+очереди. Порядок с изоляцией проверяет tests/test_update_ordering.py.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Any
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from aiogram import Dispatcher, Router
+from aiogram.fsm.storage.base import BaseEventIsolation
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Message
+
+from benchmarks.fake_telegram import (
+    UpdateFeedSession,
+    fake_bot,
+    message_update,
+)
+from config import settings
+from src.polling import PollingRunner
+from src.update_ordering import OrderedEventIsolation
+
+
+class Recorder:
+    """Запоминает порядок ответов и одновременность обработки по пользователям"""
+
+    def __init__(self, seed: int, max_delay: float):
+        self.rng = random.Random(seed)
+        self.max_delay = max_delay
+        self.applied: dict[int, list[int]] = defaultdict(list)
+        self.in_flight: dict[int, int] = defaultdict(int)
+        self.overlaps = 0
+        self.active = 0
+        self.max_active = 0
+        self.processed = 0
+        self.done = asyncio.Event()
+        self.expected = 0
+
+    async def handle(self, message: Message) -> None:
+        user_id = message.from_user.id
+        self.in_flight[user_id] += 1
+        if self.in_flight[user_id] > 1:
+            self.overlaps += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            # Как обработчик, который сначала читает состояние из Redis, а
+            # потом отвечает: порядок ответов и есть порядок для пользователя
+            await asyncio.sleep(self.rng.uniform(0, self.max_delay))
+            self.applied[user_id].append(int(message.text))
+            await asyncio.sleep(self.rng.uniform(0, self.max_delay))
+        finally:
+            self.in_flight[user_id] -= 1
+            self.active -= 1
+            self.processed += 1
+            if self.processed == self.expected:
+                self.done.set()
+
+    def order_violations(self) -> int:
+        return sum(
+            sum(1 for a, b in zip(seqs, seqs[1:]) if b < a)
+            for seqs in self.applied.values()
+        )
+
+
+def _updates(args: argparse.Namespace) -> list[dict[str, Any]]:
+    """Обновления, перемешанные между пользователями, по порядку внутри"""
+    rng = random.Random(args.seed)
+    remaining = {user: args.per_user for user in range(1, args.users + 1)}
+    sent: dict[int, int] = defaultdict(int)
+    updates = []
+    while remaining:
+        user = rng.choice(list(remaining))
+        updates.append(message_update(user, str(sent[user])))
+        sent[user] += 1
+        remaining[user] -= 1
+        if not remaining[user]:
+            del remaining[user]
+    return updates
+
+
+async def _run(
+    args: argparse.Namespace, isolation: BaseEventIsolation | None
+) -> dict[str, Any]:
+    updates = _updates(args)
+    recorder = Recorder(args.seed, args.max_delay_ms / 1000)
+    recorder.expected = len(updates)
+    router = Router()
+    router.message()(recorder.handle)
+    dp = Dispatcher(storage=MemoryStorage(), events_isolation=isolation)
+    dp.include_router(router)
+
+    runner = PollingRunner(dp, fake_bot(UpdateFeedSession(updates)))
+    max_pending = 0
+
+    async def watch_pending() -> None:
+        nonlocal max_pending
+        while True:
+            max_pending = max(max_pending, runner.pending)
+            await asyncio.sleep(0.001)
+
+    watcher = asyncio.create_task(watch_pending())
+    poller = asyncio.create_task(runner.poll())
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(recorder.done.wait(), args.timeout)
+    finally:
+        elapsed = time.perf_counter() - started
+        for task in (poller, watcher):
+            task.cancel()
+        await asyncio.gather(poller, watcher, return_exceptions=True)
+        await runner.drain()
+    return {
+        "updates": len(updates),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_ups": round(len(updates) / elapsed, 1),
+        "order_violations": recorder.order_violations(),
+        "same_user_overlaps": recorder.overlaps,
+        "max_parallel_handlers": recorder.max_active,
+        "max_pending_updates": max_pending,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.POLLING_MAX_PENDING = args.max_pending
+    settings.POLLING_TIMEOUT = 0
+    results = {
+        "without_isolation": await _run(args, None),
+        "ordered": await _run(args, OrderedEventIsolation(args.concurrency)),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--per-user", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--max-pending", type=int, default=1000)
+    parser.add_argument("--max-delay-ms", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
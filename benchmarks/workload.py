@@ -0,0 +1,85 @@
+"""Синтетическая нагрузка для бенчмарков всего конвейера обновлений.
+
+Обновления сгруппированы по пользователям: внутри сессии порядок важен
+(контакт приходит после нажатия «авторизации»), сессии разных
+пользователей можно прогонять параллельно.
+"""
+
+import random
+
+from aiohttp import web
+
+from benchmarks.fake_telegram import callback_update, contact_update, message_update
+from src.constants import (
+    API_LOGIN_ENDPOINT,
+    CALLBACK_AUTH,
+    CALLBACK_FAQ,
+    CALLBACK_FAQ_BACK,
+    CALLBACK_FAQ_HOME,
+    CALLBACK_FAQ_QUESTION,
+    CALLBACK_FAQ_THEME,
+)
+from src.services.faq_service import FAQService
+
+SEARCH_QUERIES = ["оплата", "доступ к курсу"]
+
+
+def user_sessions(
+    count: int, seed: int, user_offset: int, faq_navigation: bool = False
+) -> list[list]:
+    """Сессии из ``count`` обновлений: половина — авторизация, половина — FAQ.
+
+    Авторизация: /start, нажатие кнопки, контакт, повторное нажатие (ссылка
+    из кеша). FAQ: /start, раздел, тема, поиск; с ``faq_navigation`` еще
+    вопрос, «Назад» и «Главное меню».
+    """
+    rng = random.Random(seed)
+    themes = FAQService.get_themes()
+    versions = FAQService.get_versions()
+    sessions, total, user_id = [], 0, user_offset
+    while total < count:
+        user_id += 1
+        session = [message_update(user_id, "/start")]
+        if rng.random() < 0.5:
+            session += [
+                callback_update(user_id, CALLBACK_AUTH),
+                contact_update(user_id, f"+7900{user_id % 10_000_000:07d}"),
+                callback_update(user_id, CALLBACK_AUTH),
+            ]
+        else:
+            theme = rng.randrange(len(themes)) if faq_navigation else 0
+            version = versions[theme]
+            session += [
+                callback_update(user_id, CALLBACK_FAQ),
+                callback_update(user_id, f"{CALLBACK_FAQ_THEME}:{version}"),
+            ]
+            if faq_navigation:
+                question = rng.randrange(len(themes[theme]["questions"]))
+                session += [
+                    callback_update(
+                        user_id, f"{CALLBACK_FAQ_QUESTION}:{version}:{question}"
+                    ),
+                    callback_update(user_id, CALLBACK_FAQ_BACK),
+                    callback_update(user_id, CALLBACK_FAQ_HOME),
+                ]
+            session.append(message_update(user_id, rng.choice(SEARCH_QUERIES)))
+        session = session[: count - total]
+        sessions.append(session)
+        total += len(session)
+    return sessions
+
+
+async def _login_handler(_: web.Request) -> web.Response:
+    return web.json_response(
+        {"authorization_link": "https://example.com/auth?token=x", "expires_at": 0}
+    )
+
+
+async def start_stub_api() -> web.AppRunner:
+    """Stub API логина на свободном порту; адрес — ``runner.addresses[0]``"""
+    app = web.Application()
+    app.router.add_post(f"/{API_LOGIN_ENDPOINT}", _login_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
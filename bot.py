@@ -1,33 +1,76 @@
-import logging
-
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
 
 from config import settings
 from src.handlers import register_handlers
+from src.metrics_server import metrics_server
+from src.middlewares import register_middlewares
+from src.polling import run_polling
+from src.services.api_client import api_client
 from src.services.cache import cache_service
+from src.services.faq_store import faq_store
+from src.services.fsm_storage import FallbackStorage
+from src.services.redis_connection import SharedRedisStorage, redis_connection
+from src.services.send_scheduler import SendScheduler
+from src.update_ordering import OrderedEventIsolation
+from src.utils.logger import configure_logging, stop_logging
+from src.webhook import run_webhook
 
-# Настройка логгера
-logging.basicConfig(level=logging.INFO)
+# Настройка логгера: запись в поток идет в фоне, не блокируя event loop
+configure_logging()
 
 # Инициализация бота и диспетчера
 bot = Bot(token=settings.BOT_TOKEN)
-storage = RedisStorage.from_url(settings.REDIS_URL)
-dp = Dispatcher(storage=storage)
+if settings.TELEGRAM_RATE_LIMIT_ENABLED:
+    # Все исходящие запросы проходят через лимиты Telegram и очередь приоритетов
+    bot.session.middleware(SendScheduler())
+# Состояния FSM и кеш работают через один пул соединений с Redis и вместе
+# переключаются в память при его сбое; с CACHE_BACKEND=memory бот
+# запускается вовсе без Redis
+storage: BaseStorage
+if settings.CACHE_BACKEND == "redis":
+    storage = FallbackStorage(
+        SharedRedisStorage(redis=redis_connection.client), cache_service
+    )
+else:
+    storage = MemoryStorage()
+# Обновления одного пользователя — строго по очереди, разных — параллельно
+events_isolation = (
+    OrderedEventIsolation(settings.UPDATE_CONCURRENCY)
+    if settings.UPDATE_ORDERING_ENABLED
+    else None
+)
+dp = Dispatcher(storage=storage, events_isolation=events_isolation)
 
-# Регистрация обработчиков
+# Регистрация обработчиков и middleware
 register_handlers(dp)
+register_middlewares(dp)
 
 
-async def main():
+async def main() -> None:
+    if settings.CACHE_BACKEND == "redis":
+        await redis_connection.start()
+    await api_client.start()
+    await cache_service.start()
+    await faq_store.start()
+    await metrics_server.start()
     try:
-        await dp.start_polling(bot)
+        if settings.BOT_RUN_MODE == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            await run_polling(dp, bot)
     finally:
-        # Закрываем соединение с Redis при завершении работы бота
+        await metrics_server.close()
+        await faq_store.close()
+        # Закрываем соединения с API и Redis при завершении работы бота
+        await api_client.close()
         await cache_service.close()
+        await redis_connection.close()
+        stop_logging()
 
 
-if __name__ == '__main__':
+if __name__ == "__main__":
     import asyncio
 
     asyncio.run(main())
@@ -0,0 +1,141 @@
+"""Обслуживание кеша в Redis.
+
+Перенос телефонов и ссылок в раскладку CACHE_KEY_LAYOUT (и обратно),
+прогрев телефонов из файла или API и их выгрузка::
+
+    python cache_cli.py migrate --to buckets
+    python cache_cli.py load --file phones.csv --state load.json
+    python cache_cli.py load --api --state load.json
+    python cache_cli.py export --output phones.csv
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+from config import settings
+from src.constants import API_PHONES_ENDPOINT
+from src.services.api_client import api_client
+from src.services.cache import cache_service
+from src.services.cache_migration import migrate_layout
+from src.services.cache_warmup import (
+    LoadCheckpoint,
+    export_phones,
+    fetch_api_phones,
+    load_phones,
+    read_phone_file,
+)
+from src.services.redis_connection import redis_connection
+from src.utils.logger import configure_logging, stop_logging
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate(args: argparse.Namespace) -> None:
+    moved = await migrate_layout(
+        redis_connection.client, args.to, args.bucket_count, args.batch_size
+    )
+    logger.info(f"Миграция в раскладку {args.to} завершена, записей: {moved}")
+
+
+async def load(args: argparse.Namespace) -> None:
+    if args.file:
+        source = f"file:{args.file}"
+    else:
+        source = f"api:{args.endpoint}"
+    checkpoint = None
+    if args.state:
+        checkpoint = await asyncio.to_thread(LoadCheckpoint, args.state, source)
+    position = checkpoint.position if checkpoint is not None else None
+    if position is not None:
+        logger.info(f"Продолжаем загрузку {source} с позиции {position}")
+
+    if args.file:
+        rows = read_phone_file(args.file, position or 0)
+    else:
+        await api_client.start()
+        rows = fetch_api_phones(args.endpoint, position or 0, args.page_size)
+    try:
+        loaded = await load_phones(
+            cache_service.redis_backend, rows, args.chunk_size, checkpoint
+        )
+    finally:
+        await api_client.close()
+    if checkpoint is not None:
+        await asyncio.to_thread(checkpoint.remove)
+    logger.info(f"Загрузка {source} завершена, телефонов: {loaded}")
+
+
+async def export(args: argparse.Namespace) -> None:
+    if args.output == "-":
+        exported = await export_phones(
+            cache_service.redis_backend, sys.stdout, args.chunk_size
+        )
+    else:
+        output = await asyncio.to_thread(open, args.output, "w", encoding="utf-8")
+        try:
+            exported = await export_phones(
+                cache_service.redis_backend, output, args.chunk_size
+            )
+        finally:
+            await asyncio.to_thread(output.close)
+    logger.info(f"Выгрузка завершена, телефонов: {exported}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        await args.command(args)
+    finally:
+        await redis_connection.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Обслуживание кеша в Redis")
+    commands = parser.add_subparsers(required=True)
+
+    migrate_parser = commands.add_parser(
+        "migrate", help="перенести телефоны и ссылки в другую раскладку ключей"
+    )
+    migrate_parser.add_argument("--to", choices=("keys", "buckets"), required=True)
+    migrate_parser.add_argument(
+        "--bucket-count", type=int, default=settings.CACHE_BUCKET_COUNT
+    )
+    migrate_parser.add_argument("--batch-size", type=int, default=1000)
+    migrate_parser.set_defaults(command=migrate)
+
+    load_parser = commands.add_parser(
+        "load", help="загрузить телефоны в кеш из файла user_id,phone или из API"
+    )
+    source = load_parser.add_mutually_exclusive_group(required=True)
+    # Абсолютный путь привязывает файл позиции к источнику
+    source.add_argument(
+        "--file",
+        type=os.path.abspath,
+        help="файл user_id,phone, например из export",
+    )
+    source.add_argument("--api", action="store_true", help="постранично из API")
+    load_parser.add_argument("--endpoint", default=API_PHONES_ENDPOINT)
+    load_parser.add_argument("--page-size", type=int, default=1000)
+    load_parser.add_argument("--chunk-size", type=int, default=1000)
+    load_parser.add_argument(
+        "--state", help="файл позиции: прерванная загрузка продолжится с нее"
+    )
+    load_parser.set_defaults(command=load)
+
+    export_parser = commands.add_parser(
+        "export", help="выгрузить телефоны из кеша строками user_id,phone"
+    )
+    export_parser.add_argument("--output", default="-", help="файл; - — stdout")
+    export_parser.add_argument("--chunk-size", type=int, default=1000)
+    export_parser.set_defaults(command=export)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    try:
+        asyncio.run(main(parse_args()))
+    finally:
+        stop_logging()
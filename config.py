@@ -1,3 +1,5 @@
+from typing import Literal
+
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 
@@ -8,21 +10,171 @@ class Settings(BaseSettings):
     # Основные настройки бота
     BOT_TOKEN: str
     REDIS_URL: str
-    
+
+    # Общий пул соединений с Redis для хранилища FSM и кеша
+    REDIS_POOL_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 2.0  # секунд ожидания свободного соединения
+    REDIS_SOCKET_TIMEOUT: float = 2.0  # секунд на ответ Redis
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0  # секунд
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # секунд простоя до PING перед командой
+    REDIS_PROTOCOL: Literal[2, 3] = 2  # 3 — RESP3
+
+    # Режим получения обновлений: long polling или webhook
+    BOT_RUN_MODE: Literal["polling", "webhook"] = "polling"
+
+    # Настройки webhook
+    WEBHOOK_URL: str = (
+        ""  # публичный адрес балансировщика, например https://bot.example.com
+    )
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: str = ""
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    WEBHOOK_REUSE_PORT: bool = False
+    WEBHOOK_MAX_CONCURRENCY: int = 100  # обновлений в обработке одновременно
+    WEBHOOK_MAX_CONNECTIONS: int = 40  # соединений от Telegram, 1-100
+    WEBHOOK_SHUTDOWN_TIMEOUT: float = 10.0  # секунд
+
+    # Обновления одного пользователя обрабатываются строго по очереди,
+    # разных пользователей — параллельно, не больше UPDATE_CONCURRENCY сразу.
+    # Выключено по умолчанию: без него обработка та же, что до очередей
+    UPDATE_ORDERING_ENABLED: bool = False
+    UPDATE_CONCURRENCY: int = 100
+
+    # Настройки long polling
+    POLLING_TIMEOUT: int = 10  # секунд ожидания getUpdates
+    POLLING_MAX_PENDING: int = 1000  # обновлений в очереди, дальше getUpdates ждет
+    POLLING_SHUTDOWN_TIMEOUT: float = 10.0  # секунд
+
+    # Ограничение частоты действий пользователя по имени обработчика:
+    # (действий, окно в секундах), общее для реплик через Redis.
+    # По умолчанию выключено
+    THROTTLING_ENABLED: bool = False
+    THROTTLING_LIMITS: dict[str, tuple[int, float]] = {
+        "auth_callback": (5, 60.0),
+        "process_phone": (3, 60.0),
+    }
+
     # API настройки
     API_BASE_URL: str
     API_LOGIN: str
     API_PASSWORD: str
-    
+
+    # Пул соединений к API
+    API_POOL_LIMIT: int = 100
+    API_POOL_LIMIT_PER_HOST: int = 50
+    API_KEEPALIVE_TIMEOUT: float = 30.0  # секунд
+    API_DNS_CACHE_TTL: int = 300  # секунд
+
+    # Таймауты и повторы запросов к API
+    API_TIMEOUT: float = 10.0  # секунд на запрос по умолчанию
+    API_ENDPOINT_TIMEOUTS: dict[str, float] = {"api/v1/accounts/login": 5.0}
+    API_RETRY_ATTEMPTS: int = 3  # попыток для идемпотентных запросов
+    API_RETRY_BACKOFF_BASE: float = 0.2  # секунд
+    API_RETRY_BACKOFF_MAX: float = 2.0  # секунд
+
+    # Размыкатель цепи: после N ошибок за окно запросы не отправляются.
+    # По умолчанию выключен
+    API_BREAKER_ENABLED: bool = False
+    API_BREAKER_FAILURE_THRESHOLD: int = 5
+    API_BREAKER_FAILURE_WINDOW: float = 30.0  # секунд
+    API_BREAKER_RESET_TIMEOUT: float = 30.0  # секунд до пробного запроса
+    API_BREAKER_SHARED: bool = True  # общее состояние реплик в Redis
+
     # Настройки кеширования
     PHONE_CACHE_TTL: int = 7 * 24 * 60 * 60  # 7 дней в секундах
     AUTH_LINK_CACHE_TTL: int = 600  # 10 минут в секундах
-    
+    # Формат записи ссылки в кеше: json или compact; читаются оба. compact
+    # включается, когда все реплики обновлены до версии, читающей его
+    AUTH_LINK_CACHE_FORMAT: Literal["compact", "json"] = "json"
+
+    # Локальный кеш (L1) перед Redis
+    LOCAL_CACHE_ENABLED: bool = False
+    LOCAL_CACHE_MAX_ENTRIES: int = 10_000
+    LOCAL_CACHE_TTL: int = 60  # секунд, верхняя граница жизни записи в L1
+
+    # Отложенная пакетная запись в Redis (write-behind)
+    CACHE_WRITE_BEHIND_ENABLED: bool = False
+    CACHE_WRITE_BEHIND_BATCH_SIZE: int = 500
+    CACHE_WRITE_BEHIND_MAX_PENDING: int = 10_000
+    CACHE_WRITE_BEHIND_FLUSH_INTERVAL: float = 0.05  # секунд
+
+    # Бэкенд кеша: redis или память процесса (разработка и тесты без Redis)
+    CACHE_BACKEND: Literal["redis", "memory"] = "redis"
+    # При недоступности Redis кеш временно работает в памяти процесса
+    CACHE_FALLBACK_ENABLED: bool = True
+    CACHE_MEMORY_MAX_ENTRIES: int = 100_000
+    CACHE_HEALTH_CHECK_INTERVAL: float = 5.0  # секунд между проверками Redis
+    CACHE_RECONNECT_MIN_DELAY: float = 0.5  # секунд
+    CACHE_RECONNECT_MAX_DELAY: float = 30.0  # секунд
+    # Раскладка телефонов и ссылок в Redis: отдельные ключи или поля хешей
+    # с истечением по полям (buckets, нужен Redis 7.4+)
+    CACHE_KEY_LAYOUT: Literal["keys", "buckets"] = "keys"
+    # Пользователей на хеш — около числа пользователей / CACHE_BUCKET_COUNT;
+    # держите меньше hash-max-listpack-entries (128)
+    CACHE_BUCKET_COUNT: int = 16_384
+
+    # Объединение одновременных запросов ссылки между репликами через Redis
+    AUTH_SINGLE_FLIGHT_REDIS: bool = False
+    AUTH_LOCK_TTL_MS: int = 10_000
+    AUTH_LOCK_POLL_INTERVAL: float = 0.1  # секунд
+
+    # Фоновая генерация ссылки на /start для пользователей с известным телефоном
+    AUTH_PREFETCH_ENABLED: bool = False
+    AUTH_PREFETCH_CONCURRENCY: int = 10  # генераций одновременно, лишние пропускаются
+
     # Настройки UI
     SUPPORT_BOT_URL: str = "https://t.me/your_support_bot"
     CHANNEL_URL: str = "https://t.me/codelis_digest"
-    LOADING_STICKER_ID: str = "CAACAgIAAxkBAAExqU9nq5ox8OKuKAR3gVTbqlxsOocsYAACeBsAArZjKElJPqq2J-v4QTYE"
-    
+    LOADING_STICKER_ID: str = (
+        "CAACAgIAAxkBAAExqU9nq5ox8OKuKAR3gVTbqlxsOocsYAACeBsAArZjKElJPqq2J-v4QTYE"
+    )
+    # Индикатор загрузки при генерации ссылки: одно сообщение, которое
+    # редактируется в итоговое, или стикер и сообщение, удаляемые после
+    # (по умолчанию, как до появления настройки)
+    AUTH_LOADING_MODE: Literal["placeholder", "sticker"] = "sticker"
+
+    # Источник FAQ: встроенные данные, JSON-файл или хеш Redis
+    FAQ_SOURCE: Literal["builtin", "file", "redis"] = "builtin"
+    FAQ_FILE_PATH: str = "faq.json"
+    FAQ_REDIS_KEY: str = "faq"
+    FAQ_RELOAD_INTERVAL: float = 30.0  # секунд
+
+    # Поиск по FAQ
+    FAQ_SEARCH_LIMIT: int = 3
+    FAQ_INLINE_RESULTS_LIMIT: int = 10
+    FAQ_INLINE_CACHE_TIME: int = 300  # секунд
+
+    # Логирование: записи уходят в очередь и пишутся отдельным потоком
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["text", "json"] = "text"
+    LOG_QUEUE_SIZE: int = 10_000  # при переполнении записи отбрасываются
+    # Доля записей уровня INFO и ниже, которые пропускаются, по имени логгера
+    LOG_SAMPLE_RATES: dict[str, float] = {}
+    # Не больше N записей уровня INFO и ниже в секунду, по имени логгера
+    LOG_RATE_LIMITS: dict[str, int] = {"src.services.cache": 100, "aiogram.event": 100}
+
+    # Лимиты исходящих запросов к Telegram, по умолчанию выключены
+    TELEGRAM_RATE_LIMIT_ENABLED: bool = False
+    TELEGRAM_GLOBAL_RATE: float = 30.0  # сообщений в секунду на бота
+    TELEGRAM_GLOBAL_BURST: int = 30
+    TELEGRAM_CHAT_RATE: float = 1.0  # сообщений в секунду в один чат
+    TELEGRAM_CHAT_BURST: int = 5
+    TELEGRAM_LOW_PRIORITY_MAX_QUEUE: int = (
+        100  # дальше стикеры и удаления отбрасываются
+    )
+    TELEGRAM_RETRY_AFTER_ATTEMPTS: int = 3
+    TELEGRAM_RETRY_AFTER_MAX: float = 30.0  # секунд; дольше ждать не будем
+
+    # Фоновые запросы к Telegram (удаление служебных сообщений)
+    BACKGROUND_TASKS_CONCURRENCY: int = 20
+    BACKGROUND_TASKS_DRAIN_TIMEOUT: float = 5.0  # секунд на дозавершение при остановке
+
+    # Метрики в формате Prometheus
+    METRICS_ENABLED: bool = False
+    METRICS_HOST: str = "0.0.0.0"
+    METRICS_PORT: int = 9090
+
     # Сообщения об ошибках
     API_ERROR_MESSAGE: str = (
         "Наш сервис сейчас немного прилёг отдохнуть — мы быстро чиним и перезагружаем,"
@@ -31,8 +183,8 @@ class Settings(BaseSettings):
     LOADING_MESSAGE: str = "Генерируем ссылку..."
 
     class Config:
-        env_file = '.env'
-        env_file_encoding = 'utf-8'
+        env_file = ".env"
+        env_file_encoding = "utf-8"
 
 
 settings = Settings()
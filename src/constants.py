@@ -9,6 +9,23 @@ CALLBACK_FAQ_HOME = "faq_home"
 # Ключи для кеша Redis
 CACHE_PHONE_PREFIX = "phone:"
 CACHE_AUTH_LINK_PREFIX = "auth_link:"
+CACHE_AUTH_LOCK_PREFIX = "auth_lock:"
+CACHE_CIRCUIT_PREFIX = "circuit:"
+CACHE_AUTH_PREFETCH_PREFIX = "auth_prefetch:"
+CACHE_THROTTLE_PREFIX = "throttle:"
+# Хеши раскладки buckets: {префикс}b:{номер}, поле — id пользователя
+CACHE_BUCKET_INFIX = "b:"
+
+# Канал Redis для инвалидации локальных кешей реплик
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Наибольшая длина текста сообщения Telegram, в единицах UTF-16
+TELEGRAM_MESSAGE_MAX_LENGTH = 4096
+
+# Endpoints API аккаунтов
+API_LOGIN_ENDPOINT = "api/v1/accounts/login"
+# Телефоны пользователей постранично, для прогрева кеша
+API_PHONES_ENDPOINT = "api/v1/accounts/phones"
 
 # Тексты кнопок
 BUTTON_AUTH = "🔐Авторизоваться"
@@ -19,8 +36,3 @@ BUTTON_AUTH_LINK = "🔑 Ссылка для авторизации"
 BUTTON_SHARE_PHONE = "Поделиться номером телефона 📱"
 BUTTON_FAQ_BACK = "⬅️ Назад"
 BUTTON_FAQ_HOME = "🏠 Главное меню"
-
-
-# Состояния FSM
-class AuthState:
-    WAITING_FOR_PHONE = "waiting_for_phone"
@@ -1,16 +1,22 @@
 class AuthError(Exception):
     """Исключение для ошибок авторизации"""
 
-    pass
-
 
 class CacheError(Exception):
     """Исключение для ошибок кеширования"""
 
-    pass
-
 
 class APIError(Exception):
     """Исключение для ошибок API"""
 
-    pass
+
+class CircuitOpenError(APIError):
+    """Запрос к API не отправлен: размыкатель цепи открыт"""
+
+
+class SendDroppedError(Exception):
+    """Низкоприоритетный запрос к Telegram отброшен из-за перегрузки"""
+
+
+class FAQError(Exception):
+    """Исключение для ошибок загрузки FAQ"""
@@ -1,10 +1,14 @@
-from .start import router as start_router
+from aiogram import Dispatcher
+
+from .callbacks import router as callbacks_router
 from .faq import router as faq_router
+from .start import router as start_router
 
-# Собираем все роутеры в один список
-routers = [start_router, faq_router]
+# Собираем все роутеры в один список; callback_query обрабатывает только
+# callbacks_router, остальные роутеры регистрируют в нем свои префиксы
+routers = [start_router, faq_router, callbacks_router]
 
 
-def register_handlers(dp):
+def register_handlers(dp: Dispatcher) -> None:
     for router in routers:
         dp.include_router(router)
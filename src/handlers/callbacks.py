@@ -0,0 +1,43 @@
+from typing import Any, Callable
+
+from aiogram import Router, types
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.dispatcher.event.handler import CallableObject
+
+# Один обработчик callback_query на весь бот: вместо цепочки фильтров
+# F.data.startswith(...) префикс callback_data ищется в словаре
+router = Router()
+_handlers: dict[str, CallableObject] = {}
+
+
+def parse_callback_prefix(data: str) -> str:
+    """Префикс callback_data: часть до первого «:»"""
+    return data.partition(":")[0]
+
+
+def callback_handler(prefix: str) -> Callable[[Callable], Callable]:
+    """Регистрирует обработчик для callback_data с указанным префиксом"""
+
+    def decorator(func: Callable) -> Callable:
+        if prefix in _handlers:
+            raise ValueError(f"Обработчик для префикса {prefix!r} уже зарегистрирован")
+        _handlers[prefix] = CallableObject(callback=func)
+        return func
+
+    return decorator
+
+
+def resolve_handler_name(data: str) -> str:
+    """Имя обработчика, которому будет передан callback с такими данными"""
+    handler = _handlers.get(parse_callback_prefix(data))
+    return handler.callback.__name__ if handler is not None else "unhandled"
+
+
+@router.callback_query()
+async def dispatch_callback(callback: types.CallbackQuery, **data: Any) -> Any:
+    """Вызывает обработчик по префиксу callback_data"""
+    handler = _handlers.get(parse_callback_prefix(callback.data or ""))
+    if handler is None:
+        return UNHANDLED
+    # CallableObject передает обработчику только те аргументы, которые он принимает
+    return await handler.call(callback, **data)
@@ -1,6 +1,6 @@
 import time
 
-from aiogram import Dispatcher, F, Router, types
+from aiogram import F, Router, types
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
@@ -8,11 +8,13 @@ from aiogram.fsm.state import State, StatesGroup
 from config import settings
 from src.constants import CALLBACK_AUTH
 from src.exceptions import AuthError
+from src.handlers.callbacks import callback_handler
 from src.keyboards import messages
 from src.services.auth_service import AuthService
 from src.services.message_service import MessageService
+from src.services.send_scheduler import SendPriority, send_priority
 from src.services.ui_service import UIService
-from src.utils.logger import setup_logger, log_user_action, log_error
+from src.utils.logger import log_error, log_user_action, setup_logger
 
 router = Router()
 logger = setup_logger(__name__)
@@ -27,28 +29,39 @@ class AuthState(StatesGroup):
 async def start_command(message: types.Message):
     """Обработчик команды /start"""
     log_user_action(logger, message.from_user, "started bot")
+    if settings.AUTH_PREFETCH_ENABLED:
+        AuthService.prefetch_auth_link(message.from_user.id, message.from_user.username)
     keyboard = UIService.create_start_keyboard()
     await message.answer(messages.START, reply_markup=keyboard.as_markup())
 
 
-@router.callback_query(F.data == CALLBACK_AUTH)
+@callback_handler(CALLBACK_AUTH)
 async def auth_callback(callback: types.CallbackQuery, state: FSMContext):
     """Обработчик нажатия кнопки авторизации"""
     log_user_action(logger, callback.from_user, "requested auth")
     user_id = callback.from_user.id
 
-    # Проверяем кешированную ссылку авторизации
-    cached_auth_data = await AuthService.get_cached_auth_link(user_id)
+    # Первое нажатие во время фоновой генерации ссылки присоединяется к ней
+    joined_prefetch = AuthService.join_prefetch(user_id)
+
+    # Повторное нажатие, пока ссылка еще генерируется, — ответ придет из первого
+    if not joined_prefetch and AuthService.is_auth_link_pending(user_id):
+        await callback.answer()
+        return
 
+    # Получаем кешированные ссылку и номер телефона за один запрос
+    cached_auth_data, cached_phone = await AuthService.get_cached_auth_state(user_id)
+
+    # Проверяем кешированную ссылку авторизации
     if cached_auth_data and AuthService.is_auth_link_valid(
         cached_auth_data["expires_at"]
     ):
+        if settings.AUTH_PREFETCH_ENABLED:
+            await AuthService.record_prefetch_hit(user_id)
         await _handle_cached_auth_link(callback, cached_auth_data)
         return
 
     # Проверяем кешированный номер телефона
-    cached_phone = await AuthService.get_cached_phone(user_id)
-
     if cached_phone:
         await _handle_cached_phone_auth(callback, cached_phone)
     else:
@@ -63,14 +76,20 @@ async def _handle_cached_auth_link(callback: types.CallbackQuery, auth_data: dic
     message_text = UIService.format_auth_link_message(expires_at, current_time)
     keyboard = UIService.create_auth_link_keyboard(auth_data["link"])
 
-    await callback.message.delete()
-    await callback.message.answer(message_text, reply_markup=keyboard.as_markup())
+    with send_priority(SendPriority.HIGH):
+        await callback.message.answer(message_text, reply_markup=keyboard.as_markup())
+    MessageService.cleanup_messages(callback.message)
 
 
 async def _handle_cached_phone_auth(callback: types.CallbackQuery, phone: str):
     """Обрабатывает авторизацию с кешированным номером телефона"""
-    loading_sticker = await MessageService.send_loading_sticker(callback.message)
-    loading_message = await MessageService.send_loading_message(callback.message)
+    # API недоступно — отвечаем сразу, без стикера загрузки
+    if await AuthService.is_login_unavailable():
+        await MessageService.send_error_message(callback.message)
+        return
+
+    # Индикатор загрузки отправляется одновременно с запросом к API
+    loading = MessageService.start_loading(callback.message)
 
     try:
         response = await AuthService.generate_auth_link(
@@ -81,15 +100,18 @@ async def _handle_cached_phone_auth(callback: types.CallbackQuery, phone: str):
 
         keyboard = UIService.create_auth_link_keyboard(response["authorization_link"])
 
-        await MessageService.cleanup_messages(loading_message, loading_sticker)
-        await callback.message.answer(
-            UIService.format_auth_link_expires_message(),
-            reply_markup=keyboard.as_markup(),
-        )
+        with send_priority(SendPriority.HIGH):
+            await MessageService.finish_loading(
+                callback.message,
+                loading,
+                UIService.format_auth_link_expires_message(),
+                reply_markup=keyboard.as_markup(),
+            )
 
     except AuthError as e:
-        await MessageService.cleanup_messages(loading_message, loading_sticker)
-        await MessageService.send_error_message(callback.message)
+        await MessageService.finish_loading(
+            callback.message, loading, settings.API_ERROR_MESSAGE
+        )
         log_error(logger, e, "auth link generation failed")
 
 
@@ -97,8 +119,8 @@ async def _request_phone_number(callback: types.CallbackQuery, state: FSMContext
     """Запрашивает номер телефона у пользователя"""
     keyboard = UIService.create_phone_request_keyboard()
 
-    await callback.message.delete()
     await callback.message.answer(messages.ASK_4_PHONE, reply_markup=keyboard)
+    MessageService.cleanup_messages(callback.message)
     await state.set_state(AuthState.waiting_for_phone)
 
 
@@ -116,11 +138,16 @@ async def process_phone(message: types.Message, state: FSMContext):
     # Сохраняем номер в состоянии
     await state.update_data(phone=phone_number)
 
-    # Отправляем стикер и сообщение загрузки
-    loading_sticker = await MessageService.send_loading_sticker(message)
-    loading_message = await message.answer(
-        settings.LOADING_MESSAGE,
-        reply_markup=types.ReplyKeyboardRemove(),
+    if await AuthService.is_login_unavailable():
+        await message.answer(
+            settings.API_ERROR_MESSAGE, reply_markup=types.ReplyKeyboardRemove()
+        )
+        return
+
+    # Индикатор загрузки (он же убирает клавиатуру) отправляется
+    # одновременно с запросом к API
+    loading = MessageService.start_loading(
+        message, reply_markup=types.ReplyKeyboardRemove()
     )
 
     try:
@@ -132,19 +159,17 @@ async def process_phone(message: types.Message, state: FSMContext):
 
         keyboard = UIService.create_auth_link_keyboard(response["authorization_link"])
 
-        await MessageService.cleanup_messages(loading_message, loading_sticker)
-        await message.answer(
-            UIService.format_auth_link_expires_message(),
-            reply_markup=keyboard.as_markup(),
-        )
+        with send_priority(SendPriority.HIGH):
+            await MessageService.finish_loading(
+                message,
+                loading,
+                UIService.format_auth_link_expires_message(),
+                reply_markup=keyboard.as_markup(),
+                editable=False,
+            )
 
     except AuthError as e:
-        await MessageService.cleanup_messages(loading_message, loading_sticker)
-        await message.answer(
-            settings.API_ERROR_MESSAGE, reply_markup=types.ReplyKeyboardRemove()
+        await MessageService.finish_loading(
+            message, loading, settings.API_ERROR_MESSAGE, editable=False
         )
         log_error(logger, e, "auth link generation failed")
-
-
-def register_handlers(dp: Dispatcher):
-    dp.include_router(router)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import logging
+
+from aiohttp import web
+
+from config import settings
+from src.services.cache import cache_service
+from src.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Статистика L1-кеша хранится в самом TTLCache — переносим ее в метрики
+# при каждом запросе /metrics, а не на каждом обращении к кешу
+LOCAL_CACHE_STATS = registry.gauge(
+    "cache_local_stats", "Статистика локального кеша CacheService", ("stat",)
+)
+
+
+class MetricsServer:
+    """HTTP-сервер с единственным маршрутом /metrics для Prometheus"""
+
+    def __init__(self) -> None:
+        self._runner: web.AppRunner | None = None
+
+    @staticmethod
+    async def handle_metrics(request: web.Request) -> web.Response:
+        for stat, value in cache_service.local_cache_stats().items():
+            LOCAL_CACHE_STATS.set(value, stat)
+        return web.Response(
+            text=registry.render(), content_type="text/plain", charset="utf-8"
+        )
+
+    async def start(self) -> None:
+        """Запускает сервер, если метрики включены в настройках"""
+        if not settings.METRICS_ENABLED or self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, settings.METRICS_HOST, settings.METRICS_PORT)
+        await site.start()
+        logger.info(
+            f"Метрики доступны на {settings.METRICS_HOST}:{settings.METRICS_PORT}/metrics"
+        )
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+metrics_server = MetricsServer()
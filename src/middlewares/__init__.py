@@ -0,0 +1,21 @@
+from aiogram import Dispatcher
+
+from config import settings
+
+from .log_context import LogContextMiddleware
+from .metrics import HandlerMetricsMiddleware, UpdateMetricsMiddleware
+from .throttling import ThrottlingMiddleware
+
+
+def register_middlewares(dp: Dispatcher) -> None:
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    # Внутренние middleware вызываются после выбора обработчика,
+    # поэтому в data уже лежит HandlerObject
+    if settings.THROTTLING_ENABLED:
+        # Первым, чтобы отклоненные действия не попадали во время обработчиков
+        throttling = ThrottlingMiddleware(settings.THROTTLING_LIMITS)
+        dp.message.middleware(throttling)
+        dp.callback_query.middleware(throttling)
+    for observer in (dp.message, dp.callback_query, dp.inline_query):
+        observer.middleware(HandlerMetricsMiddleware())
+        observer.middleware(LogContextMiddleware())
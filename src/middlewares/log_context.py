@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Awaitable
+from typing import Any, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from src.middlewares.metrics import get_handler_name
+from src.utils.logger import reset_log_context, set_log_context
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """Добавляет обработчик и пользователя ко всем записям лога обновления"""
+
+    async def __call__(
+        self, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        name = get_handler_name(event, data)
+        token = set_log_context(
+            handler=name, user_id=user.id if user is not None else None
+        )
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            if logger.isEnabledFor(logging.DEBUG):
+                latency_ms = round((time.perf_counter() - started) * 1000, 3)
+                logger.debug(
+                    f"{name} обработал событие за {latency_ms} мс",
+                    extra={"latency_ms": latency_ms},
+                )
+            reset_log_context(token)
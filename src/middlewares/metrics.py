@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Awaitable
+from typing import Any, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import CallbackQuery, TelegramObject, Update
+
+from src.handlers.callbacks import dispatch_callback, resolve_handler_name
+from src.utils.metrics import (
+    HANDLER_ERRORS,
+    HANDLER_LATENCY,
+    UPDATE_LATENCY,
+    UPDATES,
+)
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+def get_handler_name(event: TelegramObject, data: dict[str, Any]) -> str:
+    """Имя функции-обработчика, выбранной для события"""
+    handler_object: HandlerObject | None = data.get("handler")
+    if handler_object is None:
+        return "unknown"
+    if handler_object.callback is dispatch_callback and isinstance(
+        event, CallbackQuery
+    ):
+        # Все callback_query проходят через один диспетчер — берем
+        # обработчик, зарегистрированный для префикса callback_data
+        return resolve_handler_name(event.data or "")
+    return handler_object.callback.__name__
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Считает обновления и время их обработки по типу события"""
+
+    async def __call__(
+        self, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:
+        # Middleware регистрируется на dp.update; прочие события не считаем
+        if not isinstance(event, Update):
+            return await handler(event, data)
+        event_type = event.event_type
+        status = "error"
+        started = time.perf_counter()
+        try:
+            result = await handler(event, data)
+            status = "unhandled" if result is UNHANDLED else "handled"
+            return result
+        finally:
+            UPDATE_LATENCY.observe(time.perf_counter() - started, event_type)
+            UPDATES.inc(event_type, status)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Замеряет время и ошибки конкретного обработчика"""
+
+    async def __call__(
+        self, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:
+        name = get_handler_name(event, data)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_LATENCY.observe(time.perf_counter() - started, name)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Awaitable
+from typing import Any, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, TelegramObject, User
+
+from src.middlewares.metrics import get_handler_name
+from src.services.cache import cache_service
+from src.utils.metrics import THROTTLED
+from src.utils.sliding_window import SlidingWindow
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Ограничивает частоту действий пользователя скользящим окном.
+
+    Лимиты задаются по имени обработчика. Сначала проверяется окно в памяти
+    реплики: если оно заполнено, до Redis дело не доходит. Затем действие
+    учитывается в общем для реплик окне Redis одним вызовом Lua-скрипта;
+    если Redis недоступен, решает только локальное окно. На отклоненный
+    callback отправляется пустой ответ, отклоненное сообщение игнорируется.
+    """
+
+    def __init__(self, limits: dict[str, tuple[int, float]]):
+        self.windows = {
+            action: SlidingWindow(limit, window)
+            for action, (limit, window) in limits.items()
+        }
+
+    async def __call__(
+        self, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        if user is None or not self.windows:
+            return await handler(event, data)
+        action = get_handler_name(event, data)
+        window = self.windows.get(action)
+        if window is None or await self._allow(window, action, user.id):
+            return await handler(event, data)
+
+        THROTTLED.inc(action)
+        logger.debug(f"Пользователь {user.id} превысил лимит {action}")
+        if isinstance(event, CallbackQuery):
+            await event.answer()
+        return None
+
+    @staticmethod
+    async def _allow(window: SlidingWindow, action: str, user_id: int) -> bool:
+        now = time.monotonic()
+        # Локальные действия — часть общих: заполненное локальное окно
+        # означает, что и общее заполнено
+        if window.is_full(user_id, now):
+            return False
+        allowed = await cache_service.hit_rate_limit(
+            user_id, action, window.limit, int(window.window * 1000)
+        )
+        if allowed is False:
+            return False
+        window.record(user_id, now)
+        return True
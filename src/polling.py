@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import signal
+
+from aiogram import Bot, Dispatcher
+from aiogram.exceptions import AiogramError
+from aiogram.types import Update
+from aiogram.utils.backoff import Backoff, BackoffConfig
+
+from config import settings
+from src.services.task_manager import task_manager
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_CONFIG = BackoffConfig(min_delay=1.0, max_delay=5.0, factor=1.3, jitter=0.1)
+
+
+class PollingRunner:
+    """Long polling с ограниченной очередью обновлений.
+
+    Каждое обновление обрабатывается в своей задаче, как в
+    ``Dispatcher.start_polling``, но если в обработке и в очереди больше
+    POLLING_MAX_PENDING обновлений, следующий getUpdates откладывается, пока
+    очередь не разгрузится: необработанные обновления остаются на стороне
+    Telegram, а не копятся в памяти. При остановке начатые обновления
+    дорабатываются.
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot):
+        self.dp = dp
+        self.bot = bot
+        self._tasks: set[asyncio.Task] = set()
+        self._capacity = asyncio.Event()
+        self._capacity.set()
+
+    @property
+    def pending(self) -> int:
+        """Обновления в обработке и в очереди"""
+        return len(self._tasks)
+
+    async def poll(self) -> None:
+        """Получает обновления, пока задачу не отменят"""
+        user = await self.bot.me()
+        logger.info(f"Polling запущен для @{user.username}")
+        allowed_updates = self.dp.resolve_used_update_types()
+        backoff = Backoff(config=BACKOFF_CONFIG)
+        offset = None
+        while True:
+            await self._capacity.wait()
+            try:
+                updates = await self.bot.get_updates(
+                    offset=offset,
+                    timeout=settings.POLLING_TIMEOUT,
+                    allowed_updates=allowed_updates,
+                    request_timeout=int(
+                        settings.POLLING_TIMEOUT + self.bot.session.timeout
+                    ),
+                )
+            except AiogramError as e:
+                logger.error(
+                    f"Ошибка getUpdates: {e}; повтор через {backoff.next_delay:.1f} с"
+                )
+                await backoff.asleep()
+                continue
+            backoff.reset()
+            for update in updates:
+                offset = update.update_id + 1
+                self._submit(update)
+
+    def _submit(self, update: Update) -> None:
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._forget)
+        if len(self._tasks) >= settings.POLLING_MAX_PENDING:
+            self._capacity.clear()
+
+    def _forget(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if len(self._tasks) < settings.POLLING_MAX_PENDING:
+            self._capacity.set()
+
+    async def _process(self, update: Update) -> None:
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception:
+            logger.exception("Ошибка при обработке обновления")
+
+    async def drain(self) -> None:
+        """Дожидается начатых обновлений"""
+        if not self._tasks:
+            return
+
+        logger.info(f"Дожидаемся обработки {len(self._tasks)} обновлений")
+        _, pending = await asyncio.wait(
+            set(self._tasks), timeout=settings.POLLING_SHUTDOWN_TIMEOUT
+        )
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"Не дождались {len(pending)} обновлений, отменяем")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def run_polling(dp: Dispatcher, bot: Bot) -> None:
+    """Запускает long polling до получения SIGINT/SIGTERM"""
+    runner = PollingRunner(dp, bot)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    # Как в Dispatcher.start_polling: shutdown закрывает хранилище FSM
+    await dp.emit_startup(bot=bot, dispatcher=dp, bots=[bot])
+    poller = asyncio.create_task(runner.poll())
+    stopper = asyncio.create_task(stop.wait())
+    try:
+        await asyncio.wait({poller, stopper}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(sig)
+        for task in (poller, stopper):
+            task.cancel()
+        await asyncio.gather(poller, stopper, return_exceptions=True)
+        await runner.drain()
+        # Фоновые запросы к Telegram (удаления сообщений) — пока сессия открыта
+        await task_manager.drain()
+        await dp.emit_shutdown(bot=bot, dispatcher=dp, bots=[bot])
+        await bot.session.close()
+        logger.info("Polling остановлен")
+    # poll завершается сам только с ошибкой, например, при неверном токене
+    error = None if poller.cancelled() else poller.exception()
+    if error is not None:
+        raise error
@@ -1,21 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any
+
 import aiohttp
 
 from config import settings
+from src.exceptions import APIError, CircuitOpenError
+from src.services.circuit_breaker import CircuitBreaker
+from src.utils.metrics import API_LATENCY, API_REQUESTS, API_RETRIES
+
+logger = logging.getLogger(__name__)
+
+
+class APIStatusError(APIError):
+    """API ответило ошибкой сервера (5xx)"""
+
+    def __init__(self, status: int):
+        super().__init__(f"API вернуло статус {status}")
+        self.status = status
 
 
 class APIClient:
     def __init__(self, base_url: str):
         self.base_url = base_url
         self.auth = aiohttp.BasicAuth(settings.API_LOGIN, settings.API_PASSWORD)
+        self._session: aiohttp.ClientSession | None = None
+        self._breakers: dict[str, CircuitBreaker] = {}
 
-    async def fetch_data(self, endpoint: str):
-        async with aiohttp.ClientSession(auth=self.auth) as session:
-            async with session.get(f"{self.base_url}/{endpoint}") as response:
-                return await response.json()
+    @staticmethod
+    def _create_connector() -> aiohttp.TCPConnector:
+        """Создает коннектор с пулом keep-alive соединений"""
+        return aiohttp.TCPConnector(
+            limit=settings.API_POOL_LIMIT,
+            limit_per_host=settings.API_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=settings.API_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=settings.API_DNS_CACHE_TTL,
+        )
+
+    async def start(self) -> None:
+        """Открывает общую сессию для всех запросов к API"""
+        await self._get_session()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                auth=self.auth, connector=self._create_connector()
+            )
+        return self._session
+
+    async def fetch_data(self, endpoint: str, params: dict | None = None) -> Any:
+        return await self._request("GET", endpoint, idempotent=True, params=params)
+
+    async def post_data(
+        self, endpoint: str, data: dict, idempotent: bool = False
+    ) -> Any:
+        return await self._request("POST", endpoint, idempotent, json=data)
+
+    async def is_circuit_open(self, endpoint: str) -> bool:
+        """Разомкнута ли цепь для endpoint: запрос сейчас не будет отправлен"""
+        breaker = self._get_breaker(endpoint)
+        return breaker is not None and await breaker.is_open()
 
-    async def post_data(self, endpoint: str, data: dict):
-        async with aiohttp.ClientSession(auth=self.auth) as session:
-            async with session.post(
-                f"{self.base_url}/{endpoint}", json=data
+    def _get_breaker(self, endpoint: str) -> CircuitBreaker | None:
+        if not settings.API_BREAKER_ENABLED:
+            return None
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker(
+                endpoint,
+                failure_threshold=settings.API_BREAKER_FAILURE_THRESHOLD,
+                failure_window=settings.API_BREAKER_FAILURE_WINDOW,
+                reset_timeout=settings.API_BREAKER_RESET_TIMEOUT,
+                shared=settings.API_BREAKER_SHARED,
+            )
+        return breaker
+
+    async def _request(
+        self, method: str, endpoint: str, idempotent: bool = False, **kwargs: Any
+    ) -> Any:
+        """Выполняет запрос через размыкатель цепи, с таймаутом и повторами.
+
+        Ошибки сети, таймауты и ответы 5xx поднимаются как APIError.
+        """
+        timeout = settings.API_ENDPOINT_TIMEOUTS.get(endpoint, settings.API_TIMEOUT)
+        breaker = self._get_breaker(endpoint)
+        probe = False
+        if breaker is not None:
+            try:
+                # Пробный запрос занимает слот на все попытки: второй пробный
+                # не уходит, пока первый еще повторяется
+                probe = await breaker.before_call(probe_ttl=self._retry_budget(timeout))
+            except CircuitOpenError:
+                API_REQUESTS.inc(endpoint, "circuit_open")
+                raise
+
+        try:
+            result = await self._request_with_retries(
+                method, endpoint, timeout, idempotent, **kwargs
+            )
+        except APIError:
+            if breaker is not None:
+                await breaker.record_failure(probe)
+            raise
+        if breaker is not None:
+            await breaker.record_success(probe)
+        return result
+
+    async def _request_with_retries(
+        self,
+        method: str,
+        endpoint: str,
+        timeout: float,
+        idempotent: bool,
+        **kwargs: Any,
+    ) -> Any:
+        attempts = max(1, settings.API_RETRY_ATTEMPTS)
+        for attempt in range(1, attempts + 1):
+            try:
+                return await self._send(method, endpoint, timeout, **kwargs)
+            except (
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                APIStatusError,
+                ValueError,  # тело ответа — не JSON
+            ) as e:
+                # Без идемпотентности повторяем только то, что точно не дошло
+                retryable = idempotent or isinstance(e, aiohttp.ClientConnectorError)
+                if attempt == attempts or not retryable:
+                    if isinstance(e, APIError):
+                        raise
+                    raise APIError(f"Ошибка запроса {method} {endpoint}: {e!r}") from e
+                delay = self._backoff(attempt)
+                logger.warning(
+                    f"Запрос {method} {endpoint} не удался ({e!r}), "
+                    f"повтор {attempt}/{attempts - 1} через {delay:.2f} с"
+                )
+                API_RETRIES.inc(endpoint)
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _backoff_ceiling(attempt: int) -> float:
+        return min(
+            settings.API_RETRY_BACKOFF_MAX,
+            settings.API_RETRY_BACKOFF_BASE * 2.0 ** (attempt - 1),
+        )
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Экспоненциальная пауза с полным джиттером"""
+        return random.uniform(0, APIClient._backoff_ceiling(attempt))
+
+    @staticmethod
+    def _retry_budget(timeout: float) -> float:
+        """Наибольшее время запроса со всеми повторами и паузами между ними"""
+        attempts = max(1, settings.API_RETRY_ATTEMPTS)
+        pauses = sum(APIClient._backoff_ceiling(n) for n in range(1, attempts))
+        return attempts * timeout + pauses
+
+    async def _send(
+        self, method: str, endpoint: str, timeout: float, **kwargs: Any
+    ) -> Any:
+        """Одна попытка запроса; длительность и статус пишутся в метрики"""
+        session = await self._get_session()
+        status = "error"
+        started = time.perf_counter()
+        try:
+            async with session.request(
+                method,
+                f"{self.base_url}/{endpoint}",
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                **kwargs,
             ) as response:
+                status = str(response.status)
+                if response.status >= 500:
+                    raise APIStatusError(response.status)
                 return await response.json()
+        except asyncio.TimeoutError:
+            status = "timeout"
+            raise
+        finally:
+            API_LATENCY.observe(time.perf_counter() - started, endpoint)
+            API_REQUESTS.inc(endpoint, status)
+
+    async def close(self) -> None:
+        """Закрывает сессию и все соединения пула"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# Один клиент на процесс, чтобы переиспользовать соединения
+api_client = APIClient(settings.API_BASE_URL)
@@ -1,17 +1,22 @@
-from config import settings
-from src.services.api_client import APIClient
+from __future__ import annotations
+
+from src.constants import API_LOGIN_ENDPOINT
+from src.services.api_client import api_client
 
 
 async def user_login(
-    telegram_user_id: str, phone: str, telegram_username: str = None
-) -> None:
-    client = APIClient(settings.API_BASE_URL)
-    response = await client.post_data(
-        "api/v1/accounts/login",
+    telegram_user_id: str, phone: str, telegram_username: str | None = None
+) -> dict:
+    """Запрашивает ссылку авторизации: ответ API с authorization_link и expires_at"""
+    # Повторный логин для того же пользователя лишь выдает новую ссылку,
+    # поэтому запрос можно безопасно повторять
+    response: dict = await api_client.post_data(
+        API_LOGIN_ENDPOINT,
         {
             "telegram_username": telegram_username,
             "telegram_user_id": telegram_user_id,
             "phone": phone,
         },
+        idempotent=True,
     )
     return response
@@ -1,27 +1,106 @@
-import time
-from typing import Optional
+from __future__ import annotations
 
-from aiohttp import ClientConnectorError, ContentTypeError
+import asyncio
+import logging
+import time
 
 from config import settings
-from src.exceptions import AuthError
+from src.constants import API_LOGIN_ENDPOINT
+from src.exceptions import APIError, AuthError
+from src.services.api_client import api_client
 from src.services.auth import user_login
 from src.services.cache import cache_service
+from src.utils.metrics import AUTH_PREFETCH
+from src.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Запросы ссылки, выполняющиеся прямо сейчас, по user_id
+_auth_link_flights = SingleFlight()
+
+
+class AuthPrefetcher:
+    """Фоновые генерации ссылок по /start: пользователи, задачи и занятые слоты.
+
+    Слоты считаются счетчиком, а не asyncio.Semaphore, чтобы при их нехватке
+    генерация пропускалась, а не вставала в очередь.
+    """
+
+    def __init__(self) -> None:
+        self._users: set[int] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._active = 0
+
+    def start(self, user_id: int, username: str | None) -> None:
+        """Запускает генерацию в фоне, если есть свободный слот"""
+        if self._active >= settings.AUTH_PREFETCH_CONCURRENCY:
+            AUTH_PREFETCH.inc("skipped_busy")
+            return
+        self._active += 1
+        task = asyncio.create_task(self._run(user_id, username))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def join(self, user_id: int) -> bool:
+        """Забирает идущую генерацию; True, если она шла"""
+        if user_id not in self._users:
+            return False
+        self._users.discard(user_id)
+        AUTH_PREFETCH.inc("joined")
+        return True
+
+    async def _run(self, user_id: int, username: str | None) -> None:
+        try:
+            auth_data, phone = await cache_service.get_auth_state(user_id)
+            if auth_data and AuthService.is_auth_link_valid(auth_data["expires_at"]):
+                AUTH_PREFETCH.inc("skipped_cached")
+                return
+            if not phone:
+                AUTH_PREFETCH.inc("skipped_no_phone")
+                return
+            if await AuthService.is_login_unavailable():
+                AUTH_PREFETCH.inc("skipped_circuit_open")
+                return
+
+            self._users.add(user_id)
+            try:
+                await AuthService.generate_auth_link(user_id, username, phone)
+            except AuthError as e:
+                AUTH_PREFETCH.inc("failed")
+                logger.warning(f"Не удалось заранее сгенерировать ссылку: {e}")
+                return
+            # Если пользователь нажал кнопку во время генерации, ссылка уже
+            # отдана ему напрямую — отмечать ее как предзагруженную не нужно
+            if user_id in self._users:
+                await cache_service.mark_auth_prefetch(
+                    user_id, settings.AUTH_LINK_CACHE_TTL
+                )
+                AUTH_PREFETCH.inc("stored")
+        finally:
+            self._users.discard(user_id)
+            self._active -= 1
 
 
 class AuthService:
     """Сервис для работы с авторизацией пользователей"""
 
     @staticmethod
-    async def get_cached_auth_link(user_id: int) -> Optional[dict]:
+    async def get_cached_auth_link(user_id: int) -> dict | None:
         """Получает кешированную ссылку авторизации"""
         return await cache_service.get_auth_link(user_id)
 
     @staticmethod
-    async def get_cached_phone(user_id: int) -> Optional[str]:
+    async def get_cached_phone(user_id: int) -> str | None:
         """Получает кешированный номер телефона"""
         return await cache_service.get_phone(user_id)
 
+    @staticmethod
+    async def get_cached_auth_state(
+        user_id: int,
+    ) -> tuple[dict | None, str | None]:
+        """Получает кешированные ссылку авторизации и номер телефона разом"""
+        return await cache_service.get_auth_state(user_id)
+
     @staticmethod
     async def save_phone_to_cache(user_id: int, phone: str) -> None:
         """Сохраняет номер телефона в кеш"""
@@ -33,11 +112,96 @@ class AuthService:
         expires_at = int(time.time()) + settings.AUTH_LINK_CACHE_TTL
         await cache_service.set_auth_link(user_id, auth_link, expires_at)
 
+    @staticmethod
+    def is_auth_link_pending(user_id: int) -> bool:
+        """Проверяет, генерируется ли уже ссылка для пользователя в этом процессе"""
+        return _auth_link_flights.in_flight(user_id)
+
+    @staticmethod
+    def prefetch_auth_link(user_id: int, username: str | None) -> None:
+        """Запускает фоновую генерацию ссылки, если есть свободный слот.
+
+        Ссылка генерируется, только если телефон пользователя уже в кеше, а
+        действующей ссылки нет; нажатие «Авторизоваться» потом берет ее из кеша.
+        """
+        auth_prefetcher.start(user_id, username)
+
+    @staticmethod
+    def join_prefetch(user_id: int) -> bool:
+        """Забирает идущую фоновую генерацию ссылки для нажатия пользователя.
+
+        Возвращает True, если генерация шла: тогда нажатие должно дождаться ее,
+        а не считаться повторным.
+        """
+        return auth_prefetcher.join(user_id)
+
+    @staticmethod
+    async def record_prefetch_hit(user_id: int) -> None:
+        """Учитывает, что пользователь получил заранее сгенерированную ссылку"""
+        if await cache_service.consume_auth_prefetch(user_id):
+            AUTH_PREFETCH.inc("used")
+
+    @staticmethod
+    async def is_login_unavailable() -> bool:
+        """Проверяет, разомкнута ли цепь к API логина: запрос не будет отправлен"""
+        return await api_client.is_circuit_open(API_LOGIN_ENDPOINT)
+
     @staticmethod
     async def generate_auth_link(
-        user_id: int, username: Optional[str], phone: str
+        user_id: int, username: str | None, phone: str
+    ) -> dict:
+        """Генерирует ссылку для авторизации.
+
+        Одновременные вызовы для одного пользователя разделяют один запрос к API.
+        """
+        return await _auth_link_flights.do(
+            user_id,
+            lambda: AuthService._generate_auth_link_once(user_id, username, phone),
+        )
+
+    @staticmethod
+    async def _generate_auth_link_once(
+        user_id: int, username: str | None, phone: str
+    ) -> dict:
+        if not settings.AUTH_SINGLE_FLIGHT_REDIS:
+            return await AuthService._request_auth_link(user_id, username, phone)
+
+        token = await cache_service.acquire_auth_lock(
+            user_id, settings.AUTH_LOCK_TTL_MS
+        )
+        if token is None:
+            # Ссылку уже генерирует другая реплика — ждем ее в кеше
+            response = await AuthService._wait_for_auth_link(user_id)
+            if response is not None:
+                return response
+            token = await cache_service.acquire_auth_lock(
+                user_id, settings.AUTH_LOCK_TTL_MS
+            )
+
+        try:
+            return await AuthService._request_auth_link(user_id, username, phone)
+        finally:
+            if token is not None:
+                await cache_service.release_auth_lock(user_id, token)
+
+    @staticmethod
+    async def _wait_for_auth_link(user_id: int) -> dict | None:
+        """Ждет, пока другая реплика положит ссылку в кеш"""
+        deadline = time.monotonic() + settings.AUTH_LOCK_TTL_MS / 1000
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.AUTH_LOCK_POLL_INTERVAL)
+            cached = await cache_service.get_auth_link(user_id)
+            if cached and AuthService.is_auth_link_valid(cached["expires_at"]):
+                return {
+                    "authorization_link": cached["link"],
+                    "expires_at": cached["expires_at"],
+                }
+        return None
+
+    @staticmethod
+    async def _request_auth_link(
+        user_id: int, username: str | None, phone: str
     ) -> dict:
-        """Генерирует ссылку для авторизации"""
         try:
             response = await user_login(
                 telegram_user_id=str(user_id),
@@ -52,12 +216,15 @@ class AuthService:
 
             return response
 
-        except (ClientConnectorError, ContentTypeError) as e:
+        except APIError as e:
             raise AuthError(f"Ошибка при генерации ссылки авторизации: {e}")
 
     @staticmethod
-    def is_auth_link_valid(expires_at: int, current_time: Optional[int] = None) -> bool:
+    def is_auth_link_valid(expires_at: int, current_time: int | None = None) -> bool:
         """Проверяет, действительна ли ссылка авторизации"""
         if current_time is None:
             current_time = int(time.time())
         return current_time < expires_at
+
+
+auth_prefetcher = AuthPrefetcher()
@@ -1,113 +1,819 @@
-import json
+from __future__ import annotations
+
+import asyncio
+import functools
+import itertools
 import logging
-from typing import Optional
-import redis.asyncio as redis
+import time
+import uuid
+from collections.abc import Awaitable
+from typing import Any, Callable, TypeVar, cast
+
+from aiogram.utils.backoff import Backoff, BackoffConfig
+
 from config import settings
-from src.constants import CACHE_PHONE_PREFIX, CACHE_AUTH_LINK_PREFIX
+from src.constants import (
+    CACHE_AUTH_LINK_PREFIX,
+    CACHE_AUTH_LOCK_PREFIX,
+    CACHE_AUTH_PREFETCH_PREFIX,
+    CACHE_CIRCUIT_PREFIX,
+    CACHE_INVALIDATION_CHANNEL,
+    CACHE_PHONE_PREFIX,
+    CACHE_THROTTLE_PREFIX,
+)
+from src.services.cache_backend import (
+    BACKEND_ERRORS,
+    BucketedRedisCacheBackend,
+    CacheBackend,
+    MemoryCacheBackend,
+    PendingWrite,
+    RedisCacheBackend,
+    invalidation_message,
+)
+from src.services.cache_serializer import get_auth_link_serializer
+from src.services.redis_connection import redis_connection
+from src.utils.metrics import (
+    CACHE_ERRORS,
+    CACHE_FALLBACK_ACTIVE,
+    CACHE_LATENCY,
+    CACHE_OPERATIONS,
+)
+from src.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Удаляет блокировку, только если она все еще принадлежит владельцу токена
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Скользящее окно в отсортированном множестве: время берется на сервере Redis,
+# чтобы у реплик было общее окно; событие учитывается, только если разрешено
+SLIDING_WINDOW_SCRIPT = """
+local now = redis.call("TIME")
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local window_ms = tonumber(ARGV[2])
+redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", now_ms - window_ms)
+if redis.call("ZCARD", KEYS[1]) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call("ZADD", KEYS[1], now_ms, ARGV[3])
+redis.call("PEXPIRE", KEYS[1], window_ms)
+return 1
+"""
+
+# Пауза перед повторной подпиской на канал инвалидации
+INVALIDATION_RECONNECT_DELAY = 1.0
+# Сколько ждать сообщения инвалидации за одно чтение, секунд
+INVALIDATION_POLL_TIMEOUT = 1.0
+
+# Полуоткрытое состояние хранится дольше открытого: если пробных запросов
+# долго не было, цепь сама замыкается
+CIRCUIT_HALF_OPEN_TTL_FACTOR = 10
+
+
+async def _wait_event(event: asyncio.Event, timeout: float) -> bool:
+    """Ждет события не дольше timeout; True — событие произошло.
+
+    Не wait_for: до Python 3.12 он теряет отмену, пришедшую одновременно с
+    событием, и фоновая задача не останавливалась бы по cancel().
+    """
+    waiter = asyncio.ensure_future(event.wait())
+    try:
+        await asyncio.wait({waiter}, timeout=timeout)
+    finally:
+        waiter.cancel()
+    return event.is_set()
+
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+def instrumented(operation: str, lookup: bool = False) -> Callable[[F], F]:
+    """Замеряет время операции кеша; для чтений считает попадания и промахи"""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            result = await func(*args, **kwargs)
+            CACHE_LATENCY.observe(time.perf_counter() - started, operation)
+            if lookup:
+                hit = any(result) if isinstance(result, tuple) else result is not None
+                CACHE_OPERATIONS.inc(operation, "hit" if hit else "miss")
+            else:
+                CACHE_OPERATIONS.inc(operation, "ok")
+            return result
+
+        return cast(F, wrapper)
+
+    return decorator
+
 
 class CacheService:
-    def __init__(self):
-        try:
-            self.redis_client = redis.from_url(
-                settings.REDIS_URL, decode_responses=True
+    """Кеш бота поверх Redis с переключением в память процесса.
+
+    Данные кеша читаются и пишутся через ``backend``. Если Redis перестает
+    отвечать (ошибка соединения в операции или неудачная периодическая
+    проверка), кеш переключается на ограниченный кеш в памяти, а фоновая
+    задача пытается переподключиться с растущей паузой и джиттером; после
+    успешного PING кеш возвращается в Redis. Операции, которые
+    согласовывают реплики (блокировки, размыкатель, лимиты), без Redis
+    возвращают «недоступно», и вызывающий код работает локально.
+    """
+
+    def __init__(self) -> None:
+        self.phone_cache_ttl = settings.PHONE_CACHE_TTL
+        self.auth_link_cache_ttl = settings.AUTH_LINK_CACHE_TTL
+        self.auth_link_serializer = get_auth_link_serializer()
+        # Соединение не открывается до первой команды; пул общий с хранилищем FSM.
+        # Any: в типах redis.asyncio команды возвращают Awaitable[T] | T
+        self.redis_client: Any = redis_connection.client
+        self.redis_backend = self._make_redis_backend(self.redis_client)
+        self.memory_backend = MemoryCacheBackend(settings.CACHE_MEMORY_MAX_ENTRIES)
+        self._redis_available = settings.CACHE_BACKEND == "redis"
+        self.backend: CacheBackend = (
+            self.redis_backend if self._redis_available else self.memory_backend
+        )
+        self._redis_failed: asyncio.Event | None = None
+        self._monitor_task: asyncio.Task | None = None
+        # Ключи, записанные в память без Redis, -> удален ли ключ. После
+        # восстановления они переносятся в Redis
+        self._fallback_dirty: dict[str, bool] = {}
+
+        # Локальный кеш (L1) используется, только пока мы подписаны на инвалидацию
+        self.local_cache: TTLCache | None = None
+        if settings.LOCAL_CACHE_ENABLED:
+            self.local_cache = TTLCache(settings.LOCAL_CACHE_MAX_ENTRIES)
+        self._local_cache_ready = False
+        # Растет при каждой чужой инвалидации: значение, прочитанное из Redis
+        # до нее, не кладем в L1, чтобы не закешировать устаревшие данные
+        self._invalidation_epoch = 0
+        self._instance_id = uuid.uuid4().hex
+        self._invalidation_task: asyncio.Task | None = None
+
+        # Очередь write-behind: ключ -> последняя незаписанная операция.
+        # Повторные записи одного ключа схлопываются в одну команду
+        self._pending_writes: dict[str, PendingWrite] = {}
+        self._flushing_writes: dict[str, PendingWrite] = {}
+        self._write_behind_task: asyncio.Task | None = None
+        self._flush_wakeup: asyncio.Event | None = None
+        self._flush_lock: asyncio.Lock | None = None
+
+    @staticmethod
+    def _make_redis_backend(client: Any) -> RedisCacheBackend:
+        """Бэкенд Redis с раскладкой ключей из CACHE_KEY_LAYOUT"""
+        if settings.CACHE_KEY_LAYOUT == "buckets":
+            return BucketedRedisCacheBackend(client, settings.CACHE_BUCKET_COUNT)
+        return RedisCacheBackend(client)
+
+    @property
+    def redis_available(self) -> bool:
+        """Работает ли кеш сейчас с Redis (False — переключен в память)"""
+        return self._redis_available
+
+    def handle_redis_error(self, operation: str, error: Exception) -> None:
+        """Учитывает ошибку команды Redis вне кеша, например хранилища FSM.
+
+        Ошибка соединения переключает в память и кеш, и всех, кто следит за
+        redis_available.
+        """
+        self._record_error(operation, error)
+
+    def use_redis(self, client: Any) -> None:
+        """Переключает кеш на другой клиент Redis (для бенчмарков)"""
+        self.redis_client = client
+        self.redis_backend = self._make_redis_backend(client)
+        self.backend = self.redis_backend
+        self._redis_available = True
+
+    async def start(self) -> None:
+        """Запускает подписку на инвалидацию, фоновую запись и проверки Redis"""
+        if settings.CACHE_BACKEND != "redis":
+            return
+        if settings.CACHE_FALLBACK_ENABLED and (
+            self._monitor_task is None or self._monitor_task.done()
+        ):
+            self._redis_failed = asyncio.Event()
+            self._monitor_task = asyncio.create_task(
+                self._monitor_redis(self._redis_failed)
+            )
+            # Если Redis недоступен уже при запуске, первые пользователи не
+            # должны ждать таймаутов соединения
+            try:
+                await self.redis_backend.ping()
+            except BACKEND_ERRORS as e:
+                self._record_error("health_check", e)
+        if self.local_cache is not None and (
+            self._invalidation_task is None or self._invalidation_task.done()
+        ):
+            self._invalidation_task = asyncio.create_task(
+                self._listen_invalidations(self.local_cache)
+            )
+        if settings.CACHE_WRITE_BEHIND_ENABLED and (
+            self._write_behind_task is None or self._write_behind_task.done()
+        ):
+            self._flush_wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._write_behind_task = asyncio.create_task(
+                self._run_write_behind(self._flush_wakeup)
             )
-            self.phone_cache_ttl = settings.PHONE_CACHE_TTL
-            self.auth_link_cache_ttl = settings.AUTH_LINK_CACHE_TTL
-            self._redis_available = True
-        except Exception as e:
-            logger.error(f"Не удалось подключиться к Redis: {e}")
-            self._redis_available = False
 
+    @instrumented("set_phone")
     async def set_phone(self, user_id: int, phone: str) -> None:
         """Сохраняет номер телефона в кеше на 7 дней"""
-        if not self._redis_available:
-            logger.warning("Redis недоступен, пропускаем сохранение номера телефона")
-            return
 
+        key = f"{CACHE_PHONE_PREFIX}{user_id}"
         try:
-            key = f"{CACHE_PHONE_PREFIX}{user_id}"
-            await self.redis_client.setex(key, self.phone_cache_ttl, phone)
+            await self._setex(key, self.phone_cache_ttl, phone)
+            self._local_set(key, phone, self.phone_cache_ttl)
             logger.info(f"Номер телефона сохранен в кеше для пользователя {user_id}")
-        except Exception as e:
+        except BACKEND_ERRORS as e:
+            self._local_delete(key)
+            self._record_error("set_phone", e)
             logger.error(f"Ошибка при сохранении номера телефона в кеше: {e}")
 
-    async def get_phone(self, user_id: int) -> Optional[str]:
+    @instrumented("get_phone", lookup=True)
+    async def get_phone(self, user_id: int) -> str | None:
         """Получает номер телефона из кеша"""
-        if not self._redis_available:
-            logger.warning("Redis недоступен, пропускаем получение номера телефона")
-            return None
 
+        key = f"{CACHE_PHONE_PREFIX}{user_id}"
+        found, phone = self._pending_get(key)
+        if found:
+            return phone
+
+        cached: str | None = self._local_get(key)
+        if cached is not None:
+            return cached
+
+        epoch = self._invalidation_epoch
         try:
-            key = f"{CACHE_PHONE_PREFIX}{user_id}"
-            phone = await self.redis_client.get(key)
+            phone = await self.backend.get(key)
             if phone:
+                self._local_set(key, phone, self.phone_cache_ttl, epoch)
                 logger.info(f"Номер телефона найден в кеше для пользователя {user_id}")
             return phone
-        except Exception as e:
+        except BACKEND_ERRORS as e:
+            self._record_error("get_phone", e)
             logger.error(f"Ошибка при получении номера телефона из кеша: {e}")
             return None
 
+    @instrumented("set_auth_link")
     async def set_auth_link(
         self, user_id: int, auth_link: str, expires_at: int
     ) -> None:
         """Сохраняет ссылку авторизации в кеше"""
-        if not self._redis_available:
-            logger.warning("Redis недоступен, пропускаем сохранение ссылки авторизации")
-            return
 
+        key = f"{CACHE_AUTH_LINK_PREFIX}{user_id}"
         try:
-            key = f"{CACHE_AUTH_LINK_PREFIX}{user_id}"
-            # Сохраняем ссылку и время истечения как JSON
+            # Формат записи — AUTH_LINK_CACHE_FORMAT (см. cache_serializer)
             data = {"link": auth_link, "expires_at": expires_at}
-            await self.redis_client.setex(
-                key, self.auth_link_cache_ttl, json.dumps(data)
+            await self._setex(
+                key, self.auth_link_cache_ttl, self.auth_link_serializer.dumps(data)
             )
+            self._local_set(key, data, self._auth_link_local_ttl(data))
             logger.info(
                 f"Ссылка авторизации сохранена в кеше для пользователя {user_id}"
             )
-        except Exception as e:
+        except BACKEND_ERRORS as e:
+            self._local_delete(key)
+            self._record_error("set_auth_link", e)
             logger.error(f"Ошибка при сохранении ссылки авторизации в кеше: {e}")
 
-    async def get_auth_link(self, user_id: int) -> Optional[dict]:
+    @instrumented("get_auth_link", lookup=True)
+    async def get_auth_link(self, user_id: int) -> dict | None:
         """Получает ссылку авторизации из кеша"""
-        if not self._redis_available:
-            logger.warning("Redis недоступен, пропускаем получение ссылки авторизации")
-            return None
 
+        key = f"{CACHE_AUTH_LINK_PREFIX}{user_id}"
+        found, pending = self._pending_get(key)
+        if found:
+            return self.auth_link_serializer.loads(pending) if pending else None
+
+        cached_data: dict | None = self._local_get(key)
+        if cached_data is not None:
+            return cached_data
+
+        epoch = self._invalidation_epoch
         try:
-            key = f"{CACHE_AUTH_LINK_PREFIX}{user_id}"
-            data = await self.redis_client.get(key)
+            data = await self.backend.get(key)
             if data:
-                return json.loads(data)
+                auth_data = self.auth_link_serializer.loads(data)
+                self._local_set(
+                    key, auth_data, self._auth_link_local_ttl(auth_data), epoch
+                )
+                return auth_data
             return None
-        except Exception as e:
+        # ValueError: запись ссылки испорчена или в неизвестном формате
+        except (*BACKEND_ERRORS, ValueError) as e:
+            self._record_error("get_auth_link", e)
             logger.error(f"Ошибка при получении ссылки авторизации из кеша: {e}")
             return None
 
+    @instrumented("get_auth_state", lookup=True)
+    async def get_auth_state(self, user_id: int) -> tuple[dict | None, str | None]:
+        """Получает ссылку авторизации и номер телефона за один запрос к Redis"""
+        auth_link_key = f"{CACHE_AUTH_LINK_PREFIX}{user_id}"
+        phone_key = f"{CACHE_PHONE_PREFIX}{user_id}"
+
+        auth_data_found, raw_pending = self._pending_get(auth_link_key)
+        auth_data = (
+            self.auth_link_serializer.loads(raw_pending) if raw_pending else None
+        )
+        if not auth_data_found:
+            auth_data = self._local_get(auth_link_key)
+            auth_data_found = auth_data is not None
+
+        phone_found, phone = self._pending_get(phone_key)
+        if not phone_found:
+            phone = self._local_get(phone_key)
+            phone_found = phone is not None
+
+        if auth_data_found and phone_found:
+            return auth_data, phone
+
+        epoch = self._invalidation_epoch
+        try:
+            raw_auth_data, raw_phone = await self.backend.mget(
+                [auth_link_key, phone_key]
+            )
+        except BACKEND_ERRORS as e:
+            self._record_error("get_auth_state", e)
+            logger.error(f"Ошибка при получении данных авторизации из кеша: {e}")
+            return auth_data, phone
+
+        if not auth_data_found and raw_auth_data:
+            auth_data = self.auth_link_serializer.loads(raw_auth_data)
+            self._local_set(
+                auth_link_key, auth_data, self._auth_link_local_ttl(auth_data), epoch
+            )
+        if not phone_found and raw_phone:
+            phone = raw_phone
+            self._local_set(phone_key, phone, self.phone_cache_ttl, epoch)
+        return auth_data, phone
+
+    @instrumented("delete_phone")
     async def delete_phone(self, user_id: int) -> None:
         """Удаляет номер телефона из кеша"""
-        if not self._redis_available:
-            logger.warning("Redis недоступен, пропускаем удаление номера телефона")
-            return
 
+        key = f"{CACHE_PHONE_PREFIX}{user_id}"
+        self._local_delete(key)
         try:
-            key = f"{CACHE_PHONE_PREFIX}{user_id}"
-            await self.redis_client.delete(key)
+            await self._delete(key)
             logger.info(f"Номер телефона удален из кеша для пользователя {user_id}")
-        except Exception as e:
+        except BACKEND_ERRORS as e:
+            self._record_error("delete_phone", e)
             logger.error(f"Ошибка при удалении номера телефона из кеша: {e}")
 
-    async def close(self):
-        """Закрывает соединение с Redis"""
-        if self._redis_available:
+    @instrumented("acquire_auth_lock")
+    async def acquire_auth_lock(self, user_id: int, ttl_ms: int) -> str | None:
+        """Захватывает короткую блокировку генерации ссылки для пользователя.
+
+        Возвращает токен владельца или None, если блокировка уже занята.
+        При недоступности Redis возвращает токен, чтобы не блокировать авторизацию.
+        """
+        token = uuid.uuid4().hex
+        if not self._redis_available:
+            return token
+
+        try:
+            key = f"{CACHE_AUTH_LOCK_PREFIX}{user_id}"
+            acquired = await self.redis_client.set(key, token, nx=True, px=ttl_ms)
+            return token if acquired else None
+        except BACKEND_ERRORS as e:
+            self._record_error("acquire_auth_lock", e)
+            logger.error(f"Ошибка при захвате блокировки авторизации: {e}")
+            return token
+
+    @instrumented("release_auth_lock")
+    async def release_auth_lock(self, user_id: int, token: str) -> None:
+        """Освобождает блокировку генерации ссылки, если она наша"""
+        if not self._redis_available:
+            return
+
+        try:
+            key = f"{CACHE_AUTH_LOCK_PREFIX}{user_id}"
+            await self.redis_client.eval(RELEASE_LOCK_SCRIPT, 1, key, token)
+        except BACKEND_ERRORS as e:
+            self._record_error("release_auth_lock", e)
+            logger.error(f"Ошибка при освобождении блокировки авторизации: {e}")
+
+    @instrumented("mark_auth_prefetch")
+    async def mark_auth_prefetch(self, user_id: int, ttl: int) -> None:
+        """Помечает ссылку пользователя как сгенерированную заранее"""
+        try:
+            key = f"{CACHE_AUTH_PREFETCH_PREFIX}{user_id}"
+            await self.backend.write([(key, (ttl, "1"))])
+        except BACKEND_ERRORS as e:
+            self._record_error("mark_auth_prefetch", e)
+            logger.error(f"Ошибка при сохранении отметки предзагрузки ссылки: {e}")
+
+    @instrumented("consume_auth_prefetch")
+    async def consume_auth_prefetch(self, user_id: int) -> bool:
+        """Снимает отметку предзагрузки; True, если она была"""
+        try:
+            key = f"{CACHE_AUTH_PREFETCH_PREFIX}{user_id}"
+            return bool(await self.backend.delete(key))
+        except BACKEND_ERRORS as e:
+            self._record_error("consume_auth_prefetch", e)
+            logger.error(f"Ошибка при снятии отметки предзагрузки ссылки: {e}")
+            return False
+
+    @instrumented("hit_rate_limit")
+    async def hit_rate_limit(
+        self, user_id: int, action: str, limit: int, window_ms: int
+    ) -> bool | None:
+        """Учитывает действие пользователя в общем для реплик скользящем окне.
+
+        Возвращает False, если лимит исчерпан, None — при недоступности Redis.
+        """
+        if not self._redis_available:
+            return None
+
+        try:
+            key = f"{CACHE_THROTTLE_PREFIX}{action}:{user_id}"
+            allowed = await self.redis_client.eval(
+                SLIDING_WINDOW_SCRIPT, 1, key, limit, window_ms, uuid.uuid4().hex
+            )
+            return bool(allowed)
+        except BACKEND_ERRORS as e:
+            self._record_error("hit_rate_limit", e)
+            logger.error(f"Ошибка при проверке лимита {action}: {e}")
+            return None
+
+    @instrumented("get_circuit_state")
+    async def get_circuit_state(self, name: str) -> tuple[int, bool] | None:
+        """Состояние размыкателя цепи: (мс до пробного запроса, полуоткрыт ли).
+
+        None — состояние недоступно, размыкатель работает локально.
+        """
+        if not self._redis_available:
+            return None
+
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.pttl(f"{CACHE_CIRCUIT_PREFIX}{name}:open")
+                pipe.exists(f"{CACHE_CIRCUIT_PREFIX}{name}:half_open")
+                open_ttl, half_open = await pipe.execute()
+        except BACKEND_ERRORS as e:
+            self._record_error("get_circuit_state", e)
+            logger.error(f"Ошибка при чтении состояния размыкателя {name}: {e}")
+            return None
+        return max(open_ttl, 0), bool(half_open)
+
+    @instrumented("record_circuit_failure")
+    async def record_circuit_failure(
+        self, name: str, threshold: int, window_ms: int, open_ms: int
+    ) -> bool | None:
+        """Учитывает ошибку; размыкает цепь при достижении порога.
+
+        Возвращает True, если цепь разомкнута, None — при недоступности Redis.
+        """
+        if not self._redis_available:
+            return None
+
+        prefix = f"{CACHE_CIRCUIT_PREFIX}{name}"
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                # Счетчик живет окно с первой ошибки, INCR не сбрасывает TTL
+                pipe.set(f"{prefix}:failures", 0, nx=True, px=window_ms)
+                pipe.incr(f"{prefix}:failures")
+                pipe.exists(f"{prefix}:half_open")
+                _, failures, half_open = await pipe.execute()
+            if failures < threshold and not half_open:
+                return False
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.set(f"{prefix}:open", 1, px=open_ms)
+                pipe.set(
+                    f"{prefix}:half_open", 1, px=open_ms * CIRCUIT_HALF_OPEN_TTL_FACTOR
+                )
+                pipe.delete(f"{prefix}:failures", f"{prefix}:probe")
+                await pipe.execute()
+            return True
+        except BACKEND_ERRORS as e:
+            self._record_error("record_circuit_failure", e)
+            logger.error(f"Ошибка при записи ошибки размыкателя {name}: {e}")
+            return None
+
+    @instrumented("acquire_circuit_probe")
+    async def acquire_circuit_probe(self, name: str, ttl_ms: int) -> bool | None:
+        """Захватывает право на пробный запрос полуоткрытой цепи для всех реплик"""
+        if not self._redis_available:
+            return None
+
+        try:
+            key = f"{CACHE_CIRCUIT_PREFIX}{name}:probe"
+            return bool(await self.redis_client.set(key, 1, nx=True, px=ttl_ms))
+        except BACKEND_ERRORS as e:
+            self._record_error("acquire_circuit_probe", e)
+            logger.error(f"Ошибка при захвате пробного запроса размыкателя {name}: {e}")
+            return None
+
+    @instrumented("reset_circuit")
+    async def reset_circuit(self, name: str) -> None:
+        """Замыкает цепь: сбрасывает счетчик ошибок и все состояния"""
+        if not self._redis_available:
+            return
+
+        prefix = f"{CACHE_CIRCUIT_PREFIX}{name}"
+        try:
+            await self.redis_client.delete(
+                f"{prefix}:failures",
+                f"{prefix}:open",
+                f"{prefix}:half_open",
+                f"{prefix}:probe",
+            )
+        except BACKEND_ERRORS as e:
+            self._record_error("reset_circuit", e)
+            logger.error(f"Ошибка при сбросе размыкателя {name}: {e}")
+
+    def local_cache_stats(self) -> dict[str, int]:
+        """Счетчики локального кеша (пусто, если он выключен)"""
+        if self.local_cache is None:
+            return {}
+        return self.local_cache.stats()
+
+    async def close(self) -> None:
+        """Останавливает фоновые задачи; пул закрывает redis_connection"""
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            try:
+                await self._monitor_task
+            except asyncio.CancelledError:
+                pass
+            self._monitor_task = None
+
+        if self._write_behind_task is not None:
+            # Прерванная пачка возвращается в очередь и дописывается ниже
+            self._write_behind_task.cancel()
+            try:
+                await self._write_behind_task
+            except asyncio.CancelledError:
+                pass
+            # Дописываем все, что осталось в очереди, до закрытия соединения.
+            # Ссылка на задачу сбрасывается после: записи, пришедшие во время
+            # сброса, встают в ту же очередь, а не обгоняют ее
+            await self._flush_writes()
+            self._write_behind_task = None
+            if self._pending_writes:
+                logger.warning(
+                    f"Redis недоступен, не записано {len(self._pending_writes)} ключей"
+                )
+
+        if self._invalidation_task is not None:
+            self._invalidation_task.cancel()
+            try:
+                await self._invalidation_task
+            except asyncio.CancelledError:
+                pass
+            self._invalidation_task = None
+
+    async def _setex(self, key: str, ttl: int, value: str) -> None:
+        """SETEX сразу или через очередь write-behind"""
+        await self._write(key, ttl, value)
+
+    async def _delete(self, key: str) -> None:
+        """DEL сразу или через очередь write-behind"""
+        await self._write(key, 0, None)
+
+    async def _write(self, key: str, ttl: int, value: str | None) -> None:
+        if self.backend is self.memory_backend:
+            # Без Redis пишем в память; запись из очереди для этого ключа
+            # устарела и не должна вернуться при чтении
+            self._pending_writes.pop(key, None)
+            self._flushing_writes.pop(key, None)
+            await self.memory_backend.write([(key, (ttl, value))])
+            if settings.CACHE_BACKEND == "redis":
+                self._fallback_dirty[key] = value is None
+            return
+
+        if self._write_behind_task is None:
+            await self._execute_writes([(key, (ttl, value))])
+            return
+
+        if len(self._pending_writes) >= settings.CACHE_WRITE_BEHIND_MAX_PENDING:
+            # Очередь переполнена — пишем синхронно, чтобы не расти без границ
+            await self._flush_writes()
+
+        self._pending_writes.pop(key, None)
+        self._pending_writes[key] = (ttl, value)
+        if (
+            self._flush_wakeup is not None
+            and len(self._pending_writes) >= settings.CACHE_WRITE_BEHIND_BATCH_SIZE
+        ):
+            self._flush_wakeup.set()
+
+    async def _execute_writes(self, writes: list[tuple[str, PendingWrite]]) -> None:
+        """Отправляет записи одним pipeline, оповещая реплики при включенном L1"""
+        invalidations = []
+        if self.local_cache is not None:
+            invalidations = [self._invalidation_message(key) for key, _ in writes]
+        await self.redis_backend.write(writes, invalidations)
+
+    def _pending_get(self, key: str) -> tuple[bool, str | None]:
+        """Незаписанное значение ключа: (есть ли операция в очереди, значение)"""
+        entry = self._pending_writes.get(key) or self._flushing_writes.get(key)
+        if entry is None:
+            return False, None
+        return True, entry[1]
+
+    async def _run_write_behind(self, wakeup: asyncio.Event) -> None:
+        """Периодически или по заполнении пачки сбрасывает очередь в Redis"""
+        while True:
+            await _wait_event(wakeup, settings.CACHE_WRITE_BEHIND_FLUSH_INTERVAL)
+            wakeup.clear()
+            await self._flush_writes()
+
+    async def _flush_writes(self) -> None:
+        """Записывает очередь в Redis пачками"""
+        if self._flush_lock is None:
+            return
+
+        async with self._flush_lock:
+            # Пока Redis недоступен, очередь ждет переподключения
+            while self._pending_writes and self._redis_available:
+                keys = list(
+                    itertools.islice(
+                        self._pending_writes, settings.CACHE_WRITE_BEHIND_BATCH_SIZE
+                    )
+                )
+                # До конца записи пачка видна чтениям через _pending_get
+                self._flushing_writes = {
+                    key: self._pending_writes.pop(key) for key in keys
+                }
+                try:
+                    await self._execute_writes(list(self._flushing_writes.items()))
+                except BaseException as e:
+                    # Возвращаем пачку в очередь, не затирая более новые записи
+                    for key, entry in self._flushing_writes.items():
+                        self._pending_writes.setdefault(key, entry)
+                    if not isinstance(e, Exception):
+                        raise
+                    self._record_error("write_behind", e)
+                    logger.error(f"Ошибка при пакетной записи в кеш: {e}")
+                    break
+                finally:
+                    self._flushing_writes = {}
+
+    def _record_error(self, operation: str, error: Exception) -> None:
+        """Считает ошибку операции; при недоступности Redis переключает кеш в память"""
+        CACHE_ERRORS.inc(operation)
+        if RedisCacheBackend.is_unavailable(error):
+            self._switch_to_memory(error)
+
+    def _switch_to_memory(self, error: Exception) -> None:
+        if not self._redis_available or not settings.CACHE_FALLBACK_ENABLED:
+            return
+        self._redis_available = False
+        self.backend = self.memory_backend
+        CACHE_FALLBACK_ACTIVE.set(1)
+        if self._redis_failed is not None:
+            self._redis_failed.set()
+        logger.warning(f"Redis недоступен, кеш переключен в память процесса: {error}")
+
+    async def _switch_to_redis(self) -> None:
+        """Переносит в Redis записи, сделанные без него, и возвращает кеш в Redis.
+
+        Пока записи переносятся, кеш остается в памяти: новые записи тоже
+        попадают в перенос, а ошибка оставляет все на месте до следующей
+        попытки. Ключи, вытесненные из памяти или истекшие в ней, не
+        переносятся, удаленные — удаляются и в Redis.
+        """
+        while self._fallback_dirty:
+            keys = list(
+                itertools.islice(
+                    self._fallback_dirty, settings.CACHE_WRITE_BEHIND_BATCH_SIZE
+                )
+            )
+            writes: list[tuple[str, PendingWrite]] = []
+            for key in keys:
+                entry = (
+                    (0, None)
+                    if self._fallback_dirty.pop(key)
+                    else self.memory_backend.entry(key)
+                )
+                if entry is not None:
+                    writes.append((key, entry))
+            try:
+                if writes:
+                    await self._execute_writes(writes)
+            except BaseException:
+                # Возвращаем пачку, не затирая записи, сделанные во время переноса
+                for key, (_, value) in writes:
+                    self._fallback_dirty.setdefault(key, value is None)
+                raise
+        # Между последним переносом и переключением нет await: ничего не теряется
+        self.memory_backend.clear()
+        self.backend = self.redis_backend
+        self._redis_available = True
+        CACHE_FALLBACK_ACTIVE.set(0)
+        logger.info("Redis снова доступен, кеш переключен обратно в Redis")
+
+    async def _monitor_redis(self, redis_failed: asyncio.Event) -> None:
+        """Проверяет Redis и переподключается к нему с растущей паузой"""
+        backoff = Backoff(
+            config=BackoffConfig(
+                min_delay=settings.CACHE_RECONNECT_MIN_DELAY,
+                max_delay=settings.CACHE_RECONNECT_MAX_DELAY,
+                factor=2.0,
+                jitter=0.2,
+            )
+        )
+        while True:
+            if self._redis_available:
+                # Ждем периодической проверки или ошибки соединения в операции
+                if not await _wait_event(
+                    redis_failed, settings.CACHE_HEALTH_CHECK_INTERVAL
+                ):
+                    try:
+                        await self.redis_backend.ping()
+                    except BACKEND_ERRORS as e:
+                        self._record_error("health_check", e)
+                continue
+
+            await backoff.asleep()
+            try:
+                await self.redis_backend.ping()
+            except BACKEND_ERRORS as e:
+                logger.warning(
+                    f"Redis все еще недоступен: {e}; "
+                    f"повтор через {backoff.next_delay:.1f} с"
+                )
+                continue
+            try:
+                await self._switch_to_redis()
+            except BACKEND_ERRORS as e:
+                logger.warning(f"Не удалось перенести записи кеша в Redis: {e}")
+                continue
+            redis_failed.clear()
+            backoff.reset()
+
+    def _local_get(self, key: str) -> Any | None:
+        if self.local_cache is None or not self._local_cache_ready:
+            return None
+        return self.local_cache.get(key)
+
+    def _local_set(
+        self, key: str, value: Any, ttl: float, epoch: int | None = None
+    ) -> None:
+        if self.local_cache is None or not self._local_cache_ready:
+            return
+        if epoch is None:
+            # Своя запись: чтение, начатое до нее, не должно затереть L1
+            # прочитанным из Redis старым значением
+            self._invalidation_epoch += 1
+        elif epoch != self._invalidation_epoch:
+            return
+        self.local_cache.set(key, value, min(ttl, settings.LOCAL_CACHE_TTL))
+
+    def _local_delete(self, key: str) -> None:
+        if self.local_cache is not None:
+            self._invalidation_epoch += 1
+            self.local_cache.delete(key)
+
+    @staticmethod
+    def _auth_link_local_ttl(auth_data: dict) -> float:
+        """Ссылка не должна жить в L1 дольше, чем она действительна"""
+        return float(auth_data["expires_at"]) - time.time()
+
+    def _invalidation_message(self, key: str) -> str:
+        return invalidation_message(self._instance_id, key)
+
+    async def _listen_invalidations(self, local_cache: TTLCache) -> None:
+        """Удаляет из L1 ключи, измененные другими репликами"""
+        while True:
+            if not self._redis_available:
+                await asyncio.sleep(INVALIDATION_RECONNECT_DELAY)
+                continue
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
             try:
-                await self.redis_client.close()
-                logger.info("Соединение с Redis закрыто")
-            except Exception as e:
-                logger.error(f"Ошибка при закрытии соединения с Redis: {e}")
+                await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                self._local_cache_ready = True
+                while True:
+                    # Ждем с явным таймаутом: socket_timeout пула иначе
+                    # обрывал бы подписку, в которой давно не было сообщений
+                    message = await pubsub.get_message(
+                        timeout=INVALIDATION_POLL_TIMEOUT
+                    )
+                    if message is None:
+                        continue
+                    instance_id, _, key = message["data"].partition(" ")
+                    if instance_id != self._instance_id:
+                        self._invalidation_epoch += 1
+                        local_cache.delete(key)
+            except asyncio.CancelledError:
+                raise
+            except BACKEND_ERRORS as e:
+                logger.error(f"Потеряна подписка на инвалидацию кеша: {e}")
+            finally:
+                # Без подписки L1 может устареть — сбрасываем и не используем его
+                self._local_cache_ready = False
+                self._invalidation_epoch += 1
+                local_cache.clear()
+                await pubsub.aclose()
+            await asyncio.sleep(INVALIDATION_RECONNECT_DELAY)
 
 
 # Создаем глобальный экземпляр сервиса кеша
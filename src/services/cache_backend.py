@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Sequence
+from typing import Any, Optional
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import RedisError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from src.constants import (
+    CACHE_AUTH_LINK_PREFIX,
+    CACHE_BUCKET_INFIX,
+    CACHE_INVALIDATION_CHANNEL,
+    CACHE_PHONE_PREFIX,
+)
+from src.utils.ttl_cache import TTLCache
+
+# Запись кеша: (ttl в секундах, значение); значение None означает удаление ключа
+PendingWrite = tuple[int, Optional[str]]
+
+# Ошибки обращения к Redis: команда не выполнена, но бот может работать дальше
+BACKEND_ERRORS = (RedisError, OSError, asyncio.TimeoutError)
+
+# Ключи по id пользователя, которые раскладка buckets хранит в хешах
+BUCKETED_PREFIXES = (CACHE_PHONE_PREFIX, CACHE_AUTH_LINK_PREFIX)
+
+
+def invalidation_message(instance_id: str, key: str) -> str:
+    """Сообщение в CACHE_INVALIDATION_CHANNEL: реплика instance_id изменила key"""
+    return f"{instance_id} {key}"
+
+
+class CacheBackend(ABC):
+    """Хранилище данных кеша: строковые значения с временем жизни"""
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None:
+        """Значение ключа или None"""
+
+    @abstractmethod
+    async def mget(self, keys: Sequence[str]) -> list[str | None]:
+        """Значения нескольких ключей за одно обращение"""
+
+    @abstractmethod
+    async def write(
+        self,
+        writes: Sequence[tuple[str, PendingWrite]],
+        invalidations: Sequence[str] = (),
+    ) -> None:
+        """Записывает и удаляет ключи; invalidations — сообщения другим репликам"""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> int:
+        """Удаляет ключи; возвращает число удаленных"""
+
+
+class RedisCacheBackend(CacheBackend):
+    """Кеш в Redis, общий для всех реплик"""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    @staticmethod
+    def is_unavailable(error: BaseException) -> bool:
+        """Ошибка говорит о недоступности Redis, а не о неверной команде"""
+        if RedisCacheBackend.is_pool_exhausted(error):
+            # Все соединения пула заняты под нагрузкой, а сам Redis отвечает
+            return False
+        return isinstance(
+            error,
+            (RedisConnectionError, RedisTimeoutError, OSError, asyncio.TimeoutError),
+        )
+
+    @staticmethod
+    def is_pool_exhausted(error: BaseException) -> bool:
+        """Блокирующий пул не дождался свободного соединения за REDIS_POOL_TIMEOUT.
+
+        BlockingConnectionPool сообщает об этом ConnectionError("No connection
+        available."), вызванной таймаутом ожидания; настоящие ошибки
+        соединения вызваны OSError или таймаутом сокета.
+        """
+        return isinstance(error, RedisConnectionError) and isinstance(
+            error.__cause__, asyncio.TimeoutError
+        )
+
+    async def ping(self) -> None:
+        await self.client.ping()
+
+    async def get(self, key: str) -> str | None:
+        value: str | None = await self.client.get(key)
+        return value
+
+    async def mget(self, keys: Sequence[str]) -> list[str | None]:
+        values: list[str | None] = await self.client.mget(*keys)
+        return values
+
+    async def write(
+        self,
+        writes: Sequence[tuple[str, PendingWrite]],
+        invalidations: Sequence[str] = (),
+    ) -> None:
+        if len(writes) == 1 and not invalidations:
+            key, (ttl, value) = writes[0]
+            if value is None:
+                await self.client.delete(key)
+            else:
+                await self.client.setex(key, ttl, value)
+            return
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, (ttl, value) in writes:
+                self._queue_write(pipe, key, ttl, value)
+            for message in invalidations:
+                pipe.publish(CACHE_INVALIDATION_CHANNEL, message)
+            await pipe.execute()
+
+    def _queue_write(self, pipe: Any, key: str, ttl: int, value: str | None) -> None:
+        if value is None:
+            pipe.delete(key)
+        else:
+            pipe.setex(key, ttl, value)
+
+    async def delete(self, *keys: str) -> int:
+        deleted: int = await self.client.delete(*keys)
+        return deleted
+
+    async def scan_user_values(
+        self, prefix: str, count: int
+    ) -> AsyncIterator[list[tuple[int, str]]]:
+        """Пары (user_id, значение) ключей {prefix}{user_id} пачками около count.
+
+        Ключи перебираются SCAN и не блокируют Redis; SCAN может вернуть
+        ключ дважды, а ключи, истекшие до чтения, пропускаются.
+        """
+        keys: list[str] = []
+        async for key in self.client.scan_iter(match=f"{prefix}[0-9]*", count=count):
+            keys.append(key)
+            if len(keys) >= count:
+                yield await self._read_user_values(prefix, keys)
+                keys = []
+        if keys:
+            yield await self._read_user_values(prefix, keys)
+
+    async def _read_user_values(
+        self, prefix: str, keys: list[str]
+    ) -> list[tuple[int, str]]:
+        values = await self.client.mget(*keys)
+        return [
+            (int(key[len(prefix) :]), value)
+            for key, value in zip(keys, values)
+            if value is not None
+        ]
+
+
+class BucketedRedisCacheBackend(RedisCacheBackend):
+    """Кеш в Redis, где телефоны и ссылки лежат полями небольших хешей.
+
+    Ключ ``phone:{id}`` хранится полем ``{id}`` хеша
+    ``phone:b:{id % bucket_count}`` со своим временем жизни (HEXPIRE,
+    Redis 7.4+). Небольшой хеш Redis хранит одним компактным listpack, и
+    накладные расходы ключа делятся между пользователями корзины. Остальные
+    ключи остаются обычными.
+    """
+
+    def __init__(self, client: Any, bucket_count: int):
+        super().__init__(client)
+        self.bucket_count = bucket_count
+
+    def locate(self, key: str) -> tuple[str, str] | None:
+        """Хеш и поле ключа или None, если ключ хранится как обычно"""
+        for prefix in BUCKETED_PREFIXES:
+            if key.startswith(prefix):
+                field = key[len(prefix) :]
+                bucket = int(field) % self.bucket_count
+                return f"{prefix}{CACHE_BUCKET_INFIX}{bucket}", field
+        return None
+
+    async def get(self, key: str) -> str | None:
+        location = self.locate(key)
+        if location is None:
+            return await super().get(key)
+        value: str | None = await self.client.hget(*location)
+        return value
+
+    async def mget(self, keys: Sequence[str]) -> list[str | None]:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                location = self.locate(key)
+                if location is None:
+                    pipe.get(key)
+                else:
+                    pipe.hget(*location)
+            values: list[str | None] = await pipe.execute()
+            return values
+
+    async def write(
+        self,
+        writes: Sequence[tuple[str, PendingWrite]],
+        invalidations: Sequence[str] = (),
+    ) -> None:
+        # HSET и HEXPIRE в одной транзакции: поле не остается без срока жизни
+        async with self.client.pipeline(transaction=True) as pipe:
+            for key, (ttl, value) in writes:
+                self._queue_write(pipe, key, ttl, value)
+            for message in invalidations:
+                pipe.publish(CACHE_INVALIDATION_CHANNEL, message)
+            await pipe.execute()
+
+    def _queue_write(self, pipe: Any, key: str, ttl: int, value: str | None) -> None:
+        location = self.locate(key)
+        if location is None:
+            super()._queue_write(pipe, key, ttl, value)
+        elif value is None:
+            pipe.hdel(*location)
+        else:
+            bucket, field = location
+            pipe.hset(bucket, field, value)
+            pipe.hexpire(bucket, ttl, field)
+
+    async def delete(self, *keys: str) -> int:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                location = self.locate(key)
+                if location is None:
+                    pipe.delete(key)
+                else:
+                    pipe.hdel(*location)
+            return sum(await pipe.execute())
+
+    async def scan_user_values(
+        self, prefix: str, count: int
+    ) -> AsyncIterator[list[tuple[int, str]]]:
+        if prefix not in BUCKETED_PREFIXES:
+            async for chunk in super().scan_user_values(prefix, count):
+                yield chunk
+            return
+
+        values: list[tuple[int, str]] = []
+        match = f"{prefix}{CACHE_BUCKET_INFIX}*"
+        async for bucket in self.client.scan_iter(match=match, count=count):
+            fields = await self.client.hgetall(bucket)
+            values.extend((int(field), value) for field, value in fields.items())
+            if len(values) >= count:
+                yield values
+                values = []
+        if values:
+            yield values
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Кеш в памяти процесса, ограниченный max_entries ключами.
+
+    Используется вместо Redis при его недоступности и для запуска без Redis.
+    Данные не видны другим репликам и теряются при перезапуске.
+    """
+
+    def __init__(self, max_entries: int):
+        self._data = TTLCache(max_entries)
+
+    async def get(self, key: str) -> str | None:
+        return self._data.get(key)
+
+    async def mget(self, keys: Sequence[str]) -> list[str | None]:
+        return [self._data.get(key) for key in keys]
+
+    async def write(
+        self,
+        writes: Sequence[tuple[str, PendingWrite]],
+        invalidations: Sequence[str] = (),
+    ) -> None:
+        for key, (ttl, value) in writes:
+            if value is None:
+                self._data.delete(key)
+            else:
+                self._data.set(key, value, ttl)
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            if self._data.get(key) is not None:
+                self._data.delete(key)
+                deleted += 1
+        return deleted
+
+    def entry(self, key: str) -> PendingWrite | None:
+        """Запись ключа с оставшимся временем жизни в целых секундах или None"""
+        found = self._data.get_with_ttl(key)
+        if found is None:
+            return None
+        value, remaining = found
+        return math.ceil(remaining), value
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
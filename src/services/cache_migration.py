@@ -0,0 +1,92 @@
+import logging
+from typing import Any
+
+from src.constants import CACHE_BUCKET_INFIX
+from src.services.cache_backend import BUCKETED_PREFIXES, BucketedRedisCacheBackend
+
+logger = logging.getLogger(__name__)
+
+# Переносит ключ в поле хеша с оставшимся временем жизни. Поле, уже
+# записанное ботом в новой раскладке, новее ключа и не перезаписывается
+TO_BUCKETS_SCRIPT = """
+local value = redis.call("GET", KEYS[1])
+if not value then
+    return 0
+end
+local ttl = redis.call("PTTL", KEYS[1])
+if redis.call("HSETNX", KEYS[2], ARGV[1], value) == 1 and ttl > 0 then
+    redis.call("HPEXPIRE", KEYS[2], ttl, "FIELDS", 1, ARGV[1])
+end
+redis.call("DEL", KEYS[1])
+return 1
+"""
+
+# Обратный перенос: поле хеша в отдельный ключ, существующий ключ новее
+TO_KEYS_SCRIPT = """
+local value = redis.call("HGET", KEYS[1], ARGV[1])
+if not value then
+    return 0
+end
+local ttl = redis.call("HPTTL", KEYS[1], "FIELDS", 1, ARGV[1])[1]
+if ttl > 0 then
+    redis.call("SET", KEYS[2], value, "PX", ttl, "NX")
+elseif ttl == -1 then
+    redis.call("SET", KEYS[2], value, "NX")
+end
+redis.call("HDEL", KEYS[1], ARGV[1])
+return 1
+"""
+
+
+async def _run_batch(client: Any, sha: str, batch: list[tuple[str, str, str]]) -> int:
+    async with client.pipeline(transaction=False) as pipe:
+        for source, target, field in batch:
+            pipe.evalsha(sha, 2, source, target, field)
+        moved: list[int] = await pipe.execute()
+    return sum(moved)
+
+
+async def migrate_layout(
+    client: Any, layout: str, bucket_count: int, batch_size: int = 1000
+) -> int:
+    """Переносит телефоны и ссылки в раскладку layout; возвращает число записей.
+
+    Ключи перебираются SCAN пачками по batch_size, каждая запись переносится
+    атомарно скриптом, поэтому миграцию можно запускать на работающем боте
+    (уже переключенном на layout) и повторять после прерывания.
+    """
+    backend = BucketedRedisCacheBackend(client, bucket_count)
+    script = TO_BUCKETS_SCRIPT if layout == "buckets" else TO_KEYS_SCRIPT
+    sha = await client.script_load(script)
+    moved = 0
+    batch: list[tuple[str, str, str]] = []
+
+    async def flush() -> None:
+        nonlocal moved
+        moved += await _run_batch(client, sha, batch)
+        batch.clear()
+        logger.info(f"Перенесено записей кеша: {moved}")
+
+    for prefix in BUCKETED_PREFIXES:
+        if layout == "buckets":
+            async for key in client.scan_iter(
+                match=f"{prefix}[0-9]*", count=batch_size
+            ):
+                location = backend.locate(key)
+                if location is None:
+                    continue
+                bucket, field = location
+                batch.append((key, bucket, field))
+                if len(batch) >= batch_size:
+                    await flush()
+        else:
+            match = f"{prefix}{CACHE_BUCKET_INFIX}*"
+            async for bucket in client.scan_iter(match=match, count=batch_size):
+                # Корзины небольшие, HKEYS не блокирует Redis надолго
+                for field in await client.hkeys(bucket):
+                    batch.append((bucket, f"{prefix}{field}", field))
+                if len(batch) >= batch_size:
+                    await flush()
+    if batch:
+        await flush()
+    return moved
@@ -0,0 +1,61 @@
+import json
+from abc import ABC, abstractmethod
+
+from config import settings
+
+# Первый символ значения — версия формата; JSON-объект всегда начинается с «{»
+COMPACT_VERSION = "2"
+COMPACT_SEPARATOR = " "
+
+
+class AuthLinkSerializer(ABC):
+    """Формат записи ссылки авторизации в кеше.
+
+    ``dumps`` пишет значение в своем формате, ``loads`` у всех форматов
+    общий и читает любую известную версию: во время выкатки реплики с
+    разными настройками читают записи друг друга.
+    """
+
+    @abstractmethod
+    def dumps(self, auth_data: dict) -> str:
+        """Значение для записи в кеш"""
+
+    @staticmethod
+    def loads(raw: str) -> dict:
+        """Ссылка и время истечения из значения любой версии"""
+        if raw.startswith("{"):
+            auth_data: dict = json.loads(raw)
+            return auth_data
+        if raw[:1] != COMPACT_VERSION:
+            raise ValueError(f"Неизвестная версия записи ссылки: {raw[:1]!r}")
+        raw_expires_at, _, link = raw[1:].partition(COMPACT_SEPARATOR)
+        return {"link": link, "expires_at": int(raw_expires_at)}
+
+
+class JsonAuthLinkSerializer(AuthLinkSerializer):
+    """Версия 1: JSON-объект {"link": ..., "expires_at": ...}"""
+
+    def dumps(self, auth_data: dict) -> str:
+        return json.dumps(auth_data)
+
+
+class CompactAuthLinkSerializer(AuthLinkSerializer):
+    """Версия 2: «2», время истечения, пробел и ссылка — без ключей и кавычек.
+
+    Значение остается текстом: пул соединений общий с хранилищем FSM и
+    декодирует ответы Redis в строки.
+    """
+
+    def dumps(self, auth_data: dict) -> str:
+        return (
+            f"{COMPACT_VERSION}{int(auth_data['expires_at'])}"
+            f"{COMPACT_SEPARATOR}{auth_data['link']}"
+        )
+
+
+SERIALIZERS = {"json": JsonAuthLinkSerializer, "compact": CompactAuthLinkSerializer}
+
+
+def get_auth_link_serializer() -> AuthLinkSerializer:
+    """Сериализатор, выбранный в AUTH_LINK_CACHE_FORMAT"""
+    return SERIALIZERS[settings.AUTH_LINK_CACHE_FORMAT]()
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections.abc import AsyncIterator
+from typing import TextIO
+
+from config import settings
+from src.constants import CACHE_PHONE_PREFIX
+from src.services.api_client import api_client
+from src.services.cache_backend import (
+    PendingWrite,
+    RedisCacheBackend,
+    invalidation_message,
+)
+
+logger = logging.getLogger(__name__)
+
+# Формат файла выгрузки и загрузки: строка заголовка, затем user_id,phone
+PHONE_FILE_HEADER = "user_id,phone"
+
+# Как часто писать в лог прогресс загрузки и выгрузки, секунд
+PROGRESS_LOG_INTERVAL = 5.0
+
+# Сколько байт файла читать за одно обращение из потока
+READ_CHUNK_BYTES = 1 << 20
+
+# user_id, телефон и позиция источника, с которой продолжить после этой строки
+PhoneRow = tuple[int, str, int]
+
+# Отправитель сообщений инвалидации при загрузке: не совпадает ни с одной репликой
+WARMUP_INSTANCE_ID = "cache-warmup"
+
+
+class LoadCheckpoint:
+    """Позиция загрузки в JSON-файле: прерванная загрузка продолжается с нее.
+
+    Файл привязан к источнику и удаляется после успешного завершения. Методы
+    блокируют поток: из event loop их вызывают через asyncio.to_thread.
+    """
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.source = source
+        self.position: int | None = None
+        self.loaded = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state["source"] != source:
+                raise ValueError(
+                    f"Файл состояния {path} относится к источнику {state['source']}"
+                )
+            self.position = state["position"]
+            self.loaded = state["loaded"]
+
+    def save(self, position: int, loaded: int) -> None:
+        """Атомарно записывает позицию: файл не бывает записан наполовину"""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"source": self.source, "position": position, "loaded": loaded}, f
+            )
+        os.replace(temp_path, self.path)
+
+    def remove(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _read_lines(path: str, offset: int) -> list[bytes]:
+    """Целые строки файла от байта offset, около READ_CHUNK_BYTES байт"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.readlines(READ_CHUNK_BYTES)
+
+
+async def read_phone_file(path: str, offset: int = 0) -> AsyncIterator[PhoneRow]:
+    """Строки user_id,phone из файла, начиная с байта offset.
+
+    Файл читается в потоке кусками по READ_CHUNK_BYTES, не блокируя event loop.
+    """
+    skipped = 0
+    while True:
+        lines = await asyncio.to_thread(_read_lines, path, offset)
+        if not lines:
+            break
+        for raw in lines:
+            offset += len(raw)
+            line = raw.decode("utf-8").strip()
+            if not line or line == PHONE_FILE_HEADER:
+                continue
+            user_id, _, phone = line.partition(",")
+            if not user_id.isdigit() or not phone:
+                skipped += 1
+                continue
+            yield int(user_id), phone, offset
+    if skipped:
+        logger.warning(f"Пропущено некорректных строк в {path}: {skipped}")
+
+
+async def fetch_api_phones(
+    endpoint: str, offset: int = 0, page_size: int = 1000
+) -> AsyncIterator[PhoneRow]:
+    """Телефоны из API постранично: GET endpoint?page=N&page_size=M.
+
+    Страница — список или {"results": [...]} с объектами
+    {"telegram_user_id": ..., "phone": ...}; неполная страница последняя.
+    Позиция — число записей источника до продолжения: с прерванной страницы
+    заново загружаются только незагруженные записи.
+    """
+    page, skip = divmod(offset, page_size)
+    page += 1
+    while True:
+        response = await api_client.fetch_data(
+            endpoint, params={"page": page, "page_size": page_size}
+        )
+        items = response if isinstance(response, list) else response["results"]
+        start = (page - 1) * page_size
+        for index, item in enumerate(items[skip:], start=skip):
+            yield int(item["telegram_user_id"]), item["phone"], start + index + 1
+        if len(items) < page_size:
+            return
+        page += 1
+        skip = 0
+
+
+async def load_phones(
+    backend: RedisCacheBackend,
+    rows: AsyncIterator[PhoneRow],
+    chunk_size: int,
+    checkpoint: LoadCheckpoint | None = None,
+) -> int:
+    """Записывает телефоны в кеш пачками по chunk_size одним конвейером.
+
+    В памяти держится одна пачка, поэтому размер источника не ограничен.
+    После каждой пачки позиция сохраняется в checkpoint. При включенном L1
+    реплики получают инвалидацию загруженных ключей, как при обычной записи.
+    """
+    loaded = checkpoint.loaded if checkpoint is not None else 0
+    writes: list[tuple[str, PendingWrite]] = []
+    position = 0
+    started = last_logged = time.monotonic()
+
+    async def flush() -> None:
+        nonlocal loaded, last_logged
+        invalidations = []
+        if settings.LOCAL_CACHE_ENABLED:
+            invalidations = [
+                invalidation_message(WARMUP_INSTANCE_ID, key) for key, _ in writes
+            ]
+        await backend.write(writes, invalidations)
+        loaded += len(writes)
+        writes.clear()
+        if checkpoint is not None:
+            await asyncio.to_thread(checkpoint.save, position, loaded)
+        now = time.monotonic()
+        if now - last_logged >= PROGRESS_LOG_INTERVAL:
+            last_logged = now
+            rate = loaded / (now - started)
+            logger.info(f"Загружено телефонов: {loaded} ({rate:.0f} в секунду)")
+
+    async for user_id, phone, position in rows:
+        writes.append(
+            (f"{CACHE_PHONE_PREFIX}{user_id}", (settings.PHONE_CACHE_TTL, phone))
+        )
+        if len(writes) >= chunk_size:
+            await flush()
+    if writes:
+        await flush()
+    return loaded
+
+
+async def export_phones(
+    backend: RedisCacheBackend, output: TextIO, chunk_size: int
+) -> int:
+    """Пишет телефоны из кеша в output строками user_id,phone.
+
+    Запись в output идет в потоке, не блокируя event loop.
+    """
+    exported = 0
+    last_logged = time.monotonic()
+    await asyncio.to_thread(output.write, f"{PHONE_FILE_HEADER}\n")
+    async for chunk in backend.scan_user_values(CACHE_PHONE_PREFIX, chunk_size):
+        lines = [f"{user_id},{phone}\n" for user_id, phone in chunk]
+        await asyncio.to_thread(output.writelines, lines)
+        exported += len(chunk)
+        now = time.monotonic()
+        if now - last_logged >= PROGRESS_LOG_INTERVAL:
+            last_logged = now
+            logger.info(f"Выгружено телефонов: {exported}")
+    return exported
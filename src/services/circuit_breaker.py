@@ -0,0 +1,131 @@
+import logging
+import time
+from collections import deque
+
+from src.exceptions import CircuitOpenError
+from src.services.cache import cache_service
+
+logger = logging.getLogger(__name__)
+
+# Как часто реплика перечитывает общее состояние из Redis, секунд
+STATE_REFRESH_INTERVAL = 1.0
+
+
+class CircuitBreaker:
+    """Размыкатель цепи для одного endpoint внешнего API.
+
+    Закрыт — запросы идут как обычно. После ``failure_threshold`` ошибок за
+    ``failure_window`` секунд цепь размыкается: ``before_call`` сразу
+    поднимает CircuitOpenError, запросы не отправляются. Через
+    ``reset_timeout`` цепь становится полуоткрытой и пропускает один пробный
+    запрос: успех замыкает ее, ошибка снова размыкает.
+
+    При ``shared=True`` счетчик ошибок и состояние хранятся в Redis и общие
+    для всех реплик; если Redis недоступен, размыкатель работает локально.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        failure_window: float,
+        reset_timeout: float,
+        shared: bool = False,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.reset_timeout = reset_timeout
+        self.shared = shared
+        self._failures: deque[float] = deque()
+        self._open_until = 0.0
+        self._half_open = False
+        self._probe_until = 0.0
+        self._state_checked_at = float("-inf")
+
+    async def is_open(self) -> bool:
+        """Разомкнута ли цепь: запрос сейчас заведомо не будет отправлен"""
+        await self._refresh()
+        return time.monotonic() < self._open_until
+
+    async def before_call(self, probe_ttl: float) -> bool:
+        """Пропускает запрос или поднимает CircuitOpenError.
+
+        Возвращает True, если запрос пробный; ``probe_ttl`` — сколько секунд
+        другие запросы ждут его результата.
+        """
+        await self._refresh()
+        now = time.monotonic()
+        if now < self._open_until:
+            raise CircuitOpenError(f"Цепь {self.name} разомкнута")
+        if not self._half_open:
+            return False
+
+        acquired = None
+        if self.shared:
+            acquired = await cache_service.acquire_circuit_probe(
+                self.name, int(probe_ttl * 1000)
+            )
+        if acquired is None:
+            acquired = now >= self._probe_until
+            if acquired:
+                self._probe_until = now + probe_ttl
+        if not acquired:
+            raise CircuitOpenError(f"Цепь {self.name} ждет пробного запроса")
+        return True
+
+    async def record_success(self, probe: bool) -> None:
+        """Учитывает успешный запрос"""
+        self._failures.clear()
+        if not probe and not self._half_open:
+            return
+        self._half_open = False
+        self._probe_until = 0.0
+        if self.shared:
+            await cache_service.reset_circuit(self.name)
+        logger.info(f"Цепь {self.name} замкнута")
+
+    async def record_failure(self, probe: bool) -> None:
+        """Учитывает ошибку и при необходимости размыкает цепь"""
+        opened = None
+        if self.shared:
+            opened = await cache_service.record_circuit_failure(
+                self.name,
+                self.failure_threshold,
+                int(self.failure_window * 1000),
+                int(self.reset_timeout * 1000),
+            )
+        if opened is None:
+            opened = self._record_local_failure(probe)
+        if opened:
+            self._open()
+
+    def _record_local_failure(self, probe: bool) -> bool:
+        now = time.monotonic()
+        self._failures.append(now)
+        while self._failures and self._failures[0] <= now - self.failure_window:
+            self._failures.popleft()
+        return probe or self._half_open or len(self._failures) >= self.failure_threshold
+
+    def _open(self) -> None:
+        self._open_until = time.monotonic() + self.reset_timeout
+        self._half_open = True
+        self._probe_until = 0.0
+        self._failures.clear()
+        logger.warning(
+            f"Цепь {self.name} разомкнута на {self.reset_timeout} с: запросы не отправляются"
+        )
+
+    async def _refresh(self) -> None:
+        """Подтягивает общее состояние из Redis не чаще STATE_REFRESH_INTERVAL"""
+        now = time.monotonic()
+        if not self.shared or now < self._open_until:
+            return
+        if now - self._state_checked_at < STATE_REFRESH_INTERVAL:
+            return
+        state = await cache_service.get_circuit_state(self.name)
+        if state is None:
+            return
+        self._state_checked_at = now
+        open_ttl_ms, self._half_open = state
+        self._open_until = now + open_ttl_ms / 1000
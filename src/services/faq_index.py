@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import json
+import zlib
+from typing import NamedTuple
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from src.constants import (
+    BUTTON_FAQ_BACK,
+    BUTTON_FAQ_HOME,
+    CALLBACK_FAQ_BACK,
+    CALLBACK_FAQ_HOME,
+    CALLBACK_FAQ_QUESTION,
+    CALLBACK_FAQ_THEME,
+    TELEGRAM_MESSAGE_MAX_LENGTH,
+)
+from src.services.faq_search import FAQSearchIndex, FAQSearchResult
+from src.types import FAQQuestion, FAQTheme
+
+
+class FAQView(NamedTuple):
+    """Готовый к отправке экран FAQ: текст и клавиатура"""
+
+    text: str
+    reply_markup: InlineKeyboardMarkup
+
+
+def theme_version(theme: FAQTheme) -> str:
+    """Короткий хеш содержимого темы: ее идентификатор в callback_data.
+
+    Кнопка указывает на тему по содержимому, а не по позиции, поэтому
+    вставка или удаление другой темы не делает ее устаревшей.
+    """
+    payload = json.dumps(theme, ensure_ascii=False, sort_keys=True).encode()
+    return format(zlib.crc32(payload), "x")
+
+
+def format_question_answer(question_data: FAQQuestion) -> str:
+    """Форматирует вопрос и ответ для отображения"""
+    return f"❓ <b>{question_data['question']}</b>\n\n💬 {question_data['answer']}"
+
+
+def format_theme_title(theme: FAQTheme) -> str:
+    """Форматирует заголовок темы"""
+    return f"📚 <b>{theme['theme']}</b>\n\nВыберите интересующий вас вопрос:"
+
+
+SEARCH_RESULTS_SEPARATOR = "\n\n"
+
+
+def _message_length(text: str) -> int:
+    """Длина текста так, как ее считает Telegram: в единицах UTF-16"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _fit_message(text: str) -> str:
+    """Обрезает текст до длины сообщения Telegram"""
+    if _message_length(text) <= TELEGRAM_MESSAGE_MAX_LENGTH:
+        return text
+    # Половинка суррогатной пары на границе отбрасывается при декодировании
+    head = text.encode("utf-16-le")[: (TELEGRAM_MESSAGE_MAX_LENGTH - 1) * 2]
+    return head.decode("utf-16-le", errors="ignore") + "…"
+
+
+def format_search_results(results: list[FAQSearchResult]) -> list[str]:
+    """Форматирует найденные вопросы сообщениями не длиннее лимита Telegram.
+
+    Ответы собираются в одно сообщение, пока оно помещается в лимит, иначе
+    переносятся в следующее; слишком длинный ответ обрезается.
+    """
+    messages: list[str] = []
+    for result in results:
+        block = _fit_message(format_question_answer(result.question))
+        if messages and (
+            _message_length(messages[-1])
+            + _message_length(SEARCH_RESULTS_SEPARATOR + block)
+            <= TELEGRAM_MESSAGE_MAX_LENGTH
+        ):
+            messages[-1] += SEARCH_RESULTS_SEPARATOR + block
+        else:
+            messages.append(block)
+    return messages
+
+
+def build_themes_keyboard(
+    themes: list[FAQTheme], versions: list[str]
+) -> InlineKeyboardMarkup:
+    """Создает клавиатуру со списком тем"""
+    builder = InlineKeyboardBuilder()
+
+    for theme, version in zip(themes, versions):
+        builder.add(
+            InlineKeyboardButton(
+                text=theme["theme"],
+                callback_data=f"{CALLBACK_FAQ_THEME}:{version}",
+            )
+        )
+
+    builder.adjust(1)  # По одной кнопке в строке
+    return builder.as_markup()
+
+
+def build_questions_keyboard(theme: FAQTheme, version: str) -> InlineKeyboardMarkup:
+    """Создает клавиатуру со списком вопросов темы"""
+    builder = InlineKeyboardBuilder()
+
+    for i, question in enumerate(theme["questions"]):
+        builder.add(
+            InlineKeyboardButton(
+                text=question["question"],
+                callback_data=f"{CALLBACK_FAQ_QUESTION}:{version}:{i}",
+            )
+        )
+
+    # Добавляем кнопки навигации
+    builder.add(
+        InlineKeyboardButton(text=BUTTON_FAQ_BACK, callback_data=CALLBACK_FAQ_BACK)
+    )
+    builder.add(
+        InlineKeyboardButton(text=BUTTON_FAQ_HOME, callback_data=CALLBACK_FAQ_HOME)
+    )
+
+    builder.adjust(1)  # По одной кнопке в строке
+    return builder.as_markup()
+
+
+def build_navigation_keyboard(version: str) -> InlineKeyboardMarkup:
+    """Создает клавиатуру навигации для ответа на вопрос"""
+    builder = InlineKeyboardBuilder()
+
+    # Кнопка "Назад к вопросам"
+    builder.add(
+        InlineKeyboardButton(
+            text="⬅️ К вопросам",
+            callback_data=f"{CALLBACK_FAQ_THEME}:{version}",
+        )
+    )
+
+    # Кнопка "Назад к темам"
+    builder.add(
+        InlineKeyboardButton(text=BUTTON_FAQ_BACK, callback_data=CALLBACK_FAQ_BACK)
+    )
+
+    # Кнопка "Главное меню"
+    builder.add(
+        InlineKeyboardButton(text=BUTTON_FAQ_HOME, callback_data=CALLBACK_FAQ_HOME)
+    )
+
+    builder.adjust(1)  # По одной кнопке в строке
+    return builder.as_markup()
+
+
+class FAQIndex:
+    """Заранее отрендеренные тексты и клавиатуры FAQ.
+
+    Строится один раз для набора тем; объекты внутри общие для всех
+    обработчиков и не должны изменяться. При перестроении из предыдущего
+    индекса рендерятся заново только изменившиеся темы: экраны не зависят от
+    позиции темы, поэтому вставка темы не перестраивает следующие за ней.
+    """
+
+    def __init__(self, themes: list[FAQTheme], previous: FAQIndex | None = None):
+        self.themes: tuple[FAQTheme, ...] = tuple(themes)
+        self.versions: tuple[str, ...] = tuple(theme_version(t) for t in themes)
+        self.themes_markup = build_themes_keyboard(themes, list(self.versions))
+
+        # Позиция темы по версии; одинаковые темы неотличимы, берем первую
+        self._positions: dict[str, int] = {}
+        for i, version in enumerate(self.versions):
+            self._positions.setdefault(version, i)
+
+        # Версия — хеш содержимого — однозначно определяет экраны темы
+        reusable: dict[str, tuple[FAQView, tuple[FAQView, ...]]] = {}
+        if previous is not None:
+            for i, version in enumerate(previous.versions):
+                reusable[version] = (
+                    previous._theme_views[i],
+                    previous._question_views[i],
+                )
+
+        theme_views = []
+        question_views = []
+        self.rebuilt_themes = 0
+        for theme, version in zip(themes, self.versions):
+            views = reusable.get(version)
+            if views is None:
+                views = reusable[version] = self._build_theme_views(theme, version)
+                self.rebuilt_themes += 1
+            theme_views.append(views[0])
+            question_views.append(views[1])
+        self._theme_views: tuple[FAQView, ...] = tuple(theme_views)
+        self._question_views: tuple[tuple[FAQView, ...], ...] = tuple(question_views)
+        self.search_index = FAQSearchIndex(themes)
+
+    @staticmethod
+    def _build_theme_views(
+        theme: FAQTheme, version: str
+    ) -> tuple[FAQView, tuple[FAQView, ...]]:
+        theme_view = FAQView(
+            format_theme_title(theme), build_questions_keyboard(theme, version)
+        )
+        # Клавиатура навигации одинакова для всех вопросов темы
+        navigation = build_navigation_keyboard(version)
+        question_views = tuple(
+            FAQView(format_question_answer(question), navigation)
+            for question in theme["questions"]
+        )
+        return theme_view, question_views
+
+    def find_theme(self, version: str) -> int | None:
+        """Позиция темы с такой версией или None, если кнопка устарела"""
+        return self._positions.get(version)
+
+    def get_theme(self, theme_index: int) -> FAQTheme | None:
+        """Получает тему по индексу"""
+        if 0 <= theme_index < len(self.themes):
+            return self.themes[theme_index]
+        return None
+
+    def get_question(self, theme_index: int, question_index: int) -> FAQQuestion | None:
+        """Получает вопрос по индексам темы и вопроса"""
+        theme = self.get_theme(theme_index)
+        if theme and 0 <= question_index < len(theme["questions"]):
+            return theme["questions"][question_index]
+        return None
+
+    def theme_view(self, theme_index: int) -> FAQView | None:
+        """Экран со списком вопросов темы"""
+        if 0 <= theme_index < len(self._theme_views):
+            return self._theme_views[theme_index]
+        return None
+
+    def question_view(self, theme_index: int, question_index: int) -> FAQView | None:
+        """Экран с ответом на вопрос"""
+        if 0 <= theme_index < len(self._question_views):
+            views = self._question_views[theme_index]
+            if 0 <= question_index < len(views):
+                return views[question_index]
+        return None
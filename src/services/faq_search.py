@@ -0,0 +1,132 @@
+import bisect
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from itertools import islice
+from operator import itemgetter
+from typing import NamedTuple
+
+from src.types import FAQQuestion, FAQTheme
+from src.utils.russian_stemmer import stem
+
+TOKEN_RE = re.compile(r"[0-9a-zа-я]+")
+
+STOP_WORDS = frozenset(
+    """
+    а без более бы был была были было быть в вам вас весь во вот все всего всех вы
+    где да даже для до его ее ей если есть еще же за здесь и из или им их к как
+    какой когда кто ли либо мне мой мы на над нам нас не нее нет ни них но ну о об
+    он она они оно от по под при про с со так такой также там те тем то того тоже
+    только том ты у уже чем что чтобы эта эти это этот я
+    """.split()  # noqa: SIM905 — список слов читается проще одной строкой
+)
+
+# Совпадение в тексте вопроса весит больше, чем в ответе
+QUESTION_WEIGHT = 2.0
+ANSWER_WEIGHT = 1.0
+
+# Параметры ранжирования BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Сколько основ может подставиться вместо недописанного последнего слова
+MAX_PREFIX_EXPANSIONS = 10
+
+# Списки документов отсортированы по вкладу термина; для частых терминов
+# просматриваются только самые весомые документы
+MAX_POSTINGS_PER_TERM = 256
+
+
+def tokenize(text: str) -> list[str]:
+    """Слова текста в нижнем регистре без стоп-слов, приведенные к основе"""
+    words = TOKEN_RE.findall(text.lower().replace("ё", "е"))
+    return [stem(word) for word in words if word not in STOP_WORDS]
+
+
+class FAQSearchResult(NamedTuple):
+    """Найденный вопрос FAQ и его позиция"""
+
+    theme_index: int
+    question_index: int
+    question: FAQQuestion
+
+
+class FAQSearchIndex:
+    """Инвертированный индекс по вопросам и ответам FAQ с ранжированием BM25"""
+
+    def __init__(self, themes: list[FAQTheme]):
+        self._entries: list[FAQSearchResult] = []
+        term_weights: list[defaultdict[str, float]] = []
+        for theme_index, theme in enumerate(themes):
+            for question_index, question in enumerate(theme["questions"]):
+                self._entries.append(
+                    FAQSearchResult(theme_index, question_index, question)
+                )
+                weights: defaultdict[str, float] = defaultdict(float)
+                for term in tokenize(question["question"]):
+                    weights[term] += QUESTION_WEIGHT
+                for term in tokenize(question["answer"]):
+                    weights[term] += ANSWER_WEIGHT
+                term_weights.append(weights)
+
+        doc_count = len(term_weights)
+        lengths = [sum(weights.values()) for weights in term_weights]
+        avg_length = sum(lengths) / doc_count if doc_count else 0.0
+
+        document_frequency: Counter = Counter()
+        for weights in term_weights:
+            document_frequency.update(weights.keys())
+
+        # Вклад термина в оценку документа считается заранее: запрос — только сумма
+        postings: dict[str, list[tuple[int, float]]] = defaultdict(list)
+        for doc_id, weights in enumerate(term_weights):
+            # Документы из одних стоп-слов дают avg_length == 0; у них и нет
+            # терминов, так что нормировка по длине им не нужна
+            relative_length = lengths[doc_id] / avg_length if avg_length else 0.0
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * relative_length)
+            for term, tf in weights.items():
+                df = document_frequency[term]
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                postings[term].append((doc_id, idf * tf * (BM25_K1 + 1) / (tf + norm)))
+
+        self._postings: dict[str, tuple[tuple[int, float], ...]] = {
+            term: tuple(sorted(docs, key=itemgetter(1), reverse=True))
+            for term, docs in postings.items()
+        }
+        self._vocabulary = sorted(self._postings)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expand_prefix(self, prefix: str) -> list[str]:
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        terms = []
+        for term in self._vocabulary[start : start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(
+        self, query: str, limit: int, prefix: bool = False
+    ) -> list[FAQSearchResult]:
+        """Лучшие совпадения для запроса.
+
+        С prefix=True последнее слово считается недописанным (для inline-режима).
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores: dict[int, float] = defaultdict(float)
+        last_terms = [terms.pop()]
+        if prefix:
+            last_terms = self._expand_prefix(last_terms[0]) or last_terms
+        for term in terms + last_terms:
+            docs = self._postings.get(term, ())
+            for doc_id, weight in islice(docs, MAX_POSTINGS_PER_TERM):
+                scores[doc_id] += weight
+
+        best = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        return [self._entries[doc_id] for doc_id, _ in best]
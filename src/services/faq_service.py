@@ -1,118 +1,83 @@
-from typing import List, Optional
+from __future__ import annotations
 
-from aiogram.types import InlineKeyboardButton
-from aiogram.utils.keyboard import InlineKeyboardBuilder
+from aiogram.types import InlineKeyboardMarkup
 
-from src.constants import (
-    BUTTON_FAQ_BACK,
-    BUTTON_FAQ_HOME,
-    CALLBACK_FAQ_BACK,
-    CALLBACK_FAQ_HOME,
-    CALLBACK_FAQ_QUESTION,
-    CALLBACK_FAQ_THEME,
-)
-from src.types import FAQ_DATA, FAQTheme
+from config import settings
+from src.services.faq_index import FAQIndex, FAQView, format_search_results
+from src.services.faq_search import FAQSearchResult
+from src.types import FAQ_DATA, FAQQuestion, FAQTheme
+
+# Индекс строится один раз при импорте и заменяется целиком при перезагрузке
+_index = FAQIndex(FAQ_DATA)
 
 
 class FAQService:
     """Сервис для работы с FAQ"""
 
     @staticmethod
-    def get_themes() -> List[FAQTheme]:
+    def reload(themes: list[FAQTheme]) -> int:
+        """Перестраивает индекс FAQ для новых данных.
+
+        Возвращает количество заново отрендеренных тем.
+        """
+        global _index
+        new_index = FAQIndex(themes, previous=_index)
+        # Одно присваивание: обработчики видят либо старый, либо новый индекс
+        _index = new_index
+        return new_index.rebuilt_themes
+
+    @staticmethod
+    def get_versions() -> tuple[str, ...]:
+        """Версии тем текущего индекса"""
+        return _index.versions
+
+    @staticmethod
+    def find_theme(version: str) -> int | None:
+        """Позиция темы, на версию которой ссылается кнопка; None — устарела"""
+        return _index.find_theme(version)
+
+    @staticmethod
+    def get_themes() -> list[FAQTheme]:
         """Получает список всех тем FAQ"""
-        return FAQ_DATA
+        return list(_index.themes)
 
     @staticmethod
-    def get_theme_by_index(theme_index: int) -> Optional[FAQTheme]:
+    def get_theme_by_index(theme_index: int) -> FAQTheme | None:
         """Получает тему по индексу"""
-        if 0 <= theme_index < len(FAQ_DATA):
-            return FAQ_DATA[theme_index]
-        return None
+        return _index.get_theme(theme_index)
 
     @staticmethod
     def get_question_by_indices(
         theme_index: int, question_index: int
-    ) -> Optional[dict]:
+    ) -> FAQQuestion | None:
         """Получает вопрос по индексам темы и вопроса"""
-        theme = FAQService.get_theme_by_index(theme_index)
-        if theme and 0 <= question_index < len(theme["questions"]):
-            return theme["questions"][question_index]
-        return None
+        return _index.get_question(theme_index, question_index)
 
     @staticmethod
-    def create_themes_keyboard() -> InlineKeyboardBuilder:
-        """Создает клавиатуру со списком тем"""
-        builder = InlineKeyboardBuilder()
-
-        for i, theme in enumerate(FAQ_DATA):
-            builder.add(
-                InlineKeyboardButton(
-                    text=theme["theme"], callback_data=f"{CALLBACK_FAQ_THEME}:{i}"
-                )
-            )
-
-        builder.adjust(1)  # По одной кнопке в строке
-        return builder
+    def get_themes_markup() -> InlineKeyboardMarkup:
+        """Клавиатура со списком тем"""
+        return _index.themes_markup
 
     @staticmethod
-    def create_questions_keyboard(theme_index: int) -> InlineKeyboardBuilder:
-        """Создает клавиатуру со списком вопросов темы"""
-        builder = InlineKeyboardBuilder()
-
-        theme = FAQService.get_theme_by_index(theme_index)
-        if not theme:
-            return builder
-
-        for i, question in enumerate(theme["questions"]):
-            builder.add(
-                InlineKeyboardButton(
-                    text=question["question"],
-                    callback_data=f"{CALLBACK_FAQ_QUESTION}:{theme_index}:{i}",
-                )
-            )
-
-        # Добавляем кнопки навигации
-        builder.add(
-            InlineKeyboardButton(text=BUTTON_FAQ_BACK, callback_data=CALLBACK_FAQ_BACK)
-        )
-        builder.add(
-            InlineKeyboardButton(text=BUTTON_FAQ_HOME, callback_data=CALLBACK_FAQ_HOME)
-        )
-
-        builder.adjust(1)  # По одной кнопке в строке
-        return builder
+    def get_theme_view(theme_index: int) -> FAQView | None:
+        """Текст и клавиатура со списком вопросов темы"""
+        return _index.theme_view(theme_index)
 
     @staticmethod
-    def create_navigation_keyboard(theme_index: int) -> InlineKeyboardBuilder:
-        """Создает клавиатуру навигации для ответа на вопрос"""
-        builder = InlineKeyboardBuilder()
-
-        # Кнопка "Назад к вопросам"
-        builder.add(
-            InlineKeyboardButton(
-                text="⬅️ К вопросам", callback_data=f"{CALLBACK_FAQ_THEME}:{theme_index}"
-            )
-        )
-
-        # Кнопка "Назад к темам"
-        builder.add(
-            InlineKeyboardButton(text=BUTTON_FAQ_BACK, callback_data=CALLBACK_FAQ_BACK)
-        )
-
-        # Кнопка "Главное меню"
-        builder.add(
-            InlineKeyboardButton(text=BUTTON_FAQ_HOME, callback_data=CALLBACK_FAQ_HOME)
-        )
-
-        builder.adjust(1)  # По одной кнопке в строке
-        return builder
+    def get_question_view(theme_index: int, question_index: int) -> FAQView | None:
+        """Текст ответа и клавиатура навигации"""
+        return _index.question_view(theme_index, question_index)
 
     @staticmethod
-    def format_question_answer(question_data: dict) -> str:
-        """Форматирует вопрос и ответ для отображения"""
-        return f"❓ <b>{question_data['question']}</b>\n\n💬 {question_data['answer']}"
+    def search(
+        query: str, limit: int | None = None, prefix: bool = False
+    ) -> list[FAQSearchResult]:
+        """Полнотекстовый поиск по вопросам и ответам"""
+        if limit is None:
+            limit = settings.FAQ_SEARCH_LIMIT
+        return _index.search_index.search(query, limit, prefix=prefix)
 
     @staticmethod
-    def format_theme_title(theme: FAQTheme) -> str:
-        """Форматирует заголовок темы"""
-        return f"📚 <b>{theme['theme']}</b>\n\nВыберите интересующий вас вопрос:"
+    def format_search_results(results: list[FAQSearchResult]) -> list[str]:
+        """Тексты сообщений с найденными ответами"""
+        return format_search_results(results)
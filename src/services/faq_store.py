@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+
+from pydantic import TypeAdapter, ValidationError
+
+from config import settings
+from src.exceptions import FAQError
+from src.services.cache import cache_service
+from src.services.cache_backend import BACKEND_ERRORS
+from src.services.faq_index import theme_version
+from src.services.faq_service import FAQService
+from src.types import FAQTheme
+
+logger = logging.getLogger(__name__)
+
+_themes_adapter = TypeAdapter(list[FAQTheme])
+_theme_adapter = TypeAdapter(FAQTheme)
+
+
+def parse_faq(data: object) -> list[FAQTheme]:
+    """Проверяет данные FAQ на соответствие типам FAQTheme и FAQQuestion"""
+    try:
+        return _themes_adapter.validate_python(data)
+    except ValidationError as e:
+        raise FAQError(f"Некорректные данные FAQ: {e}") from e
+
+
+def load_faq_file(path: str) -> list[FAQTheme]:
+    """Загружает FAQ из JSON-файла со списком тем"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return parse_faq(json.load(f))
+    except (OSError, json.JSONDecodeError) as e:
+        raise FAQError(f"Не удалось прочитать FAQ из {path}: {e}") from e
+
+
+def parse_faq_hash(fields: dict[str, str]) -> list[FAQTheme]:
+    """Собирает FAQ из хеша Redis: поле — порядковый номер темы, значение — JSON темы"""
+    try:
+        ordered = sorted(fields.items(), key=lambda item: int(item[0]))
+        return [_theme_adapter.validate_json(value) for _, value in ordered]
+    except (ValueError, ValidationError) as e:
+        raise FAQError(f"Некорректные данные FAQ в Redis: {e}") from e
+
+
+class FAQStore:
+    """Подгружает FAQ из внешнего источника и обновляет индекс без перезапуска"""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self._file_stamp: tuple[int, int] | None = None
+
+    async def start(self) -> None:
+        """Загружает FAQ и запускает периодическую проверку изменений"""
+        if settings.FAQ_SOURCE == "builtin":
+            return
+        try:
+            await self.reload()
+        except (FAQError, *BACKEND_ERRORS) as e:
+            logger.error(f"Ошибка при загрузке FAQ, используется встроенный: {e}")
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch())
+
+    async def reload(self) -> bool:
+        """Перечитывает источник; возвращает True, если FAQ изменился"""
+        themes = await self._load()
+        if themes is None:
+            return False
+
+        versions = tuple(theme_version(theme) for theme in themes)
+        if versions == FAQService.get_versions():
+            return False
+
+        rebuilt = FAQService.reload(themes)
+        logger.info(
+            f"FAQ обновлен из источника {settings.FAQ_SOURCE}: "
+            f"тем {len(themes)}, перестроено {rebuilt}"
+        )
+        return True
+
+    async def _load(self) -> list[FAQTheme] | None:
+        if settings.FAQ_SOURCE == "file":
+            path = settings.FAQ_FILE_PATH
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                raise FAQError(f"Не удалось прочитать FAQ из {path}: {e}") from e
+            # Файл не менялся — не читаем и не разбираем его заново
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if stamp == self._file_stamp:
+                return None
+            themes = await asyncio.to_thread(load_faq_file, path)
+            self._file_stamp = stamp
+            return themes
+
+        fields = await cache_service.redis_client.hgetall(settings.FAQ_REDIS_KEY)
+        if not fields:
+            raise FAQError(f"Хеш FAQ {settings.FAQ_REDIS_KEY} пуст или отсутствует")
+        return parse_faq_hash(fields)
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(settings.FAQ_RELOAD_INTERVAL)
+            try:
+                await self.reload()
+            except (FAQError, *BACKEND_ERRORS) as e:
+                logger.error(f"Ошибка при обновлении FAQ, оставляем текущий: {e}")
+
+    async def close(self) -> None:
+        """Останавливает проверку изменений"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+faq_store = FAQStore()
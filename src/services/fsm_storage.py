@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable
+from typing import Any, Callable, TypeVar
+
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from src.services.cache import CacheService
+from src.services.cache_backend import BACKEND_ERRORS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class FallbackStorage(BaseStorage):
+    """Хранилище FSM в Redis, которое переключается в память вместе с кешем.
+
+    FSMContextMiddleware читает состояние на каждое обновление, поэтому без
+    переключения сбой Redis останавливал бы всю обработку, хотя кеш уже
+    работает из памяти. Пока ``cache.redis_available``, состояния читаются
+    и пишутся в ``redis_storage``; ошибка соединения переключает кеш, и
+    следующие обращения идут в память процесса. Состояния, записанные до
+    сбоя, на это время не видны. Записанные без Redis состояния переносятся
+    в него при первом обращении после восстановления.
+    """
+
+    def __init__(self, redis_storage: BaseStorage, cache: CacheService):
+        self.redis_storage = redis_storage
+        self.memory_storage = MemoryStorage()
+        self.cache = cache
+        # Ключи, измененные без Redis
+        self._dirty: set[StorageKey] = set()
+        self._restore_lock: asyncio.Lock | None = None
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._call(
+            "fsm_set_state",
+            lambda storage: storage.set_state(key, state),
+            key,
+        )
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return await self._call("fsm_get_state", lambda storage: storage.get_state(key))
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        await self._call(
+            "fsm_set_data", lambda storage: storage.set_data(key, data), key
+        )
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return await self._call("fsm_get_data", lambda storage: storage.get_data(key))
+
+    async def close(self) -> None:
+        await self.redis_storage.close()
+        await self.memory_storage.close()
+
+    async def _call(
+        self,
+        operation: str,
+        call: Callable[[BaseStorage], Awaitable[T]],
+        written: StorageKey | None = None,
+    ) -> T:
+        """Выполняет обращение в Redis или, пока он недоступен, в памяти"""
+        if self.cache.redis_available and self._dirty:
+            await self._restore()
+        if self.cache.redis_available:
+            try:
+                return await call(self.redis_storage)
+            except Exception as e:
+                self.cache.handle_redis_error(operation, e)
+                # Не ошибка соединения или переключение выключено
+                if self.cache.redis_available:
+                    raise
+        if written is not None:
+            self._dirty.add(written)
+        return await call(self.memory_storage)
+
+    async def _restore(self) -> None:
+        """Переносит в Redis состояния, записанные без него"""
+        if self._restore_lock is None:
+            self._restore_lock = asyncio.Lock()
+        async with self._restore_lock:
+            while self._dirty and self.cache.redis_available:
+                key = self._dirty.pop()
+                state = await self.memory_storage.get_state(key)
+                data = await self.memory_storage.get_data(key)
+                try:
+                    await self.redis_storage.set_state(key, state)
+                    await self.redis_storage.set_data(key, data)
+                except BACKEND_ERRORS as e:
+                    self._dirty.add(key)
+                    self.cache.handle_redis_error("fsm_restore", e)
+                    logger.error(f"Ошибка при переносе состояния FSM в Redis: {e}")
+                    return
+            if not self._dirty:
+                self.memory_storage.storage.clear()
@@ -1,26 +1,43 @@
-from typing import Optional
+from __future__ import annotations
+
+import asyncio
 
 from aiogram import types
+from aiogram.exceptions import TelegramAPIError
+
 from config import settings
+from src.exceptions import SendDroppedError
+from src.services.send_scheduler import SendPriority, send_priority
+from src.services.task_manager import task_manager
 
 
 class MessageService:
     """Сервис для работы с сообщениями и уведомлениями"""
 
     @staticmethod
-    async def send_loading_sticker(message: types.Message) -> Optional[types.Message]:
+    async def send_loading_sticker(message: types.Message) -> types.Message | None:
         """Отправляет стикер загрузки"""
         try:
-            return await message.answer_sticker(settings.LOADING_STICKER_ID)
-        except Exception:
+            with send_priority(SendPriority.LOW):
+                return await message.answer_sticker(settings.LOADING_STICKER_ID)
+        except (TelegramAPIError, SendDroppedError):
             return None
 
     @staticmethod
-    async def send_loading_message(message: types.Message) -> Optional[types.Message]:
+    async def send_loading_message(
+        message: types.Message,
+        reply_markup: types.ReplyKeyboardRemove | None = None,
+    ) -> types.Message | None:
         """Отправляет сообщение о загрузке"""
         try:
-            return await message.answer(settings.LOADING_MESSAGE)
-        except Exception:
+            if reply_markup is not None:
+                # Сообщение убирает клавиатуру, поэтому не может быть отброшено
+                return await message.answer(
+                    settings.LOADING_MESSAGE, reply_markup=reply_markup
+                )
+            with send_priority(SendPriority.LOW):
+                return await message.answer(settings.LOADING_MESSAGE)
+        except (TelegramAPIError, SendDroppedError):
             return None
 
     @staticmethod
@@ -29,11 +46,62 @@ class MessageService:
         await message.answer(settings.API_ERROR_MESSAGE)
 
     @staticmethod
-    async def cleanup_messages(*messages: Optional[types.Message]) -> None:
-        """Удаляет сообщения"""
+    def cleanup_messages(*messages: types.Message | None) -> None:
+        """Удаляет сообщения в фоне, не задерживая ответ пользователю"""
         for msg in messages:
             if msg:
-                try:
-                    await msg.delete()
-                except Exception:
-                    pass
+                task_manager.spawn(MessageService._delete(msg), "delete_message")
+
+    @staticmethod
+    async def _delete(message: types.Message) -> None:
+        with send_priority(SendPriority.LOW):
+            await message.delete()
+
+    @staticmethod
+    def start_loading(
+        message: types.Message,
+        reply_markup: types.ReplyKeyboardRemove | None = None,
+    ) -> asyncio.Task[list[types.Message]]:
+        """Показывает индикатор загрузки в фоне, пока идет запрос к API"""
+        return asyncio.create_task(MessageService._send_loading(message, reply_markup))
+
+    @staticmethod
+    async def _send_loading(
+        message: types.Message, reply_markup: types.ReplyKeyboardRemove | None
+    ) -> list[types.Message]:
+        shown: list[types.Message | None] = []
+        if settings.AUTH_LOADING_MODE == "sticker":
+            shown.append(await MessageService.send_loading_sticker(message))
+        shown.append(await MessageService.send_loading_message(message, reply_markup))
+        return [msg for msg in shown if msg]
+
+    @staticmethod
+    async def finish_loading(
+        message: types.Message,
+        loading: asyncio.Task[list[types.Message]],
+        text: str,
+        reply_markup: types.InlineKeyboardMarkup | None = None,
+        editable: bool = True,
+    ) -> None:
+        """Заменяет индикатор загрузки итоговым сообщением.
+
+        В режиме placeholder сообщение загрузки редактируется на месте, в
+        режиме sticker индикатор удаляется в фоне после отправки ответа.
+        editable=False — сообщение загрузки убирало клавиатуру
+        (ReplyKeyboardRemove), такое Telegram может не дать отредактировать:
+        ответ отправляется заново, а индикатор удаляется.
+        """
+        shown = await loading
+        if settings.AUTH_LOADING_MODE == "placeholder" and shown and editable:
+            try:
+                await shown[-1].edit_text(text, reply_markup=reply_markup)
+                return
+            except TelegramAPIError:
+                # Отредактировать не удалось — удаляем индикатор, если он
+                # еще есть, и отправляем ответ заново
+                MessageService.cleanup_messages(*shown)
+            await message.answer(text, reply_markup=reply_markup)
+            return
+
+        await message.answer(text, reply_markup=reply_markup)
+        MessageService.cleanup_messages(*shown)
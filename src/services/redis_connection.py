@@ -0,0 +1,59 @@
+import logging
+
+import redis.asyncio as redis
+from aiogram.fsm.storage.redis import RedisStorage
+
+from config import settings
+from src.services.cache_backend import BACKEND_ERRORS
+
+logger = logging.getLogger(__name__)
+
+
+class RedisConnection:
+    """Общий пул соединений с Redis для хранилища FSM и кеша.
+
+    Пул блокирующий: если все REDIS_POOL_MAX_CONNECTIONS соединений заняты,
+    команда ждет свободное не дольше REDIS_POOL_TIMEOUT, а не открывает
+    новые сокеты. Адрес берется из REDIS_URL, в том числе
+    ``unix:///path/redis.sock?db=0`` для unix-сокета.
+    """
+
+    def __init__(self, url: str):
+        self.pool = redis.BlockingConnectionPool.from_url(
+            url,
+            max_connections=settings.REDIS_POOL_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+            socket_keepalive=True,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+            protocol=settings.REDIS_PROTOCOL,
+            decode_responses=True,
+        )
+        self.client = redis.Redis(connection_pool=self.pool)
+
+    async def start(self) -> None:
+        """Проверяет соединение; бот запускается и при недоступном Redis"""
+        try:
+            await self.client.ping()
+        except BACKEND_ERRORS as e:
+            logger.error(f"Redis недоступен при запуске: {e}")
+
+    async def close(self) -> None:
+        """Закрывает все соединения пула"""
+        try:
+            await self.client.aclose(close_connection_pool=True)
+            logger.info("Соединение с Redis закрыто")
+        except BACKEND_ERRORS as e:
+            logger.error(f"Ошибка при закрытии соединения с Redis: {e}")
+
+
+class SharedRedisStorage(RedisStorage):
+    """Хранилище FSM на общем пуле: пул закрывает RedisConnection"""
+
+    async def close(self) -> None:
+        pass
+
+
+# Создаем глобальный пул соединений
+redis_connection = RedisConnection(settings.REDIS_URL)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import logging
+import time
+from collections.abc import Iterator
+from enum import IntEnum
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from config import settings
+from src.exceptions import SendDroppedError
+from src.utils.metrics import TELEGRAM_QUEUE_WAIT, TELEGRAM_REQUESTS
+from src.utils.token_bucket import PriorityGate, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Методы, на которые действуют лимиты Telegram на отправку в чат
+CHAT_LIMITED_PREFIXES = ("Send", "Forward", "Copy")
+# Остальные изменения сообщений учитываются только в общем лимите бота
+GLOBAL_LIMITED_PREFIXES = CHAT_LIMITED_PREFIXES + ("Edit", "Delete")
+
+# Как часто чистить состояние лимитов давно молчащих чатов
+PRUNE_EVERY = 1024
+
+
+class SendPriority(IntEnum):
+    """Приоритет исходящего запроса: меньше — раньше"""
+
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+_send_priority: contextvars.ContextVar[SendPriority] = contextvars.ContextVar(
+    "send_priority", default=SendPriority.NORMAL
+)
+
+
+@contextlib.contextmanager
+def send_priority(priority: SendPriority) -> Iterator[None]:
+    """Задает приоритет запросов к Telegram внутри блока"""
+    token = _send_priority.set(priority)
+    try:
+        yield
+    finally:
+        _send_priority.reset(token)
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Планировщик исходящих запросов к Bot API.
+
+    Подключается к сессии бота как request middleware. Запросы на отправку
+    проходят через ведро токенов чата и общее ведро бота; токены выдаются в
+    порядке приоритета, поэтому ссылка авторизации уходит раньше удаления
+    стикера. Оба токена списываются непосредственно перед отправкой, чтобы
+    ожидание в очереди не сбивало запросы в пачку сверх лимита.
+    Низкоприоритетные запросы при переполненной очереди отбрасываются с
+    SendDroppedError. На RetryAfter ведро приостанавливается
+    на указанное время, и запрос повторяется.
+    """
+
+    def __init__(
+        self,
+        global_rate: float | None = None,
+        global_burst: int | None = None,
+        chat_rate: float | None = None,
+        chat_burst: int | None = None,
+        low_priority_max_queue: int | None = None,
+    ):
+        self.chat_rate = chat_rate or settings.TELEGRAM_CHAT_RATE
+        self.chat_burst = chat_burst or settings.TELEGRAM_CHAT_BURST
+        self.low_priority_max_queue = (
+            low_priority_max_queue
+            if low_priority_max_queue is not None
+            else settings.TELEGRAM_LOW_PRIORITY_MAX_QUEUE
+        )
+        # exclusive: общий токен списывается в момент отправки, а не выдачи
+        self.global_gate = PriorityGate(
+            TokenBucket(
+                global_rate or settings.TELEGRAM_GLOBAL_RATE,
+                global_burst or settings.TELEGRAM_GLOBAL_BURST,
+            ),
+            exclusive=True,
+        )
+        self._chat_buckets: dict[int, TokenBucket] = {}
+        self._acquired = 0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = type(method).__name__
+        if not name.startswith(GLOBAL_LIMITED_PREFIXES):
+            return await make_request(bot, method)
+
+        priority = _send_priority.get()
+        chat_bucket = self._chat_bucket(method, name)
+        attempts = settings.TELEGRAM_RETRY_AFTER_ATTEMPTS
+        attempt = 0
+        while True:
+            await self._acquire(name, priority, chat_bucket)
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                TELEGRAM_REQUESTS.inc(name, "retry_after")
+                if (
+                    attempt == attempts
+                    or e.retry_after > settings.TELEGRAM_RETRY_AFTER_MAX
+                ):
+                    raise
+                logger.warning(f"Telegram просит подождать {e.retry_after} с ({name})")
+                (chat_bucket or self.global_gate.bucket).block(e.retry_after)
+                attempt += 1
+                continue
+            TELEGRAM_REQUESTS.inc(name, "sent")
+            return response
+
+    def _chat_bucket(self, method: TelegramMethod, name: str) -> TokenBucket | None:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None or not name.startswith(CHAT_LIMITED_PREFIXES):
+            return None
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(
+                self.chat_rate, self.chat_burst
+            )
+        return bucket
+
+    async def _acquire(
+        self, name: str, priority: SendPriority, chat_bucket: TokenBucket | None
+    ) -> None:
+        if (
+            priority == SendPriority.LOW
+            and self.global_gate.waiting >= self.low_priority_max_queue
+        ):
+            TELEGRAM_REQUESTS.inc(name, "dropped")
+            raise SendDroppedError(f"{name} отброшен: очередь отправки переполнена")
+
+        started = time.perf_counter()
+        while True:
+            if chat_bucket is not None:
+                delay = chat_bucket.delay()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            # Запросы одного чата, дождавшиеся токена, встают в общую очередь;
+            # токен чата достается первому по приоритету, остальные ждут снова
+            await self.global_gate.acquire(priority)
+            if chat_bucket is None or chat_bucket.try_take():
+                self.global_gate.release()
+                break
+            self.global_gate.release(consume=False)
+        TELEGRAM_QUEUE_WAIT.observe(
+            time.perf_counter() - started, priority.name.lower()
+        )
+
+        self._acquired += 1
+        if self._acquired % PRUNE_EVERY == 0:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Забывает чаты, чьи ведра полные"""
+        idle = [chat_id for chat_id, b in self._chat_buckets.items() if b.is_idle()]
+        for chat_id in idle:
+            del self._chat_buckets[chat_id]
+
+    def stats(self) -> tuple[int, int]:
+        """(ожидают общего лимита, чатов с состоянием)"""
+        return self.global_gate.waiting, len(self._chat_buckets)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Coroutine
+from typing import Any
+
+from config import settings
+from src.utils.metrics import BACKGROUND_TASKS, BACKGROUND_TASKS_PENDING
+
+logger = logging.getLogger(__name__)
+
+
+class TaskManager:
+    """Фоновые задачи, результат которых обработчику не нужен.
+
+    Одновременно выполняется не больше ``concurrency`` задач, остальные ждут
+    своей очереди. Менеджер держит ссылки на задачи, чтобы сборщик мусора не
+    удалил их недоделанными, учитывает исходы в метриках, а при остановке
+    бота ``drain`` дожидается оставшихся.
+    """
+
+    def __init__(self, concurrency: int | None = None):
+        self.concurrency = concurrency
+        self._tasks: set[asyncio.Task] = set()
+        self._semaphore: asyncio.Semaphore | None = None
+
+    @property
+    def pending(self) -> int:
+        """Задачи в очереди и в работе"""
+        return len(self._tasks)
+
+    def spawn(self, coro: Coroutine[Any, Any, Any], kind: str) -> asyncio.Task:
+        """Запускает корутину в фоне; ошибки не поднимаются, а учитываются"""
+        if self._semaphore is None:
+            # Семафор создается в работающем event loop, а не при импорте
+            self._semaphore = asyncio.Semaphore(
+                self.concurrency or settings.BACKGROUND_TASKS_CONCURRENCY
+            )
+        task = asyncio.create_task(self._run(coro, kind, self._semaphore))
+        self._tasks.add(task)
+        task.add_done_callback(self._forget)
+        BACKGROUND_TASKS_PENDING.set(len(self._tasks))
+        return task
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """Дожидается фоновых задач; не успевшие за timeout отменяются"""
+        if timeout is None:
+            timeout = settings.BACKGROUND_TASKS_DRAIN_TIMEOUT
+        deadline = time.monotonic() + timeout
+        # Задачи, запущенные во время ожидания, тоже дожидаемся
+        while self._tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.wait(set(self._tasks), timeout=remaining)
+
+        if self._tasks:
+            pending = list(self._tasks)
+            logger.warning(f"Отменено фоновых задач при остановке: {len(pending)}")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run(
+        self, coro: Coroutine[Any, Any, Any], kind: str, semaphore: asyncio.Semaphore
+    ) -> None:
+        try:
+            async with semaphore:
+                await coro
+        except asyncio.CancelledError:
+            # Задача, отмененная в очереди, так и не запустила корутину
+            coro.close()
+            BACKGROUND_TASKS.inc(kind, "cancelled")
+            raise
+        except Exception as e:
+            BACKGROUND_TASKS.inc(kind, "failed")
+            # Фоновая задача не должна ронять процесс: ловим любую ошибку,
+            # а traceback оставляем для отладки
+            logger.debug(
+                f"Фоновая задача {kind} завершилась ошибкой: {e!r}", exc_info=True
+            )
+            return
+        BACKGROUND_TASKS.inc(kind, "ok")
+
+    def _forget(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        BACKGROUND_TASKS_PENDING.set(len(self._tasks))
+
+
+task_manager = TaskManager()
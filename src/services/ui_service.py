@@ -1,5 +1,6 @@
+from __future__ import annotations
+
 import time
-from typing import Optional
 
 from aiogram.types import InlineKeyboardButton, KeyboardButton, ReplyKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
@@ -77,7 +78,7 @@ class UIService:
 
     @staticmethod
     def format_auth_link_message(
-        expires_at: int, current_time: Optional[int] = None
+        expires_at: int, current_time: int | None = None
     ) -> str:
         """Форматирует сообщение с информацией о времени действия ссылки"""
         if current_time is None:
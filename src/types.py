@@ -1,4 +1,5 @@
-from typing import TypedDict, List
+# typing_extensions.TypedDict нужен pydantic для валидации на Python < 3.12
+from typing_extensions import TypedDict
 
 
 class FAQQuestion(TypedDict):
@@ -12,11 +13,11 @@ class FAQTheme(TypedDict):
     """Тип данных для темы FAQ"""
 
     theme: str
-    questions: List[FAQQuestion]
+    questions: list[FAQQuestion]
 
 
 # Данные FAQ
-FAQ_DATA: List[FAQTheme] = [
+FAQ_DATA: list[FAQTheme] = [
     {
         "theme": "Обучение и программа курса",
         "questions": [
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+
+from src.utils.metrics import UPDATE_ORDERING_WAIT
+
+
+class _KeyQueue:
+    """Блокировка ключа и число обновлений, которые ее держат или ждут"""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class OrderedEventIsolation(BaseEventIsolation):
+    """Обрабатывает обновления одного пользователя строго по очереди.
+
+    Подключается к диспетчеру через ``events_isolation``: FSMContextMiddleware
+    берет блокировку по ключу FSM (пользователь в чате) до чтения состояния,
+    первым ожиданием в обработке обновления. Задачи обновлений создаются в
+    порядке поступления, а ``asyncio.Lock`` пропускает ожидающих по очереди,
+    поэтому двойное нажатие кнопки или контакт, пришедший во время
+    ``set_state``, обрабатываются после предыдущего обновления. Разные
+    пользователи обрабатываются параллельно, не больше ``concurrency`` сразу;
+    ожидающие своей очереди слот не занимают.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self._queues: dict[StorageKey, _KeyQueue] = {}
+        self._semaphore: asyncio.Semaphore | None = None
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = _KeyQueue()
+        queue.users += 1
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        try:
+            async with queue.lock, self._semaphore:
+                UPDATE_ORDERING_WAIT.observe(time.perf_counter() - started)
+                yield
+        finally:
+            queue.users -= 1
+            if not queue.users:
+                del self._queues[key]
+
+    def active_keys(self) -> int:
+        """Пользователи, у которых есть обновления в обработке или в очереди"""
+        return len(self._queues)
+
+    async def close(self) -> None:
+        self._queues.clear()
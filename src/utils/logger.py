@@ -1,8 +1,41 @@
+from __future__ import annotations
+
+import contextvars
+import copy
+import json
 import logging
-from typing import Optional
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, TextIO
 
 from aiogram import types
 
+from config import settings
+from src.utils.metrics import LOG_RECORDS_DROPPED
+
+TEXT_FORMAT = "%(levelname)s:%(name)s:%(message)s"
+
+# Поля записи, которые попадают в JSON, если заданы через extra
+STRUCTURED_FIELDS = ("user_id", "username", "action", "handler", "latency_ms")
+
+# Поля log_user_action с номером телефона: в лог попадают только последние цифры
+PHONE_FIELDS = ("phone",)
+PHONE_VISIBLE_DIGITS = 4
+
+# Контекст текущего обновления (обработчик, пользователь), его заполняет middleware.
+# Значение по умолчанию общее для всех задач, поэтому оно неизменяемое
+_log_context: contextvars.ContextVar[Mapping[str, Any]] = contextvars.ContextVar(
+    "log_context", default=MappingProxyType({})
+)
+
+_listener: logging.handlers.QueueListener | None = None
+
 
 def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     """Настраивает и возвращает логгер"""
@@ -11,19 +44,210 @@ def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     return logger
 
 
-def log_user_action(logger: logging.Logger, user: types.User, action: str, **kwargs):
-    """Логирует действия пользователя"""
+def mask_phone(phone: Any) -> str:
+    """Номер телефона для лога: все цифры, кроме последних, заменены на *"""
+    digits = str(phone)
+    hidden = max(len(digits) - PHONE_VISIBLE_DIGITS, 0)
+    return "*" * hidden + digits[hidden:]
+
+
+def log_user_action(
+    logger: logging.Logger, user: types.User, action: str, **kwargs: Any
+) -> None:
+    """Логирует действия пользователя; номера телефонов маскируются"""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    for field in PHONE_FIELDS:
+        if kwargs.get(field) is not None:
+            kwargs[field] = mask_phone(kwargs[field])
     user_info = f"User(id={user.id}, username={user.username})"
     extra_info = " ".join([f"{k}={v}" for k, v in kwargs.items()])
     message = f"{user_info} {action}"
     if extra_info:
         message += f" {extra_info}"
-    logger.info(message)
+    logger.info(
+        message,
+        extra={
+            "user_id": user.id,
+            "username": user.username,
+            "action": action,
+            "fields": kwargs,
+        },
+    )
 
 
-def log_error(logger: logging.Logger, error: Exception, context: Optional[str] = None):
+def log_error(
+    logger: logging.Logger, error: Exception, context: str | None = None
+) -> None:
     """Логирует ошибки с контекстом"""
     message = f"Error: {error}"
     if context:
         message = f"{context}: {message}"
     logger.error(message, exc_info=True)
+
+
+def set_log_context(**fields: Any) -> contextvars.Token:
+    """Добавляет поля ко всем записям текущей задачи; вернуть — reset_log_context"""
+    return _log_context.set({**_log_context.get(), **fields})
+
+
+def reset_log_context(token: contextvars.Token) -> None:
+    _log_context.reset(token)
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись в одну строку JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = value
+        payload.update(getattr(record, "fields", None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class LogContextFilter(logging.Filter):
+    """Переносит контекст обновления в атрибуты записи"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Прореживает шумные логгеры: сэмплирование и лимит записей в секунду.
+
+    Применяется только к записям уровня INFO и ниже; предупреждения и ошибки
+    проходят всегда. Правило ищется по имени логгера и его родителям.
+    """
+
+    def __init__(
+        self,
+        sample_rates: Mapping[str, float] | None = None,
+        rate_limits: Mapping[str, int] | None = None,
+    ):
+        super().__init__()
+        self.sample_rates = dict(sample_rates or {})
+        self.rate_limits = dict(rate_limits or {})
+        self._rules: dict[str, tuple[str | None, str | None]] = {}
+        # Окно лимита по правилу: (начало секунды, записей в ней)
+        self._windows: dict[str, tuple[float, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        sample_key, limit_key = self._resolve(record.name)
+        if sample_key is not None and random.random() >= self.sample_rates[sample_key]:
+            LOG_RECORDS_DROPPED.inc("sampled")
+            return False
+        if limit_key is not None and not self._within_limit(limit_key):
+            LOG_RECORDS_DROPPED.inc("rate_limited")
+            return False
+        return True
+
+    def _resolve(self, name: str) -> tuple[str | None, str | None]:
+        rule = self._rules.get(name)
+        if rule is None:
+            rule = self._rules[name] = (
+                self._match(name, self.sample_rates),
+                self._match(name, self.rate_limits),
+            )
+        return rule
+
+    @staticmethod
+    def _match(name: str, rules: Mapping[str, Any]) -> str | None:
+        while name:
+            if name in rules:
+                return name
+            name = name.rpartition(".")[0]
+        return None
+
+    def _within_limit(self, key: str) -> bool:
+        now = time.monotonic()
+        started, count = self._windows.get(key, (now, 0))
+        if now - started >= 1.0:
+            started, count = now, 0
+        if count >= self.rate_limits[key]:
+            return False
+        self._windows[key] = (started, count + 1)
+        return True
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """Кладет запись в очередь, не блокируя event loop.
+
+    Сообщение и traceback готовятся здесь, а форматирование и запись в поток
+    выполняет QueueListener в отдельном потоке. Если очередь переполнена,
+    запись отбрасывается.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            # Traceback форматируем сразу: кадры стека к моменту записи изменятся
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc("queue_full")
+
+
+def configure_logging(
+    stream: TextIO | None = None,
+    level: str | None = None,
+    log_format: str | None = None,
+) -> logging.handlers.QueueListener:
+    """Настраивает корневой логгер: очередь в event loop, запись в фоновом потоке"""
+    global _listener
+    stop_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    if (log_format or settings.LOG_FORMAT) == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    handler = AsyncQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    handler.addFilter(
+        SamplingFilter(settings.LOG_SAMPLE_RATES, settings.LOG_RATE_LIMITS)
+    )
+    handler.addFilter(LogContextFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+        existing.close()
+    root.addHandler(handler)
+    root.setLevel(level or settings.LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Дописывает записи из очереди и останавливает фоновый поток"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
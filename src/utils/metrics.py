@@ -0,0 +1,243 @@
+"""Минимальные метрики в текстовом формате Prometheus.
+
+Значения хранятся в словарях по кортежу меток, поэтому запись метрики — это
+пара поисков в словаре без блокировок (все вызовы идут из event loop).
+"""
+
+import bisect
+from collections.abc import Sequence
+from typing import TypeVar, Union
+
+LabelValues = tuple[str, ...]
+
+# Границы бакетов по умолчанию, секунды: от 0.5 мс до 10 с
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """Монотонно растущий счетчик"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Увеличивает счетчик для набора значений меток"""
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def collect(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    """Значение, которое может как расти, так и уменьшаться"""
+
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+
+class Histogram:
+    """Гистограмма с фиксированными бакетами"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # По каждому набору меток: [счетчики бакетов..., +Inf, сумма]
+        self._values: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Добавляет наблюдение"""
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._values.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def collect(self) -> list[str]:
+        lines = []
+        bucket_names = self.labelnames + ("le",)
+        for labels, series in sorted(self._values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{self.name}_bucket"
+                    f"{_format_labels(bucket_names, labels + (le,))} {cumulative}"
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {series[-1]}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+Metric = Union[Counter, Histogram]
+M = TypeVar("M", Counter, Gauge, Histogram)
+
+
+class Registry:
+    """Набор метрик процесса"""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате экспозиции Prometheus"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Обновления и обработчики
+UPDATES = registry.counter(
+    "bot_updates_total", "Обработанные обновления Telegram", ("event_type", "status")
+)
+UPDATE_LATENCY = registry.histogram(
+    "bot_update_duration_seconds", "Время обработки обновления", ("event_type",)
+)
+HANDLER_LATENCY = registry.histogram(
+    "bot_handler_duration_seconds", "Время работы обработчика", ("handler",)
+)
+HANDLER_ERRORS = registry.counter(
+    "bot_handler_errors_total", "Исключения в обработчиках", ("handler",)
+)
+UPDATE_ORDERING_WAIT = registry.histogram(
+    "bot_update_ordering_wait_seconds",
+    "Ожидание очереди пользователя и свободного слота обработки",
+)
+THROTTLED = registry.counter(
+    "bot_throttled_total", "Действия, отклоненные ограничением частоты", ("handler",)
+)
+
+# Кеш Redis
+CACHE_OPERATIONS = registry.counter(
+    "cache_operations_total", "Операции CacheService", ("operation", "result")
+)
+CACHE_ERRORS = registry.counter(
+    "cache_errors_total", "Ошибки Redis в операциях CacheService", ("operation",)
+)
+CACHE_LATENCY = registry.histogram(
+    "cache_operation_duration_seconds", "Время операции CacheService", ("operation",)
+)
+CACHE_FALLBACK_ACTIVE = registry.gauge(
+    "cache_fallback_active", "1 — Redis недоступен и кеш работает в памяти процесса"
+)
+
+# Внешний API
+API_REQUESTS = registry.counter(
+    "api_requests_total", "Запросы к API аккаунтов", ("endpoint", "status")
+)
+API_RETRIES = registry.counter(
+    "api_retries_total", "Повторы запросов к API аккаунтов", ("endpoint",)
+)
+API_LATENCY = registry.histogram(
+    "api_request_duration_seconds", "Время запроса к API аккаунтов", ("endpoint",)
+)
+
+# Исходящие запросы к Telegram
+TELEGRAM_REQUESTS = registry.counter(
+    "telegram_requests_total", "Запросы к Bot API по исходу", ("method", "result")
+)
+TELEGRAM_QUEUE_WAIT = registry.histogram(
+    "telegram_queue_wait_seconds", "Ожидание лимитов Bot API", ("priority",)
+)
+
+# Фоновые задачи
+BACKGROUND_TASKS = registry.counter(
+    "background_tasks_total", "Завершенные фоновые задачи по исходу", ("kind", "result")
+)
+BACKGROUND_TASKS_PENDING = registry.gauge(
+    "background_tasks_pending", "Фоновые задачи в очереди и в работе"
+)
+
+# Предзагрузка ссылок авторизации: stored - used = выброшенные впустую
+AUTH_PREFETCH = registry.counter(
+    "auth_prefetch_total", "Фоновые генерации ссылок авторизации по исходу", ("result",)
+)
+
+# Логирование
+LOG_RECORDS_DROPPED = registry.counter(
+    "log_records_dropped_total", "Отброшенные записи лога", ("reason",)
+)
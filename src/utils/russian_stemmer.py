@@ -0,0 +1,108 @@
+"""Стеммер для русского языка по алгоритму Snowball (Портер)."""
+
+from functools import lru_cache
+
+VOWELS = frozenset("аеиоуыэюя")
+
+
+Endings = tuple[tuple[str, bool], ...]
+
+
+def _endings(after_a: str = "", plain: str = "") -> Endings:
+    """Окончания от длинных к коротким; after_a — удаляются только после «а»/«я»"""
+    items = [(s, True) for s in after_a.split()] + [(s, False) for s in plain.split()]
+    return tuple(sorted(items, key=lambda item: len(item[0]), reverse=True))
+
+
+PERFECTIVE_GERUND = _endings("в вши вшись", "ив ивши ившись ыв ывши ывшись")
+REFLEXIVE = _endings(plain="ся сь")
+ADJECTIVE = _endings(
+    plain="ее ие ые ое ими ыми ей ий ый ой ем им ым ом его ого ему ому их ых ую юю "
+    "ая яя ою ею"
+)
+PARTICIPLE = _endings("ем нн вш ющ щ", "ивш ывш ующ")
+VERB = _endings(
+    "ла на ете йте ли й л ем н ло но ет ют ны ть ешь нно",
+    "ила ыла ена ейте уйте ите или ыли ей уй ил ыл им ым ен ило ыло ено ят ует уют "
+    "ит ыт ены ить ыть ишь ую ю",
+)
+NOUN = _endings(
+    plain="а ев ов ие ье е иями ями ами еи ии и ией ей ой ий й иям ям ием ем ам ом о "
+    "у ах иях ях ы ь ию ью ю ия ья я"
+)
+SUPERLATIVE = ("ейше", "ейш")
+DERIVATIONAL = ("ость", "ост")
+
+
+def _regions(word: str) -> tuple[int, int]:
+    """Начала областей RV и R2"""
+    rv = len(word)
+    for i, ch in enumerate(word):
+        if ch in VOWELS:
+            rv = i + 1
+            break
+
+    def r1_from(start: int) -> int:
+        for i in range(start + 1, len(word)):
+            if word[i] not in VOWELS and word[i - 1] in VOWELS:
+                return i + 1
+        return len(word)
+
+    r2 = r1_from(r1_from(0))
+    return rv, r2
+
+
+def _strip(rv_part: str, endings: Endings) -> str:
+    """Удаляет самое длинное подходящее окончание"""
+    for suffix, after_a in endings:
+        if rv_part.endswith(suffix):
+            stem = rv_part[: -len(suffix)]
+            if after_a and not stem.endswith(("а", "я")):
+                continue
+            return stem
+    return rv_part
+
+
+@lru_cache(maxsize=100_000)
+def stem(word: str) -> str:
+    """Возвращает основу слова (ожидается слово в нижнем регистре)"""
+    rv, r2 = _regions(word)
+    prefix, rv_part = word[:rv], word[rv:]
+
+    # Шаг 1
+    stripped = _strip(rv_part, PERFECTIVE_GERUND)
+    if stripped == rv_part:
+        rv_part = _strip(rv_part, REFLEXIVE)
+        stripped = _strip(rv_part, ADJECTIVE)
+        if stripped != rv_part:
+            stripped = _strip(stripped, PARTICIPLE)
+        else:
+            stripped = _strip(rv_part, VERB)
+            if stripped == rv_part:
+                stripped = _strip(rv_part, NOUN)
+    rv_part = stripped
+
+    # Шаг 2
+    rv_part = rv_part.removesuffix("и")
+
+    # Шаг 3: словообразовательные окончания только в области R2
+    r2_in_rv = max(0, r2 - rv)
+    for suffix in DERIVATIONAL:
+        if rv_part.endswith(suffix) and len(rv_part) - len(suffix) >= r2_in_rv:
+            rv_part = rv_part[: -len(suffix)]
+            break
+
+    # Шаг 4
+    if rv_part.endswith("нн"):
+        rv_part = rv_part[:-1]
+    else:
+        for suffix in SUPERLATIVE:
+            if rv_part.endswith(suffix):
+                rv_part = rv_part[: -len(suffix)]
+                if rv_part.endswith("нн"):
+                    rv_part = rv_part[:-1]
+                break
+        else:
+            rv_part = rv_part.removesuffix("ь")
+
+    return prefix + rv_part
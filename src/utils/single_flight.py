@@ -0,0 +1,30 @@
+import asyncio
+from collections.abc import Awaitable, Hashable
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Объединяет одновременные вызовы с одинаковым ключом в один"""
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Проверяет, выполняется ли сейчас вызов с этим ключом"""
+        return key in self._calls
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Выполняет func или ждет результат уже запущенного вызова"""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # shield: отмена одного ожидающего не отменяет общий вызов
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
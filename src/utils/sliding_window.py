@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from collections.abc import Hashable
+
+# Как часто чистить окна ключей, которые давно не обращались
+PRUNE_EVERY = 1024
+
+
+class SlidingWindow:
+    """Скользящее окно: не больше limit событий за window секунд на ключ"""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._hits: dict[Hashable, deque[float]] = {}
+        self._calls = 0
+
+    def _expire(self, hits: deque[float], now: float) -> None:
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+
+    def is_full(self, key: Hashable, now: float | None = None) -> bool:
+        """В окне ключа уже limit событий"""
+        hits = self._hits.get(key)
+        if hits is None:
+            return False
+        self._expire(hits, time.monotonic() if now is None else now)
+        return len(hits) >= self.limit
+
+    def record(self, key: Hashable, now: float | None = None) -> None:
+        """Учитывает событие ключа"""
+        now = time.monotonic() if now is None else now
+        self._calls += 1
+        if self._calls % PRUNE_EVERY == 0:
+            self.prune(now)
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque()
+        hits.append(now)
+
+    def hit(self, key: Hashable, now: float | None = None) -> bool:
+        """Учитывает событие, если окно не заполнено; False — лимит исчерпан"""
+        now = time.monotonic() if now is None else now
+        if self.is_full(key, now):
+            return False
+        self.record(key, now)
+        return True
+
+    def prune(self, now: float | None = None) -> None:
+        """Забывает ключи без событий в окне"""
+        now = time.monotonic() if now is None else now
+        expired = [
+            key
+            for key, hits in self._hits.items()
+            if not hits or hits[-1] <= now - self.window
+        ]
+        for key in expired:
+            del self._hits[key]
+
+    def __len__(self) -> int:
+        return len(self._hits)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+
+
+class TokenBucket:
+    """Ведро токенов: не больше capacity подряд и rate в секунду в среднем"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+    def try_take(self, now: float | None = None) -> bool:
+        """Забирает токен, если он есть"""
+        now = time.monotonic() if now is None else now
+        if now < self.blocked_until:
+            return False
+        self._refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def take(self, now: float | None = None) -> None:
+        """Забирает токен безусловно; запас может уйти в минус"""
+        self._refill(time.monotonic() if now is None else now)
+        self.tokens -= 1
+
+    def delay(self, now: float | None = None) -> float:
+        """Через сколько секунд появится токен"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+        return max(wait, self.blocked_until - now)
+
+    def block(self, seconds: float) -> None:
+        """Запрещает выдачу токенов на seconds секунд и обнуляет запас"""
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self._refill(now)
+        self.tokens = 0.0
+
+    def is_idle(self) -> bool:
+        """Ведро полное и не заблокировано — его состояние можно забыть"""
+        now = time.monotonic()
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.blocked_until
+
+
+class PriorityGate:
+    """Выдает токены ведра ожидающим в порядке приоритета (меньше — раньше).
+
+    Пока очередь пуста, токен берется сразу; иначе ожидающих обслуживает
+    одна фоновая задача по мере пополнения ведра.
+
+    В режиме ``exclusive`` пропуск выдается, когда в ведре есть токен, но
+    сам токен списывается в ``release`` — в момент, когда запрос уходит.
+    До release следующий ожидающий не пропускается. Так запросы, которые
+    после этого ждут еще и другой лимит, не уходят пачкой сверх лимита.
+    """
+
+    def __init__(self, bucket: TokenBucket, exclusive: bool = False):
+        self.bucket = bucket
+        self.exclusive = exclusive
+        self._held = False
+        self._released = asyncio.Event()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        # Отмененные ожидающие остаются в куче до выхода наверх, поэтому
+        # живых ожидающих считаем отдельно
+        self._live_waiters = 0
+        self._counter = itertools.count()
+        self._pump: asyncio.Task | None = None
+
+    @property
+    def waiting(self) -> int:
+        """Сколько запросов ждут пропуск; отмененные не учитываются"""
+        return self._live_waiters
+
+    async def acquire(self, priority: int) -> None:
+        """Ждет пропуск с заданным приоритетом"""
+        if not self._waiters and self._try_grant():
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self._live_waiters += 1
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run())
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Пропуск мог быть выдан в момент отмены — возвращаем его
+            if future.done() and not future.cancelled():
+                self.release(consume=False)
+            raise
+        finally:
+            self._live_waiters -= 1
+
+    def release(self, consume: bool = True) -> None:
+        """Освобождает пропуск exclusive-режима; consume — запрос отправлен"""
+        if not self.exclusive:
+            return
+        if consume:
+            self.bucket.take()
+        self._held = False
+        self._released.set()
+
+    def is_idle(self) -> bool:
+        return not self._waiters and not self._held and self.bucket.is_idle()
+
+    def _try_grant(self) -> bool:
+        if not self.exclusive:
+            return self.bucket.try_take()
+        if self._held or self.bucket.delay() > 0:
+            return False
+        self._held = True
+        return True
+
+    async def _run(self) -> None:
+        while self._waiters:
+            if self._waiters[0][2].done():
+                # Ожидающего отменили — пропуск ему не нужен
+                heapq.heappop(self._waiters)
+                continue
+            if self._held:
+                self._released.clear()
+                await self._released.wait()
+                continue
+            delay = self.bucket.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            if self._try_grant():
+                _, _, future = heapq.heappop(self._waiters)
+                future.set_result(None)
+            else:
+                await asyncio.sleep(0)
@@ -0,0 +1,132 @@
+import asyncio
+import hmac
+import logging
+import signal
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+
+from config import settings
+from src.services.task_manager import task_manager
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """aiohttp-приложение, принимающее обновления Telegram через webhook.
+
+    Обновления обрабатываются в фоне не более WEBHOOK_MAX_CONCURRENCY
+    одновременно. Когда все слоты заняты, ответ Telegram задерживается, и
+    нагрузка естественно притормаживается. При остановке новые обновления
+    отклоняются с 503 (Telegram повторит их на другую реплику), а начатые
+    дорабатываются.
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot):
+        self.dp = dp
+        self.bot = bot
+        self._semaphore = asyncio.Semaphore(settings.WEBHOOK_MAX_CONCURRENCY)
+        self._tasks: set[asyncio.Task] = set()
+        self._accepting = True
+
+    def create_app(self) -> web.Application:
+        """Создает aiohttp-приложение с маршрутами webhook и проверки здоровья"""
+        app = web.Application()
+        app.router.add_post(settings.WEBHOOK_PATH, self.handle_update)
+        app.router.add_get("/healthz", self.handle_health)
+        return app
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """Принимает обновление и ставит его в обработку"""
+        if settings.WEBHOOK_SECRET and not hmac.compare_digest(
+            request.headers.get(SECRET_HEADER, ""), settings.WEBHOOK_SECRET
+        ):
+            return web.Response(status=401)
+        if not self._accepting:
+            return web.Response(status=503)
+
+        try:
+            update = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+
+        await self._semaphore.acquire()
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    async def handle_health(self, _: web.Request) -> web.Response:
+        """Для балансировщика: реплика принимает обновления"""
+        return web.Response(status=200 if self._accepting else 503)
+
+    async def _process(self, update: dict) -> None:
+        try:
+            await self.dp.feed_raw_update(self.bot, update)
+        except Exception:
+            logger.exception("Ошибка при обработке обновления из webhook")
+        finally:
+            self._semaphore.release()
+
+    async def drain(self) -> None:
+        """Перестает принимать обновления и дожидается начатых"""
+        self._accepting = False
+        if not self._tasks:
+            return
+
+        logger.info(f"Дожидаемся обработки {len(self._tasks)} обновлений")
+        _, pending = await asyncio.wait(
+            set(self._tasks), timeout=settings.WEBHOOK_SHUTDOWN_TIMEOUT
+        )
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"Не дождались {len(pending)} обновлений, отменяем")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """Запускает бота в режиме webhook до получения SIGINT/SIGTERM"""
+    server = WebhookServer(dp, bot)
+    runner = web.AppRunner(server.create_app())
+    await runner.setup()
+    site = web.TCPSite(
+        runner,
+        settings.WEBHOOK_HOST,
+        settings.WEBHOOK_PORT,
+        reuse_port=settings.WEBHOOK_REUSE_PORT,
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    # Как в run_polling: startup до первого обновления, shutdown закрывает
+    # хранилище FSM и изоляцию событий
+    await dp.emit_startup(bot=bot, dispatcher=dp, bots=[bot])
+    try:
+        await site.start()
+        # Все реплики регистрируют один и тот же адрес балансировщика
+        await bot.set_webhook(
+            url=f"{settings.WEBHOOK_URL}{settings.WEBHOOK_PATH}",
+            secret_token=settings.WEBHOOK_SECRET or None,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+        )
+        logger.info(
+            f"Webhook слушает {settings.WEBHOOK_HOST}:{settings.WEBHOOK_PORT}"
+            f"{settings.WEBHOOK_PATH}"
+        )
+        await stop.wait()
+    finally:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(sig)
+        await server.drain()
+        # Фоновые запросы к Telegram (удаления сообщений) — пока сессия открыта
+        await task_manager.drain()
+        await runner.cleanup()
+        await dp.emit_shutdown(bot=bot, dispatcher=dp, bots=[bot])
+        await bot.session.close()
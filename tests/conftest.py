@@ -0,0 +1,108 @@
+import os
+
+# Обязательные настройки бота читаются при импорте config
+os.environ.setdefault("BOT_TOKEN", "123456:TEST")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("API_BASE_URL", "http://127.0.0.1:8081")
+os.environ.setdefault("API_LOGIN", "test")
+os.environ.setdefault("API_PASSWORD", "test")
+
+import itertools
+from typing import Any
+
+import pytest
+from aiogram import Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiohttp import web
+from fakeredis.aioredis import FakeRedis
+
+from benchmarks.common import FlakyRedis
+from benchmarks.fake_telegram import FakeSession, fake_bot
+from config import settings
+from src.constants import API_LOGIN_ENDPOINT
+from src.handlers import register_handlers
+from src.services.api_client import api_client
+from src.services.cache import cache_service
+from src.services.task_manager import task_manager
+from tests.stubs import StubAPI
+
+_user_ids = itertools.count(800_000_001)
+
+
+@pytest.fixture(autouse=True)
+def restore_settings(monkeypatch):
+    """Тесты меняют глобальные настройки — возвращаем их после каждого"""
+    saved = settings.model_dump()
+    # Семафор фоновых задач привязан к event loop, а у каждого теста свой
+    monkeypatch.setattr(task_manager, "_semaphore", None)
+    yield
+    for name, value in saved.items():
+        setattr(settings, name, value)
+
+
+@pytest.fixture
+async def redis():
+    """fakeredis в памяти процесса вместо общего пула; кеш работает через него"""
+    client = FakeRedis(decode_responses=True)
+    cache_service.use_redis(client)
+    cache_service.memory_backend.clear()
+    cache_service._fallback_dirty.clear()
+    yield client
+    await cache_service.close()
+    await client.aclose()
+
+
+@pytest.fixture
+def flaky_redis(redis) -> FlakyRedis:
+    """Тот же fakeredis, которому можно устроить сбой: flaky_redis.down = True"""
+    return FlakyRedis(redis)
+
+
+@pytest.fixture
+async def stub_api(redis, monkeypatch):
+    """Stub API логина на свободном порту; общий api_client смотрит на него"""
+    stub = StubAPI()
+    app = web.Application()
+    app.router.add_post(f"/{API_LOGIN_ENDPOINT}", stub.login)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    stub.base_url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+    monkeypatch.setattr(api_client, "base_url", stub.base_url)
+    await api_client.start()
+    yield stub
+    await api_client.close()
+    await runner.cleanup()
+
+
+@pytest.fixture(scope="session")
+def dp() -> Dispatcher:
+    """Диспетчер с обработчиками бота; роутеры подключаются к нему один раз"""
+    dispatcher = Dispatcher(storage=MemoryStorage())
+    register_handlers(dispatcher)
+    return dispatcher
+
+
+@pytest.fixture
+def telegram() -> FakeSession:
+    """Поддельный Bot API, который считает вызовы"""
+    return FakeSession()
+
+
+@pytest.fixture
+def user_id() -> int:
+    """Новый пользователь: состояние FSM диспетчера общее для всех тестов"""
+    return next(_user_ids)
+
+
+@pytest.fixture
+def feed(dp, telegram):
+    """Прогоняет обновление через диспетчер и фоновые задачи; вызовы Bot API"""
+
+    async def feed_update(update: dict[str, Any]) -> dict[str, int]:
+        telegram.calls.clear()
+        await dp.feed_raw_update(fake_bot(telegram), update)
+        await task_manager.drain()
+        return dict(telegram.calls)
+
+    return feed_update
@@ -0,0 +1,38 @@
+"""Заглушки внешних сервисов для тестов"""
+
+from __future__ import annotations
+
+import asyncio
+
+from aiohttp import web
+
+
+class StubAPI:
+    """Stub API логина: поведение задается очередью режимов, по одному на запрос.
+
+    Режимы: ok, slow (ответ через slow_delay), 503 и reset (обрыв
+    соединения); число вместо режима — ответить успехом через столько секунд.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.modes: list[str | float] = []
+        self.default_mode = "ok"
+        self.slow_delay = 1.0
+        self.base_url = ""
+
+    async def login(self, request: web.Request) -> web.StreamResponse:
+        self.hits += 1
+        mode = self.modes.pop(0) if self.modes else self.default_mode
+        if isinstance(mode, float):
+            await asyncio.sleep(mode)
+        elif mode == "slow":
+            await asyncio.sleep(self.slow_delay)
+        elif mode == "503":
+            return web.Response(status=503)
+        elif mode == "reset":
+            request.transport.close()
+            return web.Response()
+        return web.json_response(
+            {"authorization_link": "https://example.com/auth?token=x", "expires_at": 0}
+        )
@@ -0,0 +1,115 @@
+"""Таймауты, повторы и размыкатель цепи APIClient на stub-сервере с отказами.
+
+Две «реплики» (два клиента) делят состояние размыкателя через Redis.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from config import settings
+from src.constants import API_LOGIN_ENDPOINT
+from src.exceptions import APIError, CircuitOpenError
+from src.services import circuit_breaker
+from src.services.api_client import APIClient
+from tests.stubs import StubAPI
+
+PAYLOAD = {"telegram_username": "test", "telegram_user_id": "1", "phone": "+7900"}
+TIMEOUT = 0.3
+
+
+@pytest.fixture
+def api(stub_api, monkeypatch):
+    # Укороченные таймауты, чтобы сценарии шли секунды, а не минуты
+    settings.API_ENDPOINT_TIMEOUTS = {API_LOGIN_ENDPOINT: TIMEOUT}
+    settings.API_RETRY_ATTEMPTS = 3
+    settings.API_RETRY_BACKOFF_BASE = 0.05
+    settings.API_RETRY_BACKOFF_MAX = 0.2
+    settings.API_BREAKER_ENABLED = True
+    settings.API_BREAKER_FAILURE_THRESHOLD = 3
+    settings.API_BREAKER_RESET_TIMEOUT = 0.5
+    settings.API_BREAKER_SHARED = True
+    monkeypatch.setattr(circuit_breaker, "STATE_REFRESH_INTERVAL", 0.0)
+    return stub_api
+
+
+@pytest.fixture
+async def replicas(api):
+    clients = [APIClient(api.base_url), APIClient(api.base_url)]
+    yield clients
+    for client in clients:
+        await client.close()
+
+
+async def _login(client: APIClient) -> str:
+    """Один логин; возвращает исход: ok, api_error или circuit_open"""
+    try:
+        await client.post_data(API_LOGIN_ENDPOINT, PAYLOAD, idempotent=True)
+        return "ok"
+    except CircuitOpenError:
+        return "circuit_open"
+    except APIError:
+        return "api_error"
+
+
+async def _open_circuit(api: StubAPI, client: APIClient) -> None:
+    api.default_mode = "503"
+    for _ in range(settings.API_BREAKER_FAILURE_THRESHOLD):
+        assert await _login(client) == "api_error"
+
+
+async def test_slow_backend_times_out_after_retries(api, replicas):
+    api.default_mode = "slow"
+    started = time.perf_counter()
+    outcome = await _login(replicas[0])
+    elapsed = time.perf_counter() - started
+
+    budget = settings.API_RETRY_ATTEMPTS * TIMEOUT + settings.API_RETRY_BACKOFF_MAX * (
+        settings.API_RETRY_ATTEMPTS - 1
+    )
+    assert outcome == "api_error"
+    assert api.hits == settings.API_RETRY_ATTEMPTS
+    assert elapsed < budget + 0.5
+
+
+async def test_transient_errors_are_retried(api, replicas):
+    api.modes = ["503", "reset"]
+    assert await _login(replicas[0]) == "ok"
+    assert api.hits == 3
+
+
+async def test_open_circuit_rejects_on_every_replica(api, replicas):
+    await _open_circuit(api, replicas[0])
+    hits_when_opened = api.hits
+
+    assert await _login(replicas[0]) == "circuit_open"
+    assert await _login(replicas[1]) == "circuit_open"
+    assert api.hits == hits_when_opened
+
+
+async def test_half_open_lets_one_probe_through(api, replicas):
+    await _open_circuit(api, replicas[0])
+    api.default_mode, api.slow_delay = "slow", 0.2
+    await asyncio.sleep(settings.API_BREAKER_RESET_TIMEOUT)
+
+    # Обе реплики одновременно: пробный запрос получает только одна
+    first = await asyncio.gather(*(_login(replica) for replica in replicas))
+    assert sorted(first) == ["circuit_open", "ok"]
+
+    api.default_mode = "ok"
+    assert [await _login(replica) for replica in replicas] == ["ok", "ok"]
+
+
+async def test_probe_slot_outlives_a_single_attempt(api, replicas):
+    await _open_circuit(api, replicas[0])
+    await asyncio.sleep(settings.API_BREAKER_RESET_TIMEOUT)
+
+    # Первая попытка пробного запроса упирается в таймаут, повтор медленно
+    # проходит; другая реплика приходит между ними
+    api.modes = ["slow", TIMEOUT - 0.1]
+    probe = asyncio.create_task(_login(replicas[0]))
+    await asyncio.sleep(TIMEOUT + 0.05)
+
+    assert await _login(replicas[1]) == "circuit_open"
+    assert await probe == "ok"
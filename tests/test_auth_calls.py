@@ -0,0 +1,92 @@
+"""Число запросов к Telegram на один сценарий авторизации.
+
+Обновления идут через диспетчер с обработчиками бота; поддельная сессия
+считает вызовы Bot API, логин отвечает stub-сервер.
+"""
+
+import asyncio
+
+import pytest
+
+from benchmarks.fake_telegram import callback_update, contact_update, fake_bot
+from config import settings
+from src.constants import CALLBACK_AUTH
+from src.services.cache import cache_service
+from src.services.task_manager import task_manager
+
+# Ожидаемые вызовы Bot API на один сценарий
+EXPECTED = {
+    "placeholder": {
+        "cached_phone": {"SendMessage": 1, "EditMessageText": 1},
+        # Сообщение загрузки убирало клавиатуру: ответ новым сообщением
+        "shared_phone": {"SendMessage": 2, "DeleteMessage": 1},
+        "api_error": {"SendMessage": 1, "EditMessageText": 1},
+    },
+    "sticker": {
+        "cached_phone": {"SendSticker": 1, "SendMessage": 2, "DeleteMessage": 2},
+        "shared_phone": {"SendSticker": 1, "SendMessage": 2, "DeleteMessage": 2},
+        "api_error": {"SendSticker": 1, "SendMessage": 2, "DeleteMessage": 2},
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def api(stub_api):
+    # Один запрос без повторов и размыкателя: считаем только вызовы Telegram
+    settings.API_RETRY_ATTEMPTS = 1
+    settings.API_BREAKER_ENABLED = False
+    return stub_api
+
+
+@pytest.mark.parametrize("mode", list(EXPECTED))
+async def test_cached_phone(feed, user_id, mode):
+    settings.AUTH_LOADING_MODE = mode
+    await cache_service.set_phone(user_id, "+79000000001")
+
+    calls = await feed(callback_update(user_id, CALLBACK_AUTH))
+    assert calls == EXPECTED[mode]["cached_phone"]
+
+
+@pytest.mark.parametrize("mode", list(EXPECTED))
+async def test_shared_phone(feed, user_id, mode):
+    settings.AUTH_LOADING_MODE = mode
+    # Номер запрашивается нажатием «авторизации», вызовы считаются по контакту
+    await feed(callback_update(user_id, CALLBACK_AUTH))
+
+    calls = await feed(contact_update(user_id, "+79000000002"))
+    assert calls == EXPECTED[mode]["shared_phone"]
+    assert await cache_service.get_phone(user_id) == "+79000000002"
+
+
+@pytest.mark.parametrize("mode", list(EXPECTED))
+async def test_api_error(feed, api, user_id, mode):
+    settings.AUTH_LOADING_MODE = mode
+    api.default_mode = "503"
+    await cache_service.set_phone(user_id, "+79000000001")
+
+    calls = await feed(callback_update(user_id, CALLBACK_AUTH))
+    assert calls == EXPECTED[mode]["api_error"]
+
+
+async def test_placeholder_is_removed_when_edit_fails(feed, telegram, user_id):
+    settings.AUTH_LOADING_MODE = "placeholder"
+    telegram.failing.add("EditMessageText")
+    await cache_service.set_phone(user_id, "+79000000001")
+
+    calls = await feed(callback_update(user_id, CALLBACK_AUTH))
+    assert calls == {"SendMessage": 2, "EditMessageText": 1, "DeleteMessage": 1}
+
+
+async def test_answer_does_not_wait_for_cleanup(dp, telegram, user_id):
+    settings.AUTH_LOADING_MODE = "sticker"
+    telegram.latency = 0.05
+    await cache_service.set_phone(user_id, "+79000000001")
+
+    await dp.feed_raw_update(
+        fake_bot(telegram), callback_update(user_id, CALLBACK_AUTH)
+    )
+    # Ответ отправлен, индикатор загрузки удаляется в фоне
+    assert telegram.calls["DeleteMessage"] == 0
+    assert task_manager.pending == 2
+    await asyncio.wait_for(task_manager.drain(), timeout=1)
+    assert telegram.calls["DeleteMessage"] == 2
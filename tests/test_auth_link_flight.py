@@ -0,0 +1,117 @@
+"""Одновременные запросы ссылки авторизации для одного пользователя.
+
+В процессе их объединяет SingleFlight, между репликами — блокировка в Redis.
+Логин отвечает stub-сервер, который считает запросы.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from config import settings
+from src.constants import CACHE_AUTH_LOCK_PREFIX
+from src.exceptions import AuthError
+from src.services.auth_service import AuthService
+from src.services.cache import cache_service
+from src.utils.single_flight import SingleFlight
+
+PHONE = "+79001234567"
+CALLERS = 5
+
+
+@pytest.fixture(autouse=True)
+def api(stub_api):
+    # Один запрос без повторов: число запросов к API равно числу генераций
+    settings.API_RETRY_ATTEMPTS = 1
+    settings.API_BREAKER_ENABLED = False
+    return stub_api
+
+
+async def _generate_all(user_id: int) -> list:
+    return await asyncio.gather(
+        *(
+            AuthService.generate_auth_link(user_id, "ivan", PHONE)
+            for _ in range(CALLERS)
+        ),
+        return_exceptions=True,
+    )
+
+
+async def test_concurrent_calls_share_one_request(api, user_id):
+    api.modes = [0.2]
+
+    responses = await _generate_all(user_id)
+
+    assert api.hits == 1
+    assert all(response == responses[0] for response in responses)
+    assert not AuthService.is_auth_link_pending(user_id)
+
+
+async def test_error_reaches_every_waiter(api, user_id):
+    api.modes = ["503"]
+
+    results = await _generate_all(user_id)
+
+    assert api.hits == 1
+    assert all(isinstance(result, AuthError) for result in results)
+    # Неудачный вызов забыт: следующий идет в API заново
+    await AuthService.generate_auth_link(user_id, "ivan", PHONE)
+    assert api.hits == 2
+
+
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def call() -> str:
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(flights.do("key", call))
+    second = asyncio.create_task(flights.do("key", call))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+async def test_waits_for_link_from_replica_holding_lock(api, redis, user_id):
+    settings.AUTH_SINGLE_FLIGHT_REDIS = True
+    settings.AUTH_LOCK_POLL_INTERVAL = 0.01
+    # Ссылку генерирует другая реплика: блокировка занята
+    await redis.set(f"{CACHE_AUTH_LOCK_PREFIX}{user_id}", "other", px=10_000)
+    expires_at = int(time.time()) + 600
+
+    async def other_replica() -> None:
+        await asyncio.sleep(0.05)
+        await cache_service.set_auth_link(
+            user_id, "https://example.com/other", expires_at
+        )
+
+    _, response = await asyncio.gather(
+        other_replica(), AuthService.generate_auth_link(user_id, "ivan", PHONE)
+    )
+
+    assert api.hits == 0
+    assert response == {
+        "authorization_link": "https://example.com/other",
+        "expires_at": expires_at,
+    }
+
+
+async def test_requests_link_when_lock_holder_gives_up(api, redis, user_id):
+    settings.AUTH_SINGLE_FLIGHT_REDIS = True
+    settings.AUTH_LOCK_TTL_MS = 100
+    settings.AUTH_LOCK_POLL_INTERVAL = 0.01
+    lock_key = f"{CACHE_AUTH_LOCK_PREFIX}{user_id}"
+    await redis.set(lock_key, "other", px=settings.AUTH_LOCK_TTL_MS)
+
+    await AuthService.generate_auth_link(user_id, "ivan", PHONE)
+
+    # Ссылка так и не появилась: запрос идет сам, а свою блокировку снимает
+    assert api.hits == 1
+    assert await redis.exists(lock_key) == 0
@@ -0,0 +1,148 @@
+"""Переключение кеша в память при сбое Redis и возврат после восстановления"""
+
+import asyncio
+import time
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from config import settings
+from src.constants import CACHE_PHONE_PREFIX
+from src.services.cache import cache_service
+from src.services.fsm_storage import FallbackStorage
+
+USERS = 20
+# Столько висит каждая команда упавшего Redis, как socket_timeout клиента
+REDIS_TIMEOUT = 0.3
+
+
+@pytest.fixture(params=["keys", "buckets"])
+def layout(request) -> str:
+    # Раскладка выбирается при подключении клиента, поэтому задается раньше redis
+    settings.CACHE_KEY_LAYOUT = request.param
+    return request.param
+
+
+@pytest.fixture
+async def outage(layout, flaky_redis):
+    settings.CACHE_FALLBACK_ENABLED = True
+    settings.CACHE_HEALTH_CHECK_INTERVAL = 0.2
+    settings.CACHE_RECONNECT_MIN_DELAY = 0.1
+    settings.CACHE_RECONNECT_MAX_DELAY = 0.5
+    settings.LOCAL_CACHE_ENABLED = False
+    flaky_redis.delay = REDIS_TIMEOUT
+    for user_id in range(USERS):
+        await cache_service.set_phone(user_id, "+79001234567")
+    return flaky_redis
+
+
+async def _tap_for(seconds: float) -> int:
+    """Пользователи жмут «авторизацию»; сколько нажатий ждали таймаута Redis"""
+    waited = 0
+    deadline = time.monotonic() + seconds
+
+    async def tap_loop(user_id: int) -> None:
+        nonlocal waited
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            await cache_service.get_auth_state(user_id)
+            waited += time.monotonic() - started >= REDIS_TIMEOUT
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(tap_loop(user_id) for user_id in range(USERS)))
+    return waited
+
+
+async def _wait_for_redis(timeout: float) -> float:
+    """Через сколько секунд кеш вернулся в Redis"""
+    started = time.monotonic()
+    while cache_service.backend is not cache_service.redis_backend:
+        assert time.monotonic() - started < timeout, "кеш не вернулся в Redis"
+        await asyncio.sleep(0.01)
+    return time.monotonic() - started
+
+
+async def _fail_over(flaky) -> None:
+    """Роняет Redis и ждет, пока кеш переключится в память"""
+    await cache_service.start()
+    flaky.down = True
+    await cache_service.get_phone(USERS)
+    assert cache_service.backend is cache_service.memory_backend
+
+
+async def test_outage_costs_one_timeout_per_user(outage):
+    await cache_service.start()
+    outage.down = True
+
+    # Таймаут ждут только нажатия, которые были в работе в момент сбоя
+    assert await _tap_for(1.0) <= USERS
+    assert cache_service.backend is cache_service.memory_backend
+
+
+async def test_cache_returns_to_redis_after_recovery(outage):
+    await cache_service.start()
+    outage.down = True
+    await _tap_for(0.5)
+    outage.down = False
+
+    back = await _wait_for_redis(timeout=5)
+    assert back <= settings.CACHE_RECONNECT_MAX_DELAY + REDIS_TIMEOUT + 0.5
+    phone = await cache_service.get_phone(0)
+    assert phone == "+79001234567"
+
+
+async def test_without_fallback_every_tap_waits_for_timeout(outage):
+    settings.CACHE_FALLBACK_ENABLED = False
+    await cache_service.start()
+    outage.down = True
+
+    assert await _tap_for(1.0) > USERS
+    assert cache_service.backend is cache_service.redis_backend
+
+
+async def test_pool_exhaustion_does_not_switch_to_memory(outage):
+    await cache_service.start()
+    # Так BlockingConnectionPool сообщает, что не дождался свободного соединения
+    error = RedisConnectionError("No connection available.")
+    error.__cause__ = asyncio.TimeoutError()
+    outage.error, outage.delay, outage.down = error, 0.0, True
+
+    assert await cache_service.get_phone(0) is None
+    assert cache_service.backend is cache_service.redis_backend
+
+
+async def test_writes_during_outage_reach_redis(outage):
+    await _fail_over(outage)
+    await cache_service.set_phone(0, "+79007654321")
+    await cache_service.delete_phone(1)
+    outage.down = False
+
+    await _wait_for_redis(timeout=5)
+    assert (
+        await cache_service.redis_backend.get(f"{CACHE_PHONE_PREFIX}0")
+        == "+79007654321"
+    )
+    assert await cache_service.redis_backend.get(f"{CACHE_PHONE_PREFIX}1") is None
+    assert await cache_service.get_phone(2) == "+79001234567"
+
+
+async def test_fsm_state_follows_cache_fallback(outage, redis):
+    storage = FallbackStorage(RedisStorage(redis=redis), cache_service)
+    key = StorageKey(bot_id=1, chat_id=2, user_id=2)
+    await storage.set_state(key, "AuthState:waiting_for_phone")
+
+    await _fail_over(outage)
+    # Состояние до сбоя на это время не видно, но обработка не ждет Redis
+    started = time.monotonic()
+    assert await storage.get_state(key) is None
+    assert time.monotonic() - started < REDIS_TIMEOUT
+    await storage.set_state(key, "FAQState:browsing")
+    await storage.set_data(key, {"page": 2})
+    assert await storage.get_state(key) == "FAQState:browsing"
+    outage.down = False
+
+    await _wait_for_redis(timeout=5)
+    assert await storage.get_state(key) == "FAQState:browsing"
+    assert await RedisStorage(redis=redis).get_data(key) == {"page": 2}
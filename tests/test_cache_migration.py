@@ -0,0 +1,107 @@
+"""Перенос кеша между раскладками keys и buckets с сохранением времени жизни"""
+
+import pytest
+
+from src.constants import (
+    CACHE_AUTH_LINK_PREFIX,
+    CACHE_BUCKET_INFIX,
+    CACHE_PHONE_PREFIX,
+)
+from src.services.cache_backend import BucketedRedisCacheBackend, RedisCacheBackend
+from src.services.cache_migration import migrate_layout
+
+BUCKETS = 4
+TTL = 600
+# Время жизни в мс могло уменьшиться, пока шел перенос; под нагрузкой
+# (параллельные прогоны в CI) перенос занимает больше секунды
+TTL_SLACK_MS = 10_000
+
+VALUES: dict[str, str] = {
+    **{
+        f"{CACHE_PHONE_PREFIX}{user_id}": f"+7900000000{user_id}"
+        for user_id in range(7)
+    },
+    f"{CACHE_AUTH_LINK_PREFIX}3": '{"link": "https://example.com", "expires_at": 1}',
+}
+
+
+@pytest.fixture
+async def keys_layout(redis) -> RedisCacheBackend:
+    """Кеш в раскладке keys: все значения с TTL, кроме одного телефона"""
+    backend = RedisCacheBackend(redis)
+    await backend.write([(key, (TTL, value)) for key, value in VALUES.items()])
+    await redis.persist(f"{CACHE_PHONE_PREFIX}0")
+    # Не пользовательские ключи раскладка не трогает
+    await redis.set(f"{CACHE_PHONE_PREFIX}lock", "1")
+    return backend
+
+
+def _assert_ttl(ttl_ms: int) -> None:
+    assert TTL * 1000 - TTL_SLACK_MS < ttl_ms <= TTL * 1000
+
+
+async def test_keys_to_buckets_keeps_values_and_ttls(keys_layout, redis):
+    assert await migrate_layout(redis, "buckets", BUCKETS, batch_size=3) == len(VALUES)
+
+    buckets = BucketedRedisCacheBackend(redis, BUCKETS)
+    for key, value in VALUES.items():
+        assert await redis.exists(key) == 0
+        assert await buckets.get(key) == value
+        bucket, field = buckets.locate(key)
+        [ttl_ms] = await redis.hpttl(bucket, field)
+        if key == f"{CACHE_PHONE_PREFIX}0":
+            assert ttl_ms == -1
+        else:
+            _assert_ttl(ttl_ms)
+    assert await redis.get(f"{CACHE_PHONE_PREFIX}lock") == "1"
+
+
+async def test_round_trip_back_to_keys(keys_layout, redis):
+    await migrate_layout(redis, "buckets", BUCKETS)
+
+    assert await migrate_layout(redis, "keys", BUCKETS, batch_size=3) == len(VALUES)
+    for key, value in VALUES.items():
+        assert await redis.get(key) == value
+        if key == f"{CACHE_PHONE_PREFIX}0":
+            assert await redis.pttl(key) == -1
+        else:
+            _assert_ttl(await redis.pttl(key))
+    assert await redis.keys(f"*{CACHE_BUCKET_INFIX}*") == []
+
+
+async def test_migration_can_be_repeated(keys_layout, redis):
+    await migrate_layout(redis, "buckets", BUCKETS)
+
+    # Прерванную миграцию запускают заново: перенесенное не трогается
+    assert await migrate_layout(redis, "buckets", BUCKETS) == 0
+    assert (
+        await BucketedRedisCacheBackend(redis, BUCKETS).get(f"{CACHE_PHONE_PREFIX}1")
+        == VALUES[f"{CACHE_PHONE_PREFIX}1"]
+    )
+
+
+async def test_bot_writes_in_new_layout_win(keys_layout, redis):
+    # Бот уже переключен на buckets и записал телефон до переноса старого ключа
+    buckets = BucketedRedisCacheBackend(redis, BUCKETS)
+    key = f"{CACHE_PHONE_PREFIX}1"
+    await buckets.write([(key, (TTL, "+79990000000"))])
+
+    await migrate_layout(redis, "buckets", BUCKETS)
+    assert await buckets.get(key) == "+79990000000"
+    assert await redis.exists(key) == 0
+
+
+async def test_bucketed_backend_keeps_ttl_per_field(redis):
+    buckets = BucketedRedisCacheBackend(redis, BUCKETS)
+    first, second = f"{CACHE_PHONE_PREFIX}1", f"{CACHE_PHONE_PREFIX}5"
+    await buckets.write([(first, (TTL, "+1")), (second, (TTL * 2, "+5"))])
+
+    # Оба ключа в одной корзине, но у каждого поля свой срок
+    bucket, _ = buckets.locate(first)
+    assert buckets.locate(second)[0] == bucket
+    first_ttl, second_ttl = await redis.hpttl(bucket, "1", "5")
+    _assert_ttl(first_ttl)
+    assert first_ttl < second_ttl
+
+    await buckets.write([(first, (0, None))])
+    assert await buckets.mget([first, second]) == [None, "+5"]
@@ -0,0 +1,75 @@
+"""Форматы записи ссылки авторизации в кеше"""
+
+import json
+import time
+
+import pytest
+
+from config import Settings, settings
+from src.constants import CACHE_AUTH_LINK_PREFIX
+from src.services.auth_service import AuthService
+from src.services.cache import cache_service
+from src.services.cache_serializer import (
+    SERIALIZERS,
+    AuthLinkSerializer,
+    JsonAuthLinkSerializer,
+    get_auth_link_serializer,
+)
+
+AUTH_DATA = {"link": "https://example.com/login?token=a b", "expires_at": 1700000000}
+
+
+@pytest.fixture(params=list(SERIALIZERS))
+def auth_link_format(request, monkeypatch) -> str:
+    settings.AUTH_LINK_CACHE_FORMAT = request.param
+    monkeypatch.setattr(
+        cache_service, "auth_link_serializer", get_auth_link_serializer()
+    )
+    return request.param
+
+
+def test_default_format_is_json():
+    # Прежние реплики читают только JSON: compact включается явно
+    assert Settings.model_fields["AUTH_LINK_CACHE_FORMAT"].default == "json"
+    assert isinstance(get_auth_link_serializer(), JsonAuthLinkSerializer)
+
+
+@pytest.mark.parametrize("writer", list(SERIALIZERS))
+@pytest.mark.parametrize("reader", list(SERIALIZERS))
+def test_every_format_reads_every_other(writer, reader):
+    raw = SERIALIZERS[writer]().dumps(AUTH_DATA)
+
+    assert SERIALIZERS[reader]().loads(raw) == AUTH_DATA
+
+
+def test_legacy_json_value_is_read():
+    # Так ссылку записывали версии до появления форматов
+    legacy = '{"expires_at": 1700000000, "link": "https://example.com/a"}'
+
+    assert AuthLinkSerializer.loads(legacy) == {
+        "link": "https://example.com/a",
+        "expires_at": 1700000000,
+    }
+
+
+def test_unknown_version_is_rejected():
+    with pytest.raises(ValueError):
+        AuthLinkSerializer.loads("9123 https://example.com")
+
+
+async def test_expired_link_round_trips_through_cache(auth_link_format, redis, user_id):
+    expires_at = int(time.time()) - 10
+    await cache_service.set_auth_link(user_id, "https://example.com/a", expires_at)
+
+    auth_data = await cache_service.get_auth_link(user_id)
+    assert auth_data == {"link": "https://example.com/a", "expires_at": expires_at}
+    assert not AuthService.is_auth_link_valid(auth_data["expires_at"])
+
+
+async def test_legacy_json_in_redis_is_read(auth_link_format, redis, user_id):
+    legacy = {"link": "https://example.com/a", "expires_at": int(time.time()) + 60}
+    await redis.set(f"{CACHE_AUTH_LINK_PREFIX}{user_id}", json.dumps(legacy))
+
+    assert await cache_service.get_auth_link(user_id) == legacy
+    auth_data, _ = await cache_service.get_auth_state(user_id)
+    assert auth_data == legacy
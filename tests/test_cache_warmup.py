@@ -0,0 +1,129 @@
+"""Выгрузка телефонов из кеша, загрузка обратно и продолжение прерванной загрузки"""
+
+import io
+from collections.abc import AsyncIterator
+
+import pytest
+
+from config import settings
+from src.constants import CACHE_PHONE_PREFIX
+from src.services.api_client import api_client
+from src.services.cache import cache_service
+from src.services.cache_warmup import (
+    LoadCheckpoint,
+    PhoneRow,
+    export_phones,
+    fetch_api_phones,
+    load_phones,
+    read_phone_file,
+)
+
+PHONES: dict[int, str] = {user_id: f"+7900{user_id:07d}" for user_id in range(1, 11)}
+CHUNK = 3
+
+
+class Crash(Exception):
+    """Загрузка прервана"""
+
+
+async def _crash_after(
+    rows: AsyncIterator[PhoneRow], count: int
+) -> AsyncIterator[PhoneRow]:
+    async for row in rows:
+        if not count:
+            raise Crash
+        count -= 1
+        yield row
+
+
+async def _cached_phones() -> dict[int, str]:
+    backend = cache_service.redis_backend
+    phones: dict[int, str] = {}
+    async for chunk in backend.scan_user_values(CACHE_PHONE_PREFIX, 100):
+        phones.update(chunk)
+    return phones
+
+
+@pytest.fixture
+def phone_file(tmp_path) -> str:
+    path = tmp_path / "phones.csv"
+    lines = ["user_id,phone", "oops", *(f"{u},{p}" for u, p in PHONES.items())]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("layout", ["keys", "buckets"])
+async def test_export_then_load_restores_phones(layout, redis, tmp_path):
+    settings.CACHE_KEY_LAYOUT = layout
+    cache_service.use_redis(redis)
+    for user_id, phone in PHONES.items():
+        await cache_service.set_phone(user_id, phone)
+
+    output = io.StringIO()
+    assert await export_phones(cache_service.redis_backend, output, CHUNK) == 10
+    path = tmp_path / "export.csv"
+    path.write_text(output.getvalue(), encoding="utf-8")
+    await redis.flushall()
+
+    loaded = await load_phones(
+        cache_service.redis_backend, read_phone_file(str(path)), CHUNK
+    )
+    assert loaded == len(PHONES)
+    assert await _cached_phones() == PHONES
+
+
+async def test_file_load_resumes_after_crash(redis, phone_file, tmp_path):
+    state = str(tmp_path / "load.json")
+    checkpoint = LoadCheckpoint(state, phone_file)
+    with pytest.raises(Crash):
+        await load_phones(
+            cache_service.redis_backend,
+            _crash_after(read_phone_file(phone_file), 7),
+            CHUNK,
+            checkpoint,
+        )
+
+    resumed = LoadCheckpoint(state, phone_file)
+    # Сохранены две полные пачки; седьмая строка загрузится заново
+    assert resumed.loaded == 6
+    rows = read_phone_file(phone_file, resumed.position)
+    assert await load_phones(cache_service.redis_backend, rows, CHUNK, resumed) == 10
+    assert await _cached_phones() == PHONES
+
+
+async def test_api_load_resumes_mid_page(redis, tmp_path, monkeypatch):
+    page_size = 4
+    items = [{"telegram_user_id": u, "phone": p} for u, p in PHONES.items()]
+    requested: list[int] = []
+
+    async def fetch_data(endpoint: str, params: dict[str, int]) -> dict:
+        requested.append(params["page"])
+        start = (params["page"] - 1) * params["page_size"]
+        return {"results": items[start : start + params["page_size"]]}
+
+    monkeypatch.setattr(api_client, "fetch_data", fetch_data)
+    state = str(tmp_path / "load.json")
+    with pytest.raises(Crash):
+        await load_phones(
+            cache_service.redis_backend,
+            _crash_after(fetch_api_phones("phones", 0, page_size), 7),
+            CHUNK,
+            LoadCheckpoint(state, "api:phones"),
+        )
+
+    resumed = LoadCheckpoint(state, "api:phones")
+    assert (resumed.position, resumed.loaded) == (6, 6)
+    requested.clear()
+    rows = fetch_api_phones("phones", resumed.position, page_size)
+    # Загруженные записи прерванной страницы не считаются второй раз
+    assert await load_phones(cache_service.redis_backend, rows, CHUNK, resumed) == 10
+    assert requested == [2, 3]
+    assert await _cached_phones() == PHONES
+
+
+def test_checkpoint_is_bound_to_source(tmp_path):
+    state = str(tmp_path / "load.json")
+    LoadCheckpoint(state, "api:phones").save(6, 6)
+
+    with pytest.raises(ValueError):
+        LoadCheckpoint(state, "file:/tmp/phones.csv")
@@ -0,0 +1,121 @@
+"""Обновление FAQ без перезапуска: перестроение индекса и старые кнопки"""
+
+import json
+from typing import Any
+
+import pytest
+
+from benchmarks.fake_telegram import callback_update
+from config import settings
+from src.constants import CALLBACK_FAQ_QUESTION, CALLBACK_FAQ_THEME
+from src.keyboards import messages
+from src.services.faq_index import theme_version
+from src.services.faq_service import FAQService
+from src.services.faq_store import FAQStore
+from src.types import FAQ_DATA, FAQTheme
+
+
+def _theme(name: str, *questions: str) -> FAQTheme:
+    return {
+        "theme": name,
+        "questions": [
+            {"question": question, "answer": f"Ответ: {question}"}
+            for question in questions
+        ],
+    }
+
+
+THEMES: list[FAQTheme] = [
+    _theme("Доступ", "Как восстановить пароль?", "Где найти сертификат?"),
+    _theme("Оплата", "Можно ли оплатить картой?"),
+    _theme("Расписание", "Когда начало занятий?"),
+]
+NEW_THEME = _theme("Новости", "Где читать новости?")
+
+
+@pytest.fixture
+def faq():
+    """FAQ из THEMES; после теста возвращается встроенный"""
+    FAQService.reload(THEMES)
+    yield
+    FAQService.reload(FAQ_DATA)
+
+
+@pytest.fixture
+def edited_texts(telegram, monkeypatch) -> list[str]:
+    """Тексты сообщений, которые бот отредактировал"""
+    texts: list[str] = []
+    make_request = telegram.make_request
+
+    async def record(bot: Any, method: Any, timeout: Any = None) -> Any:
+        if type(method).__name__ == "EditMessageText":
+            texts.append(method.text)
+        return await make_request(bot, method, timeout)
+
+    monkeypatch.setattr(telegram, "make_request", record)
+    return texts
+
+
+def test_inserted_theme_does_not_rebuild_others(faq):
+    old_views = [FAQService.get_theme_view(i) for i in range(len(THEMES))]
+
+    assert FAQService.reload([NEW_THEME, *THEMES]) == 1
+    # Экраны сдвинутых тем переиспользованы, а не отрендерены заново
+    for i, view in enumerate(old_views):
+        assert FAQService.get_theme_view(i + 1) is view
+
+
+def test_button_follows_theme_content(faq):
+    versions = FAQService.get_versions()
+    FAQService.reload([NEW_THEME, *THEMES])
+
+    assert FAQService.find_theme(versions[0]) == 1
+
+    changed = _theme("Доступ", "Как восстановить пароль?")
+    FAQService.reload([changed, *THEMES[1:]])
+    assert FAQService.find_theme(versions[0]) is None
+    assert FAQService.find_theme(versions[1]) == 1
+
+
+async def test_old_buttons_open_shifted_theme(faq, feed, edited_texts, user_id):
+    version = FAQService.get_versions()[1]
+    FAQService.reload([NEW_THEME, *THEMES])
+
+    await feed(callback_update(user_id, f"{CALLBACK_FAQ_THEME}:{version}"))
+    await feed(callback_update(user_id, f"{CALLBACK_FAQ_QUESTION}:{version}:0"))
+
+    assert edited_texts == [
+        FAQService.get_theme_view(2).text,
+        FAQService.get_question_view(2, 0).text,
+    ]
+
+
+async def test_button_of_changed_theme_is_outdated(faq, feed, edited_texts, user_id):
+    version = FAQService.get_versions()[0]
+    FAQService.reload([_theme("Доступ", "Как сменить почту?"), *THEMES[1:]])
+
+    # Прежний номер вопроса в измененной теме указал бы на другой вопрос
+    await feed(callback_update(user_id, f"{CALLBACK_FAQ_QUESTION}:{version}:0"))
+    # Кнопка в формате с позицией темы, выпущенная до обновления бота
+    await feed(callback_update(user_id, f"{CALLBACK_FAQ_THEME}:0:{version}"))
+
+    assert edited_texts == [messages.FAQ_WELCOME, messages.FAQ_WELCOME]
+
+
+async def test_store_reloads_changed_file(faq, tmp_path):
+    settings.FAQ_SOURCE = "file"
+    settings.FAQ_FILE_PATH = str(tmp_path / "faq.json")
+    store = FAQStore()
+
+    def write(themes: list[FAQTheme]) -> None:
+        (tmp_path / "faq.json").write_text(json.dumps(themes), encoding="utf-8")
+
+    write(THEMES)
+    # Содержимое совпадает с текущим индексом: перестраивать нечего
+    assert not await store.reload()
+
+    write([*THEMES, NEW_THEME])
+    assert await store.reload()
+    assert FAQService.get_versions()[-1] == theme_version(NEW_THEME)
+    # Файл не менялся: повторная проверка его не перечитывает
+    assert not await store.reload()
@@ -0,0 +1,96 @@
+"""Поиск по FAQ: приведение к основе, ранжирование и вырожденные индексы"""
+
+from benchmarks.fake_telegram import callback_update, message_update
+from config import settings
+from src.constants import CALLBACK_AUTH
+from src.services.faq_search import FAQSearchIndex, tokenize
+from src.types import FAQTheme
+from src.utils.russian_stemmer import stem
+
+THEMES: list[FAQTheme] = [
+    {
+        "theme": "Доступ",
+        "questions": [
+            {
+                "question": "Как восстановить пароль?",
+                "answer": "Нажмите «Забыли пароль» на странице входа.",
+            },
+            {
+                "question": "Где найти сертификат?",
+                "answer": "Сертификат приходит на почту, пароль не нужен.",
+            },
+        ],
+    },
+    {
+        "theme": "Оплата",
+        "questions": [
+            {
+                "question": "Можно ли оплатить картой?",
+                "answer": "Да, принимаются карты и рассрочка.",
+            },
+        ],
+    },
+]
+
+
+def _questions(results) -> list[str]:
+    return [result.question["question"] for result in results]
+
+
+def test_word_forms_share_a_stem():
+    assert {stem(word) for word in ("пароль", "пароля", "паролем", "пароли")} == {
+        "парол"
+    }
+    # Регистр, «ё» и стоп-слова на запрос не влияют
+    assert tokenize("Где ЕЁ пароли?") == tokenize("пароле")
+
+
+def test_query_matches_other_word_forms():
+    index = FAQSearchIndex(THEMES)
+
+    assert _questions(index.search("оплата картами", limit=1)) == [
+        "Можно ли оплатить картой?"
+    ]
+
+
+def test_match_in_question_ranks_above_match_in_answer():
+    index = FAQSearchIndex(THEMES)
+
+    results = index.search("пароль", limit=5)
+    assert _questions(results) == ["Как восстановить пароль?", "Где найти сертификат?"]
+    assert (results[0].theme_index, results[0].question_index) == (0, 0)
+
+
+def test_prefix_search_completes_last_word():
+    index = FAQSearchIndex(THEMES)
+
+    assert index.search("серт", limit=5) == []
+    assert _questions(index.search("серт", limit=5, prefix=True)) == [
+        "Где найти сертификат?"
+    ]
+
+
+def test_empty_index():
+    assert len(FAQSearchIndex([])) == 0
+    assert FAQSearchIndex([]).search("пароль", limit=5) == []
+
+    # Вопросы из одних стоп-слов: у документов нет терминов вовсе
+    index = FAQSearchIndex(
+        [{"theme": "Пусто", "questions": [{"question": "Как?", "answer": "Это так."}]}]
+    )
+    assert len(index) == 1
+    assert index.search("как это", limit=5) == []
+
+
+async def test_text_is_searched_outside_of_scenarios(feed, redis, user_id):
+    calls = await feed(message_update(user_id, "пароль"))
+
+    assert calls == {"SendMessage": 1}
+
+
+async def test_text_is_not_searched_while_waiting_for_phone(feed, stub_api, user_id):
+    settings.AUTH_LOADING_MODE = "sticker"
+    # Номера в кеше нет: бот просит поделиться контактом
+    await feed(callback_update(user_id, CALLBACK_AUTH))
+
+    assert await feed(message_update(user_id, "пароль")) == {}
@@ -0,0 +1,99 @@
+"""Локальный кеш (L1) реплик и его инвалидация через Redis"""
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from config import settings
+from src.constants import CACHE_PHONE_PREFIX
+from src.services.cache import CacheService
+from src.services.cache_warmup import PhoneRow, load_phones
+
+OLD, NEW = "+79000000001", "+79000000002"
+
+
+async def _start(client) -> CacheService:
+    replica = CacheService()
+    replica.use_redis(client)
+    await replica.start()
+    while not replica._local_cache_ready:
+        await asyncio.sleep(0.01)
+    return replica
+
+
+@pytest.fixture
+async def replicas() -> AsyncIterator[list[CacheService]]:
+    """Две реплики с L1, каждая со своим клиентом одного Redis"""
+    settings.LOCAL_CACHE_ENABLED = True
+    settings.CACHE_FALLBACK_ENABLED = False
+    server = FakeServer()
+    clients = [FakeRedis(server=server, decode_responses=True) for _ in range(2)]
+    started = [await _start(client) for client in clients]
+    yield started
+    for replica in started:
+        await replica.close()
+    for client in clients:
+        await client.aclose()
+
+
+async def _phone_is(replica: CacheService, user_id: int, phone) -> bool:
+    return await replica.get_phone(user_id) == phone
+
+
+async def _eventually(check, timeout: float = 1.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await check():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+async def test_write_invalidates_other_replica(replicas, user_id):
+    first, second = replicas
+    await first.set_phone(user_id, OLD)
+    assert await second.get_phone(user_id) == OLD
+
+    await first.set_phone(user_id, NEW)
+    # До инвалидации вторая реплика отвечает из своего L1
+    await _eventually(lambda: _phone_is(second, user_id, NEW))
+
+    await first.delete_phone(user_id)
+    await _eventually(lambda: _phone_is(second, user_id, None))
+
+
+async def test_bulk_load_invalidates_replicas(replicas, user_id):
+    first, second = replicas
+    await first.set_phone(user_id, OLD)
+    assert await second.get_phone(user_id) == OLD
+
+    async def rows() -> AsyncIterator[PhoneRow]:
+        yield user_id, NEW, 1
+
+    await load_phones(first.redis_backend, rows(), chunk_size=10)
+    await _eventually(lambda: _phone_is(first, user_id, NEW))
+    await _eventually(lambda: _phone_is(second, user_id, NEW))
+
+
+async def test_stale_read_does_not_overwrite_own_write(replicas, user_id, monkeypatch):
+    replica = replicas[0]
+    await replica.set_phone(user_id, OLD)
+    replica.local_cache.clear()
+    get = replica.redis_backend.get
+    read_started = asyncio.Event()
+
+    async def slow_get(key: str):
+        value = await get(key)
+        read_started.set()
+        await asyncio.sleep(0.05)
+        return value
+
+    monkeypatch.setattr(replica.redis_backend, "get", slow_get)
+    # Чтение получило старое значение, и тут же реплика записала новое
+    read = asyncio.create_task(replica.get_phone(user_id))
+    await read_started.wait()
+    await replica.set_phone(user_id, NEW)
+
+    assert await read == OLD
+    assert replica.local_cache.get(f"{CACHE_PHONE_PREFIX}{user_id}") == NEW
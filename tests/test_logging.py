@@ -0,0 +1,63 @@
+"""Структурные логи: маскирование телефона и контекст обновления"""
+
+import json
+import logging
+from typing import Any
+
+import pytest
+from aiogram.types import User
+
+from src.utils.logger import (
+    JsonFormatter,
+    LogContextFilter,
+    log_user_action,
+    reset_log_context,
+    set_log_context,
+)
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+    def json(self) -> list[dict[str, Any]]:
+        return [json.loads(JsonFormatter().format(r)) for r in self.records]
+
+
+@pytest.fixture
+def records():
+    handler = Records()
+    handler.addFilter(LogContextFilter())
+    logger = logging.getLogger("tests.logging")
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    yield handler
+    logger.removeHandler(handler)
+
+
+def test_phone_is_masked_in_message_and_fields(records):
+    user = User(id=7, is_bot=False, first_name="Иван", username="ivan")
+    log_user_action(
+        logging.getLogger("tests.logging"), user, "shared phone", phone="+79001234567"
+    )
+
+    [payload] = records.json()
+    assert payload["phone"] == "********4567"
+    assert "+7900" not in payload["message"]
+    assert payload["action"] == "shared phone"
+
+
+def test_log_context_does_not_leak_into_default(records):
+    logger = logging.getLogger("tests.logging")
+    token = set_log_context(handler="faq")
+    logger.info("inside")
+    reset_log_context(token)
+    logger.info("outside")
+
+    inside, outside = records.json()
+    assert inside["handler"] == "faq"
+    assert "handler" not in outside
@@ -0,0 +1,128 @@
+"""Планировщик отправки против поддельного Telegram с флуд-лимитами"""
+
+import asyncio
+import random
+from collections import Counter
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+
+from benchmarks.fake_telegram import FloodLimitedSession, fake_bot
+from src.exceptions import SendDroppedError
+from src.services.send_scheduler import SendPriority, SendScheduler, send_priority
+from src.utils.token_bucket import PriorityGate, TokenBucket
+
+# Лимиты масштабированы вверх, чтобы всплеск шел около секунды
+GLOBAL_RATE, GLOBAL_BURST = 1000.0, 100
+CHAT_RATE, CHAT_BURST = 5.0, 3
+
+Send = tuple[float, int, SendPriority]
+
+
+def _flood_limited_bot(
+    inject_retry_after: float = 0.0, low_priority_max_queue: int = 200
+) -> tuple[FloodLimitedSession, Bot]:
+    session = FloodLimitedSession(
+        GLOBAL_RATE, GLOBAL_BURST, CHAT_RATE, CHAT_BURST, inject_retry_after
+    )
+    session.middleware(
+        SendScheduler(
+            global_rate=GLOBAL_RATE,
+            global_burst=GLOBAL_BURST,
+            chat_rate=CHAT_RATE,
+            chat_burst=CHAT_BURST,
+            low_priority_max_queue=low_priority_max_queue,
+        )
+    )
+    return session, fake_bot(session)
+
+
+def _spike(sends: int, chats: int, seconds: float) -> list[Send]:
+    """(задержка от начала, чат, приоритет) для каждой отправки"""
+    rng = random.Random(0)
+    priorities = [SendPriority.HIGH, SendPriority.NORMAL, SendPriority.LOW]
+    return [
+        (
+            rng.uniform(0, seconds),
+            rng.randrange(chats) + 1,
+            rng.choices(priorities, [0.2, 0.5, 0.3])[0],
+        )
+        for _ in range(sends)
+    ]
+
+
+async def _send_all(bot: Bot, sends: list[Send]) -> Counter:
+    """Исходы отправок по (приоритет, исход)"""
+    outcomes: Counter = Counter()
+
+    async def send(delay: float, chat_id: int, priority: SendPriority) -> None:
+        await asyncio.sleep(delay)
+        try:
+            with send_priority(priority):
+                if priority == SendPriority.LOW:
+                    await bot.send_sticker(chat_id, "sticker")
+                else:
+                    await bot.send_message(chat_id, "text")
+        except SendDroppedError:
+            outcomes[priority, "dropped"] += 1
+        except TelegramRetryAfter:
+            outcomes[priority, "429"] += 1
+        else:
+            outcomes[priority, "delivered"] += 1
+
+    await asyncio.gather(*(send(*item) for item in sends))
+    return outcomes
+
+
+def _undelivered(outcomes: Counter) -> int:
+    return sum(
+        count
+        for (priority, outcome), count in outcomes.items()
+        if priority != SendPriority.LOW and outcome != "delivered"
+    )
+
+
+async def test_burst_stays_within_flood_limits():
+    session, bot = _flood_limited_bot()
+    outcomes = await _send_all(bot, _spike(sends=1000, chats=200, seconds=0.5))
+
+    assert not session.rejected["chat"]
+    assert not session.rejected["global"]
+    assert _undelivered(outcomes) == 0
+
+
+async def test_unexpected_retry_after_is_retried():
+    session, bot = _flood_limited_bot(inject_retry_after=0.02)
+    outcomes = await _send_all(bot, _spike(sends=500, chats=100, seconds=0.3))
+
+    assert session.rejected["injected"]
+    assert _undelivered(outcomes) == 0
+
+
+async def test_low_priority_is_dropped_when_queue_overflows():
+    session, bot = _flood_limited_bot(low_priority_max_queue=5)
+    # Всплеск по разным чатам разом: общая очередь растет быстрее лимита
+    sends = [(0.0, chat, SendPriority.HIGH) for chat in range(1, 201)]
+    sends += [(0.0, chat, SendPriority.LOW) for chat in range(201, 251)]
+    outcomes = await _send_all(bot, sends)
+
+    assert outcomes[SendPriority.LOW, "dropped"] > 0
+    assert outcomes[SendPriority.HIGH, "delivered"] == 200
+    assert not session.rejected["global"]
+
+
+async def test_cancelled_waiters_are_not_counted():
+    bucket = TokenBucket(rate=10.0, capacity=1)
+    bucket.take()
+    gate = PriorityGate(bucket)
+    waiters = [asyncio.create_task(gate.acquire(priority)) for priority in (2, 1, 3)]
+    await asyncio.sleep(0)
+    assert gate.waiting == 3
+
+    # Отмененный ожидающий не наверху кучи и остается в ней до своей очереди
+    waiters[2].cancel()
+    await asyncio.sleep(0)
+    assert gate.waiting == 2
+
+    await asyncio.gather(waiters[0], waiters[1])
+    assert gate.waiting == 0
@@ -0,0 +1,117 @@
+"""Ограничение частоты действий: локальное окно, общее окно Redis и сбой Redis"""
+
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from aiogram.types import CallbackQuery, User
+
+from benchmarks.fake_telegram import fake_bot
+from config import settings
+from src.constants import CACHE_THROTTLE_PREFIX
+from src.middlewares.throttling import ThrottlingMiddleware
+from src.services.cache import cache_service
+from src.utils.sliding_window import PRUNE_EVERY, SlidingWindow
+
+LIMIT, WINDOW = 3, 60.0
+
+
+async def auth_callback(event: Any, data: dict[str, Any]) -> str:
+    return "handled"
+
+
+class Replica:
+    """Middleware одной реплики бота и ответы ее обработчика"""
+
+    def __init__(self, telegram):
+        self.middleware = ThrottlingMiddleware({"auth_callback": (LIMIT, WINDOW)})
+        self.bot = fake_bot(telegram)
+
+    async def tap(self, user_id: int) -> Any:
+        user = User(id=user_id, is_bot=False, first_name="Test")
+        callback = CallbackQuery(
+            id=str(user_id), from_user=user, chat_instance="chat", data="auth"
+        ).as_(self.bot)
+        data = {
+            "event_from_user": user,
+            "handler": SimpleNamespace(callback=auth_callback),
+        }
+        return await self.middleware(auth_callback, callback, data)
+
+    async def taps(self, user_id: int, count: int) -> list[Any]:
+        return [await self.tap(user_id) for _ in range(count)]
+
+
+@pytest.fixture
+def replica(telegram) -> Replica:
+    return Replica(telegram)
+
+
+def test_sliding_window_limits_and_expires():
+    window = SlidingWindow(limit=2, window=10.0)
+
+    assert window.hit("user", now=0.0)
+    assert window.hit("user", now=1.0)
+    assert not window.hit("user", now=2.0)
+    # Другие ключи считаются отдельно
+    assert window.hit("other", now=2.0)
+    # Первое событие вышло из окна
+    assert window.hit("user", now=10.5)
+    assert not window.hit("user", now=10.6)
+
+
+def test_sliding_window_forgets_idle_keys():
+    window = SlidingWindow(limit=1, window=1.0)
+    for key in range(PRUNE_EVERY - 1):
+        window.record(key, now=0.0)
+    assert len(window) == PRUNE_EVERY - 1
+
+    # Каждое PRUNE_EVERY-е событие чистит ключи без событий в окне
+    window.record("fresh", now=5.0)
+    assert len(window) == 1
+
+
+async def test_full_local_window_skips_redis(replica, redis, user_id, monkeypatch):
+    assert await replica.taps(user_id, LIMIT) == ["handled"] * LIMIT
+
+    redis_checks = []
+    hit_rate_limit = cache_service.hit_rate_limit
+
+    async def counted(*args: Any) -> Any:
+        redis_checks.append(args)
+        return await hit_rate_limit(*args)
+
+    monkeypatch.setattr(cache_service, "hit_rate_limit", counted)
+    assert await replica.tap(user_id) is None
+    # Заполненное локальное окно отклоняет, не обращаясь к Redis
+    assert redis_checks == []
+
+
+async def test_redis_window_is_shared_between_replicas(telegram, redis, user_id):
+    first, second = Replica(telegram), Replica(telegram)
+
+    assert await first.taps(user_id, 2) == ["handled"] * 2
+    # Локальное окно второй реплики пусто, но общее в Redis уже почти заполнено
+    assert await second.taps(user_id, 2) == ["handled", None]
+
+    key = f"{CACHE_THROTTLE_PREFIX}auth_callback:{user_id}"
+    assert await redis.zcard(key) == LIMIT
+    assert 0 < await redis.pttl(key) <= WINDOW * 1000
+
+
+async def test_rejected_callback_gets_empty_answer(replica, telegram, redis, user_id):
+    await replica.taps(user_id, LIMIT)
+    telegram.calls.clear()
+
+    assert await replica.tap(user_id) is None
+    # Только ответ на callback, чтобы у кнопки пропали «часики»
+    assert telegram.calls == {"AnswerCallbackQuery": 1}
+
+
+async def test_local_window_decides_when_redis_is_down(replica, flaky_redis, user_id):
+    settings.CACHE_FALLBACK_ENABLED = True
+    flaky_redis.down = True
+
+    assert await replica.taps(user_id, LIMIT + 1) == ["handled"] * LIMIT + [None]
+    assert cache_service.backend is cache_service.memory_backend
+    assert await cache_service.hit_rate_limit(user_id, "auth_callback", 1, 1000) is None
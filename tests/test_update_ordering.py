@@ -0,0 +1,142 @@
+"""Порядок обработки обновлений одного пользователя при потоке от многих"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from collections import defaultdict
+from typing import Any
+
+import pytest
+from aiogram import Dispatcher, Router
+from aiogram.fsm.storage.base import BaseEventIsolation
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Message
+
+from benchmarks.fake_telegram import (
+    GET_UPDATES_LIMIT,
+    UpdateFeedSession,
+    fake_bot,
+    message_update,
+)
+from config import settings
+from src.polling import PollingRunner
+from src.update_ordering import OrderedEventIsolation
+
+USERS, PER_USER = 50, 20
+CONCURRENCY = 20
+MAX_PENDING = 200
+
+
+class Recorder:
+    """Порядок ответов каждому пользователю и одновременность его обработки"""
+
+    def __init__(self, expected: int):
+        self.rng = random.Random(0)
+        self.expected = expected
+        self.applied: dict[int, list[int]] = defaultdict(list)
+        self.in_flight: dict[int, int] = defaultdict(int)
+        self.overlaps = 0
+        self.active = 0
+        self.max_active = 0
+        self.processed = 0
+        self.done = asyncio.Event()
+
+    async def handle(self, message: Message) -> None:
+        user_id = message.from_user.id
+        self.in_flight[user_id] += 1
+        self.overlaps += self.in_flight[user_id] > 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            # Как обработчик, который сначала читает состояние, а потом
+            # отвечает: порядок ответов и есть порядок для пользователя
+            await asyncio.sleep(self.rng.uniform(0, 0.002))
+            self.applied[user_id].append(int(message.text))
+            await asyncio.sleep(self.rng.uniform(0, 0.002))
+        finally:
+            self.in_flight[user_id] -= 1
+            self.active -= 1
+            self.processed += 1
+            if self.processed == self.expected:
+                self.done.set()
+
+    def order_violations(self) -> int:
+        return sum(
+            sum(1 for a, b in zip(seqs, seqs[1:]) if b < a)
+            for seqs in self.applied.values()
+        )
+
+
+def _updates() -> list[dict[str, Any]]:
+    """Обновления, перемешанные между пользователями, по порядку внутри"""
+    rng = random.Random(0)
+    remaining = {user: PER_USER for user in range(1, USERS + 1)}
+    updates = []
+    while remaining:
+        user = rng.choice(list(remaining))
+        updates.append(message_update(user, str(PER_USER - remaining[user])))
+        remaining[user] -= 1
+        if not remaining[user]:
+            del remaining[user]
+    return updates
+
+
+async def _poll_all(isolation: BaseEventIsolation | None) -> dict[str, Any]:
+    """Прогоняет поток через PollingRunner; что видели обработчики и очередь"""
+    settings.POLLING_MAX_PENDING = MAX_PENDING
+    settings.POLLING_TIMEOUT = 0
+    updates = _updates()
+    recorder = Recorder(len(updates))
+    router = Router()
+    router.message()(recorder.handle)
+    dp = Dispatcher(storage=MemoryStorage(), events_isolation=isolation)
+    dp.include_router(router)
+    runner = PollingRunner(dp, fake_bot(UpdateFeedSession(updates)))
+
+    max_pending = 0
+
+    async def watch_pending() -> None:
+        nonlocal max_pending
+        while True:
+            max_pending = max(max_pending, runner.pending)
+            await asyncio.sleep(0.001)
+
+    tasks = [asyncio.create_task(runner.poll()), asyncio.create_task(watch_pending())]
+    try:
+        await asyncio.wait_for(recorder.done.wait(), timeout=30)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await runner.drain()
+    return {"recorder": recorder, "max_pending": max_pending}
+
+
+@pytest.fixture
+def isolation() -> OrderedEventIsolation:
+    return OrderedEventIsolation(CONCURRENCY)
+
+
+async def test_updates_of_one_user_are_handled_in_order(isolation):
+    result = await _poll_all(isolation)
+    recorder = result["recorder"]
+
+    assert recorder.order_violations() == 0
+    assert recorder.overlaps == 0
+    # Разные пользователи при этом обрабатываются параллельно
+    assert 1 < recorder.max_active <= CONCURRENCY
+    assert result["max_pending"] <= MAX_PENDING + GET_UPDATES_LIMIT
+
+
+async def test_isolation_forgets_idle_users(isolation):
+    await _poll_all(isolation)
+
+    assert isolation.active_keys() == 0
+
+
+async def test_without_isolation_order_breaks():
+    # Контроль: тот же поток без очередей по пользователям нарушает порядок
+    result = await _poll_all(None)
+
+    assert result["recorder"].overlaps > 0
@@ -0,0 +1,102 @@
+"""Отложенная запись в Redis: пачки, чтение своих записей, сбои и остановка"""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from config import settings
+from src.constants import CACHE_PHONE_PREFIX
+from src.services.cache import cache_service
+
+PHONE = "+79001234567"
+
+
+@pytest.fixture
+async def write_behind(redis, monkeypatch) -> list[int]:
+    """Включает отложенную запись; размеры пачек, отправленных в Redis"""
+    settings.CACHE_WRITE_BEHIND_ENABLED = True
+    settings.CACHE_WRITE_BEHIND_BATCH_SIZE = 3
+    # Сброс по таймеру не мешает: пачки уходят по заполнению или при остановке
+    settings.CACHE_WRITE_BEHIND_FLUSH_INTERVAL = 10.0
+    settings.CACHE_FALLBACK_ENABLED = False
+    batches: list[int] = []
+    write = cache_service.redis_backend.write
+
+    async def recorded(writes: Any, *args: Any) -> None:
+        await write(writes, *args)
+        batches.append(len(writes))
+
+    monkeypatch.setattr(cache_service.redis_backend, "write", recorded)
+    await cache_service.start()
+    return batches
+
+
+async def _in_redis(user_id: int) -> Any:
+    return await cache_service.redis_backend.get(f"{CACHE_PHONE_PREFIX}{user_id}")
+
+
+async def test_writes_are_sent_in_batches(write_behind):
+    for user_id in range(7):
+        await cache_service.set_phone(user_id, PHONE)
+    assert write_behind == []
+
+    await asyncio.sleep(0.05)
+    # Две полные пачки по заполнению и остаток, пришедший до сброса
+    assert write_behind == [3, 3, 1]
+    assert [await _in_redis(user_id) for user_id in range(7)] == [PHONE] * 7
+
+
+async def test_reads_see_pending_writes(write_behind):
+    await cache_service.redis_backend.write([(f"{CACHE_PHONE_PREFIX}1", (60, PHONE))])
+    await cache_service.set_phone(0, PHONE)
+    await cache_service.delete_phone(1)
+
+    assert await _in_redis(0) is None
+    assert await _in_redis(1) == PHONE
+    # В том же процессе записи и удаления видны до отправки
+    assert await cache_service.get_phone(0) == PHONE
+    assert await cache_service.get_phone(1) is None
+
+
+async def test_failed_batch_is_requeued(write_behind, flaky_redis):
+    flaky_redis.down = True
+    for user_id in range(3):
+        await cache_service.set_phone(user_id, PHONE)
+    await asyncio.sleep(0.05)
+
+    assert write_behind == []
+    assert await cache_service.get_phone(0) == PHONE
+    # Новая запись ключа из неудачной пачки не затирается ею
+    await cache_service.set_phone(0, "+79000000000")
+
+    flaky_redis.down = False
+    await cache_service.close()
+    assert await _in_redis(0) == "+79000000000"
+    assert [await _in_redis(user_id) for user_id in (1, 2)] == [PHONE] * 2
+
+
+async def test_close_flushes_pending_writes(write_behind):
+    await cache_service.set_phone(0, PHONE)
+    await cache_service.delete_phone(1)
+
+    await cache_service.close()
+    assert write_behind == [2]
+    assert await _in_redis(0) == PHONE
+
+
+async def test_close_flushes_batch_interrupted_by_cancel(write_behind, monkeypatch):
+    write = cache_service.redis_backend.write
+
+    async def slow(*args: Any) -> None:
+        await asyncio.sleep(0.1)
+        await write(*args)
+
+    monkeypatch.setattr(cache_service.redis_backend, "write", slow)
+    for user_id in range(3):
+        await cache_service.set_phone(user_id, PHONE)
+    # Пачка уже отправляется, когда остановка отменяет фоновую задачу
+    await asyncio.sleep(0.01)
+
+    await cache_service.close()
+    assert [await _in_redis(user_id) for user_id in range(3)] == [PHONE] * 3